@@ -2,6 +2,7 @@
 Postiz Python Service - FastAPI приложение.
 """
 import traceback
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -12,6 +13,23 @@ from app.api.posts_router import router as posts_router
 from app.api.adverb_post import router as advert_router
 from app.api.image_router import router as image_router
 from app.api.video_router import router as video_router
+from app.api.metrics_router import router as metrics_router, LLMMetricsMiddleware
+from app.services.ai_parser import ai_parser_service
+from app.services.nine_api import nine_service
+from app.services.catalog_sync import catalog_sync
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения: фоновая синхронизация каталога при старте,
+    закрытие общих HTTP-клиентов при остановке.
+    """
+    catalog_sync.start()
+    yield
+    await catalog_sync.aclose()
+    await ai_parser_service.aclose()
+    await nine_service.aclose()
 
 
 def create_app() -> FastAPI:
@@ -24,7 +42,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="Postiz Python Service",
         description="API для AI парсинга и работы с данными авто",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
 
     # CORS middleware
@@ -36,6 +55,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Учёт вызовов LLM по запросам
+    app.add_middleware(LLMMetricsMiddleware)
+
     # Глобальный обработчик ошибок - показывает ВСЕ ошибки
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
@@ -57,6 +79,7 @@ def create_app() -> FastAPI:
     app.include_router(advert_router)
     app.include_router(image_router)
     app.include_router(video_router)
+    app.include_router(metrics_router)
 
     @app.get("/health")
     async def health():
@@ -4,12 +4,14 @@ API роутер для создания объявлений на 999.md.
 import httpx, json
 import re
 import os
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 
-from ..utils.api_helpers import get_api_headers
+from ..utils.api_helpers import require_llm_capacity, require_no_llm_rejections
 from ..services.ai_parser import ai_parser_service
+from ..services.llm_metrics import llm_metrics
+from ..services.nine_api import nine_service
 from app.config.settings import NINE_API_KEY, BASE_URL_999, TYPE_999_ADVERT
 
 router = APIRouter(prefix="/api", tags=["advert"])
@@ -25,6 +27,9 @@ OFFER_TYPE = "776"            # Продам
 # Feature ID для изображений
 IMAGES_FEATURE_ID = "14"
 
+# Поля с переводом RU→RO (заголовок, описание)
+TRANSLATED_FEATURE_IDS = ["12", "13"]
+
 # Поля которые могут вызвать ошибку валидации (пропускаем если невалидные)
 OPTIONAL_VALIDATION_FIELDS = ["2512"]  # VIN-код
 NUMBER_FOR_ADVERB_POST = os.getenv("NUMBER_FOR_ADVERB_POST") if os.getenv("NUMBER_FOR_ADVERB_POST") else "79933994,79911994"
@@ -102,10 +107,15 @@ def format_phone_number(phone: str) -> str:
     return digits
 
 
-def format_feature_value(feat: FeatureValue) -> Optional[Dict[str, Any]]:
+def format_feature_value(
+    feat: FeatureValue,
+    translations: Optional[Dict[str, str]] = None
+) -> Optional[Dict[str, Any]]:
     """
     Форматирует значение характеристики для 999.md API.
     Возвращает None если поле невалидно и должно быть пропущено.
+    
+    translations — готовые переводы на румынский по ID поля (заголовок, описание).
     """
     feature_id = feat.id
     value = feat.value
@@ -119,9 +129,8 @@ def format_feature_value(feat: FeatureValue) -> Optional[Dict[str, Any]]:
         return {"id": feature_id, "value": value.strip().upper()}
 
     # Заголовок и Описание - требуют объект с языками ro/ru
-    if feature_id in ["12", "13"]:
-        # Переводим русский текст на румынский
-        ro_value = ai_parser_service.translate_russian_to_romanian(value)
+    if feature_id in TRANSLATED_FEATURE_IDS:
+        ro_value = (translations or {}).get(feature_id)
         return {
             "id": feature_id,
             "value": {
@@ -181,13 +190,19 @@ def convert_localhost_to_docker(url: str) -> str:
     return docker_url
 
 
-async def upload_image_to_999(image_url: str, api_key: str) -> Optional[str]:
+async def upload_image_to_999(
+    image_url: str,
+    api_key: str,
+    download_client: httpx.AsyncClient
+) -> Optional[str]:
     """
     Загружает одно изображение на 999.md и возвращает его ID/имя.
     
     Args:
         image_url: URL изображения для загрузки
         api_key: API ключ 999.md
+        download_client: Клиент для скачивания исходных изображений
+            (без авторизации 999.md — изображения лежат на других хостах)
         
     Returns:
         Имя загруженного изображения (например: "ba2b163dsteag6f4ecd28dadff121350.jpg")
@@ -197,78 +212,76 @@ async def upload_image_to_999(image_url: str, api_key: str) -> Optional[str]:
         # Преобразуем localhost URL в Docker-совместимый
         docker_url = convert_localhost_to_docker(image_url)
         
-        async with httpx.AsyncClient() as client:
-            # 1. Скачиваем изображение по URL
-            print(f"  📥 Скачиваем: {docker_url[:60]}...")
-            
-            img_response = await client.get(docker_url, timeout=30.0, follow_redirects=True)
-            if img_response.status_code != 200:
-                print(f"  ❌ Не удалось скачать изображение: {img_response.status_code}")
-                return None
-            
-            image_data = img_response.content
-            content_type = img_response.headers.get("content-type", "image/jpeg")
-            
-            # Определяем расширение файла
-            if "png" in content_type:
-                ext = "png"
-            elif "gif" in content_type:
-                ext = "gif"
-            elif "webp" in content_type:
-                ext = "webp"
-            else:
-                ext = "jpg"
-            
-            # Генерируем имя файла
-            import hashlib
-            file_hash = hashlib.md5(image_data).hexdigest()
-            filename = f"{file_hash}.{ext}"
-            
-            # 2. Загружаем на 999.md
-            print(f"  📤 Загружаем на 999.md: {filename}")
-            
-            # Формируем multipart запрос
-            files = {
-                "file": (filename, image_data, content_type)
-            }
+        # 1. Скачиваем изображение по URL
+        print(f"  📥 Скачиваем: {docker_url[:60]}...")
+        
+        img_response = await download_client.get(docker_url, timeout=30.0, follow_redirects=True)
+        if img_response.status_code != 200:
+            print(f"  ❌ Не удалось скачать изображение: {img_response.status_code}")
+            return None
+        
+        image_data = img_response.content
+        content_type = img_response.headers.get("content-type", "image/jpeg")
+        
+        # Определяем расширение файла
+        if "png" in content_type:
+            ext = "png"
+        elif "gif" in content_type:
+            ext = "gif"
+        elif "webp" in content_type:
+            ext = "webp"
+        else:
+            ext = "jpg"
+        
+        # Генерируем имя файла
+        import hashlib
+        file_hash = hashlib.md5(image_data).hexdigest()
+        filename = f"{file_hash}.{ext}"
+        
+        # 2. Загружаем на 999.md
+        print(f"  📤 Загружаем на 999.md: {filename}")
+        
+        # Формируем multipart запрос
+        files = {
+            "file": (filename, image_data, content_type)
+        }
+        
+        upload_response = await nine_service.client.post(
+            "/images",
+            files=files,
+            timeout=60.0
+        )
+        
+        print(f"  📨 Ответ загрузки: {upload_response.status_code}")
+        
+        if upload_response.status_code in [200, 201]:
+            result = upload_response.json()
+            print(f"  ✅ Загружено: {result}")
             
-            upload_response = await client.post(
-                f"{NINE_API_URL}/images",
-                files=files,
-                headers=get_api_headers(),
-                timeout=60.0
+            # Возвращаем image_id из ответа API
+            # API 999.md возвращает: {'image_id': 'abc123.jpg'}
+            image_id = (
+                result.get("image_id") or 
+                result.get("filename") or 
+                result.get("id") or 
+                result.get("name") or 
+                result.get("image")
             )
             
-            print(f"  📨 Ответ загрузки: {upload_response.status_code}")
-            
-            if upload_response.status_code in [200, 201]:
-                result = upload_response.json()
-                print(f"  ✅ Загружено: {result}")
-                
-                # Возвращаем image_id из ответа API
-                # API 999.md возвращает: {'image_id': 'abc123.jpg'}
-                image_id = (
-                    result.get("image_id") or 
-                    result.get("filename") or 
-                    result.get("id") or 
-                    result.get("name") or 
-                    result.get("image")
-                )
+            if image_id:
+                print(f"  ✅ Image ID: {image_id}")
+                return image_id
                 
-                if image_id:
-                    print(f"  ✅ Image ID: {image_id}")
-                    return image_id
-                    
-                # Если в ответе строка - возвращаем как есть
-                if isinstance(result, str):
-                    return result
-                    
-                print(f"  ⚠️ Неизвестный формат ответа: {result}")
-                return None
-            else:
-                print(f"  ❌ Ошибка загрузки: {upload_response.text}")
-                return None
+            # Если в ответе строка - возвращаем как есть
+            if isinstance(result, str):
+                return result
                 
+            print(f"  ⚠️ Неизвестный формат ответа: {result}")
+            return None
+        else:
+            print(f"  ❌ Ошибка загрузки: {upload_response.text}")
+            return None
+            
     except Exception as e:
         print(f"  ❌ Исключение при загрузке: {str(e)}")
         return None
@@ -282,20 +295,22 @@ async def upload_images_to_999(images: List[str], api_key: str) -> List[str]:
     
     uploaded_ids = []
     
-    for i, image_url in enumerate(images):
-        print(f"\n[{i+1}/{len(images)}] Обработка изображения:")
-        image_id = await upload_image_to_999(image_url, api_key)
-        
-        if image_id:
-            uploaded_ids.append(image_id)
-        else:
-            print(f"  ⚠️ Пропускаем изображение #{i+1}")
+    # Один клиент на все скачивания; загрузка на 999.md — через общий клиент nine_service
+    async with httpx.AsyncClient() as download_client:
+        for i, image_url in enumerate(images):
+            print(f"\n[{i+1}/{len(images)}] Обработка изображения:")
+            image_id = await upload_image_to_999(image_url, api_key, download_client)
+            
+            if image_id:
+                uploaded_ids.append(image_id)
+            else:
+                print(f"  ⚠️ Пропускаем изображение #{i+1}")
     
     print(f"\n✅ Успешно загружено: {len(uploaded_ids)} из {len(images)} изображений")
     return uploaded_ids
 
 
-def build_999_request(
+async def build_999_request(
     request: CreateAdvertRequest, 
     uploaded_image_ids: List[str]
 ) -> Dict[str, Any]:
@@ -313,12 +328,19 @@ def build_999_request(
             "value": uploaded_image_ids
         }
     
+    # Переводим заголовок и описание одним вызовом (с кэшем)
+    translations = await ai_parser_service.translate_fields_russian_to_romanian({
+        feat.id: feat.value
+        for feat in request.features
+        if feat.id in TRANSLATED_FEATURE_IDS and feat.value
+    })
+    
     # Добавляем остальные features
     for feat in request.features:
         if not feat.value or feat.value == "":
             continue
         
-        formatted = format_feature_value(feat)
+        formatted = format_feature_value(feat, translations)
         if formatted:  # Пропускаем None (невалидные поля)
             features_dict[feat.id] = formatted
     
@@ -347,7 +369,7 @@ def build_999_request(
     }
 
 
-@router.post("/create-advert")
+@router.post("/create-advert", dependencies=[Depends(require_llm_capacity)])
 async def create_advert(request: CreateAdvertRequest) -> Dict[str, Any]:
     """
     Создаёт объявление на 999.md.
@@ -377,70 +399,67 @@ async def create_advert(request: CreateAdvertRequest) -> Dict[str, Any]:
         if not uploaded_image_ids:
             print("⚠️ Не удалось загрузить ни одного изображения")
     
-    # Формируем запрос
-    api_request = build_999_request(request, uploaded_image_ids)
+    # Формируем запрос (без перевода из-за заполненной очереди LLM не публикуем)
+    with llm_metrics.track_failures() as failures:
+        api_request = await build_999_request(request, uploaded_image_ids)
+    require_no_llm_rejections(failures)
     
     print("\n📦 Сформированный запрос для 999.md API:")
     
     print(json.dumps(api_request, indent=2, ensure_ascii=False))
     
     try:
-        async with httpx.AsyncClient() as client:
-            # Отправляем запрос на создание объявления
-            response = await client.post(
-                f"{NINE_API_URL}/adverts",
-                json=api_request,
-                headers={
-                    **get_api_headers(),
-                    "Accept": "application/json"
-                },
-                timeout=30.0
+        # Отправляем запрос на создание объявления
+        response = await nine_service.client.post(
+            "/adverts",
+            json=api_request,
+            timeout=30.0
+        )
+        
+        print(f"\n📨 Ответ от 999.md API: {response.status_code}")
+        
+        if response.status_code == 200 or response.status_code == 201:
+            result = response.json()
+            print(f"✅ Успешно! Response: {json.dumps(result, indent=2, ensure_ascii=False)}")
+            
+            # API 999.md возвращает: { "advert": { "id": "102895743" } }
+            advert_data = result.get("advert", {})
+            advert_id = (
+                advert_data.get("id") or 
+                result.get("id") or 
+                result.get("advert_id")
             )
             
-            print(f"\n📨 Ответ от 999.md API: {response.status_code}")
+            # Формируем URL объявления
+            advert_url = (
+                advert_data.get("url") or 
+                result.get("url") or 
+                f"https://999.md/ru/{advert_id}" if advert_id else None
+            )
+            
+            print(f"📋 Advert ID: {advert_id}")
+            print(f"🔗 Advert URL: {advert_url}")
+            
+            return {
+                "success": True,
+                "advert_id": str(advert_id) if advert_id else None,
+                "url": advert_url,
+                "message": "Объявление успешно создано",
+                "uploaded_images": len(uploaded_image_ids),
+                "api_response": result
+            }
+        else:
+            error_text = response.text
+            print(f"❌ Ошибка от 999.md API: {error_text}")
+            
+            return {
+                "success": False,
+                "error": f"Ошибка 999.md API: {response.status_code}",
+                "details": error_text,
+                "advert_id": None,
+                "url": None
+            }
             
-            if response.status_code == 200 or response.status_code == 201:
-                result = response.json()
-                print(f"✅ Успешно! Response: {json.dumps(result, indent=2, ensure_ascii=False)}")
-                
-                # API 999.md возвращает: { "advert": { "id": "102895743" } }
-                advert_data = result.get("advert", {})
-                advert_id = (
-                    advert_data.get("id") or 
-                    result.get("id") or 
-                    result.get("advert_id")
-                )
-                
-                # Формируем URL объявления
-                advert_url = (
-                    advert_data.get("url") or 
-                    result.get("url") or 
-                    f"https://999.md/ru/{advert_id}" if advert_id else None
-                )
-                
-                print(f"📋 Advert ID: {advert_id}")
-                print(f"🔗 Advert URL: {advert_url}")
-                
-                return {
-                    "success": True,
-                    "advert_id": str(advert_id) if advert_id else None,
-                    "url": advert_url,
-                    "message": "Объявление успешно создано",
-                    "uploaded_images": len(uploaded_image_ids),
-                    "api_response": result
-                }
-            else:
-                error_text = response.text
-                print(f"❌ Ошибка от 999.md API: {error_text}")
-                
-                return {
-                    "success": False,
-                    "error": f"Ошибка 999.md API: {response.status_code}",
-                    "details": error_text,
-                    "advert_id": None,
-                    "url": None
-                }
-                
     except httpx.TimeoutException:
         print("❌ Таймаут при запросе к 999.md API")
         return {
@@ -0,0 +1,51 @@
+"""
+API роутер метрик вызовов LLM (токены, задержка, ошибки разбора).
+"""
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+from app.services.llm_metrics import llm_metrics
+from app.services.rate_governor import llm_governor
+from app.services.llm_hedging import llm_hedger
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+class LLMMetricsMiddleware:
+    """
+    ASGI-middleware: открывает сводку метрик LLM на каждый /api/ запрос.
+    Сводка закрывается после отправки всего ответа, включая потоковые.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        with llm_metrics.track_request(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+
+
+@router.get("/llm")
+async def get_llm_metrics() -> Dict[str, Any]:
+    """
+    Метрики вызовов LLM: итоги, по полям (самые медленные первыми),
+    по видам промптов и по последним запросам, а также состояние
+    ограничителя частоты (очередь, остаток лимитов) и хеджирования
+    (пороги задержки по полям, расход бюджета).
+    """
+    return {
+        **llm_metrics.stats(),
+        "governor": llm_governor.stats(),
+        "hedging": llm_hedger.stats(),
+    }
+
+
+@router.delete("/llm")
+async def reset_llm_metrics() -> Dict[str, Any]:
+    """Сбрасывает накопленные метрики LLM."""
+    llm_metrics.reset()
+    return {"status": "reset"}
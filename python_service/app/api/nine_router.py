@@ -1,11 +1,14 @@
 """
 API роутер для работы с 999.md.
 """
+from typing import Any, Dict
+
 from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 
 from app.config.settings import DEFAULT_SUBCATEGORY
 from app.services.nine_api import nine_service
+from app.services.taxonomy_store import taxonomy_store
 
 router = APIRouter(prefix="/api/999", tags=["999.md"])
 
@@ -18,7 +21,7 @@ async def get_makes(subcat: str = DEFAULT_SUBCATEGORY):
     Args:
         subcat: ID подкатегории (по умолчанию 659 - Легковые авто)
     """
-    result = nine_service.get_makes(subcat)
+    result = await nine_service.get_makes(subcat)
     return JSONResponse(content=result)
 
 
@@ -34,7 +37,7 @@ async def get_models(
         make_id: ID марки автомобиля
         subcat: ID подкатегории
     """
-    result = nine_service.get_models(make_id, subcat)
+    result = await nine_service.get_models(make_id, subcat)
     return JSONResponse(content=result)
 
 
@@ -50,5 +53,22 @@ async def get_generations(
         model_id: ID модели автомобиля
         subcat: ID подкатегории
     """
-    result = nine_service.get_generations(model_id, subcat)
+    result = await nine_service.get_generations(model_id, subcat)
     return JSONResponse(content=result)
+
+
+@router.get("/cache")
+async def get_taxonomy_cache_stats() -> Dict[str, Any]:
+    """Статистика кэша справочников 999.md, индекса марок и снимка на диске."""
+    return {
+        **nine_service.taxonomy_cache.stats(),
+        "makes_index": nine_service.makes_index_stats(),
+        "store": taxonomy_store.stats(),
+    }
+
+
+@router.delete("/cache")
+async def clear_taxonomy_cache() -> Dict[str, Any]:
+    """Очищает кэш справочников 999.md."""
+    nine_service.taxonomy_cache.clear()
+    return nine_service.taxonomy_cache.stats()
@@ -1,14 +1,31 @@
 """
 API роутер для AI парсинга и конфигурации постов.
 """
+import asyncio
 import json
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any, Callable, List, Optional, Set
 
-from app.schemas.models import ParseRequest, PostConfigRequest, PostConfigResponse
+from app.schemas.models import (
+    ParseRequest,
+    PostConfigRequest,
+    PostConfigResponse,
+    PostConfigBatchRequest,
+    PostConfigBatchResponse,
+)
 from app.services.ai_parser import ai_parser_service
-from app.services.nine_api import nine_service
+from app.services.catalog import features_catalog
+from app.services.field_scheduler import FieldScheduler
+from app.services.incremental_parse import plan_incremental_parse
+from app.services.llm_metrics import llm_metrics
+from app.services.local_extractor import local_extractor
+from app.services.post_config_cache import post_config_cache
+from app.services.rate_governor import llm_governor, LLMQueueFullError, PRIORITY_BATCH
+from app.services.catalog_sync import catalog_sync
+from app.services.taxonomy_prefetch import TaxonomyPrefetcher
+from app.utils.api_helpers import require_llm_capacity, require_no_llm_rejections
+from app.services.prompts import FIELD_SPECIFIC_MAPPING
 from app.config.settings import (
     STATIC_DEFAULTS, 
     DEPENDENT_FIELDS, 
@@ -16,7 +33,10 @@ from app.config.settings import (
     FEATURE_MARKA_ID,
     FEATURE_MODEL_ID,
     FEATURE_GENERATION_ID,
-    FEATURES_FILE_PATH
+    POST_CONFIG_COMBINED_EXTRACTION,
+    POST_CONFIG_MAX_CONCURRENCY,
+    POST_CONFIG_BATCH_MAX_ITEMS,
+    POST_CONFIG_CACHE_PARTIAL_TTL
 )
 
 router = APIRouter(prefix="/api", tags=["posts"])
@@ -31,15 +51,50 @@ PRIORITY_FIELDS = {
     FEATURE_MARKA_ID,          # Марка
 }
 
+# Узел графа для комбинированного извлечения независимых полей
+COMBINED_NODE_ID = "combined"
 
-def load_features_json() -> Dict[str, Any]:
-    """Загружает JSON с фичами."""
-    try:
-        with open(FEATURES_FILE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"❌ Ошибка загрузки features: {e}")
-        return {}
+
+def get_field_dependencies(feature_id: str) -> Set[str]:
+    """
+    Возвращает ID полей, от которых зависит парсинг поля.
+    
+    Зависимые поля ждут своего родителя из DEPENDENT_FIELDS,
+    а поколение дополнительно ждёт приоритетные поля (VIN, год, марка).
+    """
+    parent_id = DEPENDENT_FIELDS.get(feature_id)
+    if not parent_id:
+        return set()
+    
+    dependencies = {parent_id}
+    if feature_id == FEATURE_GENERATION_ID:
+        dependencies |= PRIORITY_FIELDS
+    return dependencies
+
+
+def get_combined_fields(all_features: List[Dict], exclude: Set[str] = frozenset()) -> List[Dict]:
+    """
+    Отбирает независимые динамические поля для одного общего вызова LLM.
+    
+    Исключаются статичные, зависимые поля, поля со специфичными промптами
+    (описание, заголовок) — они генерируются отдельно, и поля из exclude
+    (например, уже извлечённые локально).
+    """
+    dynamic_ids = set(DYNAMIC_IDS_MAP.values())
+    return [
+        {
+            "id": str(feature.get("id", "")),
+            "title": feature.get("title", ""),
+            "type": feature.get("type", ""),
+            "options": feature.get("options", [])
+        }
+        for feature in all_features
+        if str(feature.get("id", "")) in dynamic_ids
+        and str(feature.get("id", "")) not in SKIP_AI_FIELDS
+        and str(feature.get("id", "")) not in DEPENDENT_FIELDS
+        and str(feature.get("id", "")) not in FIELD_SPECIFIC_MAPPING
+        and str(feature.get("id", "")) not in exclude
+    ]
 
 
 def get_static_default(feature_id: str, options: list) -> Dict[str, str]:
@@ -66,7 +121,7 @@ def collect_all_features(features_data: Dict) -> List[Dict]:
     return all_features
 
 
-def parse_feature(
+async def parse_feature(
     feature: Dict, 
     text: str, 
     parsed_values: Dict[str, Dict[str, str]]
@@ -91,7 +146,7 @@ def parse_feature(
         return {"label": "", "label_id": ""}
     
     # Обычный парсинг через AI
-    result = ai_parser_service.parse_single_field(
+    result = await ai_parser_service.parse_single_field(
         text=text,
         field={
             "id": feature_id,
@@ -103,13 +158,15 @@ def parse_feature(
     return result
 
 
-def parse_dependent_feature(
+async def parse_dependent_feature(
     feature: Dict,
     text: str,
-    parsed_values: Dict[str, Dict[str, str]]
+    parsed_values: Dict[str, Dict[str, str]],
+    prefetcher: TaxonomyPrefetcher
 ) -> tuple[Dict[str, str], List[Dict]]:
     """
     Парсит зависимое поле (модель, поколение).
+    Списки опций берутся из предзагрузки, запущенной при готовности родителя.
     Возвращает (result, api_options)
     """
     feature_id = str(feature.get("id", ""))
@@ -129,10 +186,10 @@ def parse_dependent_feature(
     # Модель - загружаем через API
     if feature_id == FEATURE_MODEL_ID:
         print(f"🔄 Загрузка моделей для марки ID={parent_label_id}")
-        api_options = nine_service.get_models(parent_label_id)
+        api_options = await prefetcher.get_models(parent_label_id)
         feature_options = [{"id": o["id"], "title": o["name"]} for o in api_options]
         
-        result = ai_parser_service.parse_single_field(
+        result = await ai_parser_service.parse_single_field(
             text=text,
             field={
                 "id": feature_id,
@@ -146,7 +203,7 @@ def parse_dependent_feature(
     # Поколение - загружаем через API + используем VIN и год
     if feature_id == FEATURE_GENERATION_ID:
         print(f"🔄 Загрузка поколений для модели ID={parent_label_id}")
-        api_options = nine_service.get_generations(parent_label_id)
+        api_options = await prefetcher.get_generations(parent_label_id)
         feature_options = [{"id": o["id"], "title": o["name"]} for o in api_options]
         
         if not feature_options:
@@ -170,7 +227,7 @@ def parse_dependent_feature(
             for o in api_options
         ]
         
-        result = ai_parser_service.detect_generation(
+        result = await ai_parser_service.detect_generation(
             vin=vin,
             year=int(year) if year and year.isdigit() else 0,
             make=make,
@@ -182,74 +239,160 @@ def parse_dependent_feature(
     return {"label": "", "label_id": ""}, []
 
 
-@router.post("/post-config", response_model=PostConfigResponse)
-async def get_post_config(request: PostConfigRequest) -> Dict[str, Any]:
+async def parse_listing(
+    text: str,
+    all_features: List[Dict],
+    reused_values: Optional[Dict[str, Dict[str, str]]] = None,
+    reused_options: Optional[Dict[str, List[Dict]]] = None,
+    on_field: Optional[Callable[[str, Dict[str, str], Optional[List[Dict]]], None]] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    shared_prefetcher: Optional[TaxonomyPrefetcher] = None
+) -> tuple[Dict[str, Dict[str, str]], Dict[str, List[Dict]]]:
     """
-    Получает конфигурацию полей для создания поста.
+    Парсит все поля объявления по графу зависимостей.
     
-    Логика:
-    1. Загружаем структуру полей из features.json
-    2. ПЕРВЫЙ ПРОХОД: парсим все базовые поля (включая VIN, год, марку)
-    3. ВТОРОЙ ПРОХОД: парсим зависимые поля (модель → поколение)
-    4. Возвращаем структуру с группами и полями
+    Args:
+        text: Текст объявления
+        all_features: Плоский список полей каталога
+        reused_values: Уже известные значения полей (инкрементальный парсинг) —
+                       такие поля не парсятся заново
+        reused_options: Уже загруженные options зависимых полей
+        on_field: Вызывается для каждого готового поля (id, значение, options)
+                  — используется потоковым ответом
+        semaphore: Общий лимит одновременных вызовов LLM (пакетная обработка)
+        shared_prefetcher: Общий кэш загрузок моделей/поколений (пакетная обработка)
+    
+    Returns:
+        (parsed_values, updated_options) — значения полей по ID
+        и обновлённые options зависимых полей (модель, поколение)
     """
-    print(f"📋 POST /api/post-config. Текст: {request.text[:100] if request.text else 'Пусто'}...")
+    # Хранилище распарсенных значений
+    parsed_values: Dict[str, Dict[str, str]] = dict(reused_values or {})
     
-    # 1. Загружаем JSON с фичами
-    features_data = load_features_json()
+    # Хранилище обновлённых options (для зависимых полей)
+    updated_options: Dict[str, List[Dict]] = dict(reused_options or {})
+    reused_ids = set(parsed_values)
     
-    if not features_data.get("features_groups"):
-        return JSONResponse(
-            content={"error": "Не удалось загрузить конфигурацию полей"}, 
-            status_code=500
-        )
+    def emit_field(feature_id: str) -> None:
+        if on_field and feature_id in parsed_values:
+            on_field(feature_id, parsed_values[feature_id], updated_options.get(feature_id))
     
-    # 2. Хранилище распарсенных значений
-    parsed_values: Dict[str, Dict[str, str]] = {}
+    # ===== Граф полей: каждое поле стартует, как только готовы его родители =====
+    print("=" * 50)
+    print("🔵 ПАРСИНГ ПОЛЕЙ ПО ГРАФУ ЗАВИСИМОСТЕЙ")
+    print("=" * 50)
     
-    # 3. Хранилище обновлённых options (для зависимых полей)
-    updated_options: Dict[str, List[Dict]] = {}
+    prefetcher = TaxonomyPrefetcher(text, shared=shared_prefetcher)
     
-    if request.text:
-        # Собираем все поля
-        all_features = collect_all_features(features_data)
-        
-        # ===== ПЕРВЫЙ ПРОХОД: базовые поля =====
-        print("=" * 50)
-        print("🔵 ПЕРВЫЙ ПРОХОД: парсинг базовых полей")
-        print("=" * 50)
-        
-        for feature in all_features:
-            feature_id = str(feature.get("id", ""))
-            
-            # Пропускаем зависимые поля - их парсим во втором проходе
-            if feature_id in DEPENDENT_FIELDS:
-                continue
+    def on_node_result(node_id: str, value: Any) -> None:
+        """Отдаёт готовое поле и запускает загрузку опций зависимых полей."""
+        if node_id != COMBINED_NODE_ID:
+            emit_field(node_id)
+        prefetch_dependent_options(node_id, value)
+    
+    def prefetch_dependent_options(node_id: str, value: Any) -> None:
+        """Запускает загрузку опций зависимых полей, как только известен родитель."""
+        if node_id == COMBINED_NODE_ID:
+            node_id, value = FEATURE_MARKA_ID, (value or {}).get(FEATURE_MARKA_ID)
+        label_id = (value or {}).get("label_id", "")
+        if node_id == FEATURE_MARKA_ID:
+            prefetcher.prefetch_models(label_id)
+        elif node_id == FEATURE_MODEL_ID:
+            prefetcher.prefetch_generations(label_id)
+    
+    scheduler = FieldScheduler(on_result=on_node_result, semaphore=semaphore)
+    
+    # Локальное извлечение (VIN, год, цена...): уверенные значения не требуют LLM
+    local_values = local_extractor.extract_confident(
+        text,
+        [
+            f for f in all_features
+            if local_extractor.supports(str(f.get("id", ""))) and str(f.get("id", "")) not in reused_ids
+        ]
+    )
+    parsed_values.update(local_values)
+    for feature_id in [*reused_ids, *local_values]:
+        emit_field(feature_id)
+    
+    # Независимые поля сначала извлекаются одним вызовом,
+    # пустые и невалидные значения допарсиваются по одному
+    combined_ids = set()
+    if POST_CONFIG_COMBINED_EXTRACTION:
+        combined_fields = get_combined_fields(all_features, exclude=set(local_values) | reused_ids)
+        combined_ids = {field["id"] for field in combined_fields}
+        if combined_fields:
+            async def parse_combined(values):
+                return await ai_parser_service.parse_fields_combined(text, combined_fields)
             
-            result = parse_feature(feature, request.text, parsed_values)
-            parsed_values[feature_id] = result
+            scheduler.add(COMBINED_NODE_ID, parse_combined, priority=True)
+    
+    for feature in all_features:
+        feature_id = str(feature.get("id", ""))
         
-        # ===== ВТОРОЙ ПРОХОД: зависимые поля (в правильном порядке) =====
-        print("=" * 50)
-        print("🟢 ВТОРОЙ ПРОХОД: парсинг зависимых полей")
-        print("=" * 50)
+        # Статичные дефолты не требуют LLM - заполняем сразу
+        if feature_id in SKIP_AI_FIELDS:
+            parsed_values[feature_id] = await parse_feature(feature, text, parsed_values)
+            emit_field(feature_id)
+            continue
         
-        # Порядок важен: сначала модель (зависит от марки), потом поколение (зависит от модели)
-        dependent_order = [FEATURE_MODEL_ID, FEATURE_GENERATION_ID]
+        if feature_id in local_values or feature_id in reused_ids:
+            continue
         
-        for dep_id in dependent_order:
-            # Находим feature по ID
-            feature = next((f for f in all_features if str(f.get("id")) == dep_id), None)
-            if not feature:
-                continue
+        if feature_id in DEPENDENT_FIELDS:
+            async def parse_dependent(values, feature=feature, feature_id=feature_id):
+                result, api_options = await parse_dependent_feature(
+                    feature, text, values, prefetcher
+                )
+                if api_options:
+                    updated_options[feature_id] = api_options
+                return result
             
-            result, api_options = parse_dependent_feature(feature, request.text, parsed_values)
-            parsed_values[dep_id] = result
+            scheduler.add(
+                feature_id,
+                parse_dependent,
+                depends_on=get_field_dependencies(feature_id)
+            )
+            continue
+        
+        if feature_id in combined_ids:
+            async def parse_with_fallback(values, feature=feature, feature_id=feature_id):
+                combined_value = (values.get(COMBINED_NODE_ID) or {}).get(feature_id)
+                if combined_value:
+                    return combined_value
+                return await parse_feature(feature, text, values)
             
-            if api_options:
-                updated_options[dep_id] = api_options
+            scheduler.add(
+                feature_id,
+                parse_with_fallback,
+                depends_on=[COMBINED_NODE_ID],
+                priority=feature_id in PRIORITY_FIELDS
+            )
+            continue
+        
+        async def parse_single(values, feature=feature):
+            return await parse_feature(feature, text, values)
+        
+        scheduler.add(
+            feature_id,
+            parse_single,
+            priority=feature_id in PRIORITY_FIELDS
+        )
     
-    # 4. Собираем результат с группами
+    try:
+        await scheduler.run(parsed_values)
+    finally:
+        await prefetcher.close()
+    parsed_values.pop(COMBINED_NODE_ID, None)
+    
+    return parsed_values, updated_options
+
+
+def build_result_groups(
+    features_data: Dict[str, Any],
+    parsed_values: Dict[str, Dict[str, str]],
+    updated_options: Dict[str, List[Dict]]
+) -> List[Dict[str, Any]]:
+    """Собирает ответ с группами полей из распарсенных значений."""
     result_groups = []
     
     for group in features_data.get("features_groups", []):
@@ -280,6 +423,75 @@ async def get_post_config(request: PostConfigRequest) -> Dict[str, Any]:
         
         result_groups.append(processed_group)
     
+    return result_groups
+
+
+def get_reused_values(
+    request: PostConfigRequest,
+    all_features: List[Dict]
+) -> tuple[Dict[str, Dict[str, str]], Dict[str, List[Dict]]]:
+    """Инкрементальный режим: значения полей, чьи строки в тексте не менялись."""
+    if not (request.previous_text and request.previous_result):
+        return {}, {}
+    return plan_incremental_parse(
+        request.previous_text,
+        request.text,
+        request.previous_result.model_dump(),
+        all_features,
+        get_field_dependencies
+    )
+
+
+def cache_post_config(
+    cache_key: str,
+    response: Dict[str, Any],
+    failures: Dict[str, Any],
+    parsed_values: Dict[str, Dict[str, str]],
+    updated_options: Dict[str, List[Dict]],
+    reused_values: Optional[Dict[str, Dict[str, str]]] = None
+) -> None:
+    """
+    Сохраняет результат в кэш post-config.
+    
+    Результат, где поле осталось пустым из-за сбоя LLM (ошибка вызова,
+    неразобранный JSON), не кэшируется: повторный запрос должен распарсить
+    его заново. Сбои, после которых поле всё же заполнено (эскалация,
+    допарсинг после общего вызова, проигравший дубликат), кэш не блокируют.
+    Если 999.md не вернул опции зависимого поля при известном родителе,
+    результат кэшируется на короткое время.
+    
+    Результат инкрементального парсинга не кэшируется: часть полей взята
+    из previous_result клиента, а ключ кэша строится только по тексту.
+    """
+    if reused_values:
+        print(f"⚠️ post-config не кэшируется: {len(reused_values)} полей из previous_result")
+        return
+    # Сбой общего вызова не оставляет полей пустыми: они допарсиваются по одному
+    failed_fields = sorted(
+        feature_id
+        for feature_id in failures["fields"] - {COMBINED_NODE_ID}
+        if not any(parsed_values.get(feature_id, {}).values())
+    )
+    if failed_fields:
+        print(
+            f"⚠️ post-config не кэшируется: поля {failed_fields} пусты после сбоев LLM "
+            f"(ошибок {failures['errors']}, неразобранных ответов {failures['parse_failures']})"
+        )
+        return
+    missing_options = [
+        feature_id
+        for feature_id, parent_id in DEPENDENT_FIELDS.items()
+        if parsed_values.get(parent_id, {}).get("label_id") and not updated_options.get(feature_id)
+    ]
+    if missing_options:
+        print(f"⚠️ post-config кэшируется на {POST_CONFIG_CACHE_PARTIAL_TTL:.0f}с: нет опций полей {missing_options}")
+        post_config_cache.set(cache_key, response, ttl=POST_CONFIG_CACHE_PARTIAL_TTL)
+        return
+    post_config_cache.set(cache_key, response)
+
+
+def log_result_groups(result_groups: List[Dict[str, Any]]) -> int:
+    """Печатает итоговые значения полей и возвращает количество пустых label."""
     # Красивый вывод title, label, label_id в JSON формате
     for group in result_groups:
         print("=" * 50)
@@ -299,4 +511,319 @@ async def get_post_config(request: PostConfigRequest) -> Dict[str, Any]:
     )
     print(f"Количество пустых label: {empty_labels_count}")
     
-    return {"features_groups": result_groups}
+    request_stats = llm_metrics.request_stats()
+    if request_stats:
+        print(
+            f"📊 LLM: вызовов {request_stats['calls']}, "
+            f"токенов {request_stats['prompt_tokens']}+{request_stats['completion_tokens']} "
+            f"(кэш {request_stats['cached_tokens']}, {request_stats['cached_ratio']:.0%}), "
+            f"суммарно {request_stats['latency_total']}с"
+        )
+    return empty_labels_count
+
+
+@router.post("/post-config", response_model=PostConfigResponse)
+async def get_post_config(request: PostConfigRequest) -> Dict[str, Any]:
+    """
+    Получает конфигурацию полей для создания поста.
+    
+    Логика:
+    1. Берём структуру полей из каталога в памяти
+    2. Если такой текст уже парсился — отдаём результат из кэша.
+       Иначе проверяем очередь LLM (429 при переполнении).
+       Если переданы previous_text и previous_result — заново парсятся
+       только поля, чьи строки в тексте изменились
+    3. Строим граф полей: базовые поля не имеют родителей,
+       модель ждёт марку, поколение ждёт модель, VIN и год,
+       и выполняем его параллельно (не более POST_CONFIG_MAX_CONCURRENCY вызовов)
+    4. Возвращаем структуру с группами и полями
+    """
+    print(f"📋 POST /api/post-config. Текст: {request.text[:100] if request.text else 'Пусто'}...")
+    
+    # 1. Каталог характеристик (загружен в память один раз)
+    features_data = features_catalog.data
+    
+    if not features_data.get("features_groups"):
+        return JSONResponse(
+            content={"error": "Не удалось загрузить конфигурацию полей"}, 
+            status_code=500
+        )
+    
+    # 2. Кэш: одинаковый текст при том же каталоге и промптах даёт тот же результат
+    cache_key = None
+    if request.text:
+        cache_key = post_config_cache.make_key(request.text, features_catalog.content_hash)
+        cached = post_config_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ post-config из кэша ({post_config_cache.stats()['hits']} попаданий)")
+            return cached
+        # Попадания в кэш не вызывают LLM и не отклоняются при заполненной очереди
+        require_llm_capacity()
+    
+    # 3. Парсинг полей
+    parsed_values: Dict[str, Dict[str, str]] = {}
+    updated_options: Dict[str, List[Dict]] = {}
+    
+    if request.text:
+        all_features = collect_all_features(features_data)
+        
+        # Инкрементальный режим: переиспользуем поля, чьи строки не менялись
+        reused_values, reused_options = get_reused_values(request, all_features)
+        
+        with llm_metrics.track_failures() as failures:
+            parsed_values, updated_options = await parse_listing(
+                request.text,
+                all_features,
+                reused_values=reused_values,
+                reused_options=reused_options
+            )
+        require_no_llm_rejections(failures)
+    
+    # 4. Собираем результат с группами
+    result_groups = build_result_groups(features_data, parsed_values, updated_options)
+    
+    log_result_groups(result_groups)
+    
+    response = {"features_groups": result_groups}
+    if cache_key:
+        cache_post_config(cache_key, response, failures, parsed_values, updated_options, reused_values)
+    
+    return response
+
+
+@router.post(
+    "/post-config/batch",
+    response_model=PostConfigBatchResponse,
+    dependencies=[Depends(require_llm_capacity)]
+)
+async def get_post_config_batch(request: PostConfigBatchRequest) -> Dict[str, Any]:
+    """
+    Пакетный парсинг объявлений (импорт склада дилера).
+    
+    Все объявления разделяют один каталог, общий кэш загрузок
+    моделей/поколений и общий лимит POST_CONFIG_MAX_CONCURRENCY вызовов LLM.
+    Одинаковые тексты парсятся один раз, готовые результаты берутся из кэша.
+    Ошибка одного объявления не прерывает остальные.
+    Вызовы LLM идут с пакетным приоритетом — интерактивные запросы их опережают.
+    """
+    print(f"📦 POST /api/post-config/batch. Объявлений: {len(request.texts)}")
+    
+    if len(request.texts) > POST_CONFIG_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много объявлений: {len(request.texts)} (максимум {POST_CONFIG_BATCH_MAX_ITEMS})"
+        )
+    
+    features_data = features_catalog.data
+    
+    if not features_data.get("features_groups"):
+        return JSONResponse(
+            content={"error": "Не удалось загрузить конфигурацию полей"}, 
+            status_code=500
+        )
+    
+    all_features = collect_all_features(features_data)
+    semaphore = asyncio.Semaphore(POST_CONFIG_MAX_CONCURRENCY)
+    shared_prefetcher = TaxonomyPrefetcher("")
+    
+    # Одинаковые тексты (по ключу кэша) парсятся один раз
+    pending: Dict[str, asyncio.Task] = {}
+    
+    async def parse_one(text: str, cache_key: str) -> Dict[str, Any]:
+        cached = post_config_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        with llm_metrics.track_failures() as failures:
+            parsed_values, updated_options = await parse_listing(
+                text,
+                all_features,
+                semaphore=semaphore,
+                shared_prefetcher=shared_prefetcher
+            )
+        if failures["rejected"]:
+            raise LLMQueueFullError(llm_governor.retry_after())
+        response = {"features_groups": build_result_groups(features_data, parsed_values, updated_options)}
+        cache_post_config(cache_key, response, failures, parsed_values, updated_options)
+        return response
+    
+    keys = []
+    for text in request.texts:
+        if not text:
+            keys.append(None)
+            continue
+        cache_key = post_config_cache.make_key(text, features_catalog.content_hash)
+        if cache_key not in pending:
+            with llm_governor.priority_scope(PRIORITY_BATCH):
+                pending[cache_key] = asyncio.create_task(parse_one(text, cache_key))
+        keys.append(cache_key)
+    
+    try:
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+    finally:
+        await shared_prefetcher.close()
+    
+    items = []
+    empty_result = build_result_groups(features_data, {}, {})
+    for index, cache_key in enumerate(keys):
+        if cache_key is None:
+            items.append({"index": index, "features_groups": empty_result})
+            continue
+        task = pending[cache_key]
+        if task.cancelled():
+            print(f"❌ Парсинг объявления #{index} отменён")
+            items.append({"index": index, "error": "Парсинг отменён"})
+        elif task.exception():
+            print(f"❌ Ошибка парсинга объявления #{index}: {task.exception()}")
+            items.append({"index": index, "error": str(task.exception())})
+        else:
+            items.append({"index": index, **task.result()})
+    
+    print(f"✅ Пакет обработан: {len(items)} объявлений, уникальных текстов: {len(pending)}")
+    return {"items": items}
+
+
+def format_stream_event(event: Dict[str, Any], sse: bool) -> str:
+    """Сериализует событие потока в NDJSON или SSE."""
+    data = json.dumps(event, ensure_ascii=False)
+    if sse:
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+
+@router.post("/post-config/stream")
+async def stream_post_config(
+    request: PostConfigRequest,
+    stream_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|sse)$")
+):
+    """
+    Потоковый вариант /api/post-config.
+    
+    События (NDJSON по умолчанию, SSE при format=sse):
+    1. {"event": "skeleton", "features_groups": [...]} — структура полей каталога
+    2. {"event": "field", "id", "label", "label_id", "options"} — по одному на
+       каждое готовое поле; options только у полей с загруженными через API
+       вариантами (модель, поколение)
+    3. {"event": "done", "empty_labels": N} — парсинг завершён
+    
+    Форма композера может заполняться по мере прихода событий,
+    не дожидаясь окончания всего пайплайна.
+    """
+    print(f"📋 POST /api/post-config/stream. Текст: {request.text[:100] if request.text else 'Пусто'}...")
+    
+    features_data = features_catalog.data
+    
+    if not features_data.get("features_groups"):
+        return JSONResponse(
+            content={"error": "Не удалось загрузить конфигурацию полей"}, 
+            status_code=500
+        )
+    
+    sse = stream_format == "sse"
+    
+    # Кэш и очередь LLM проверяются до начала потока: 429 возможен только до первого события
+    cache_key = None
+    cached = None
+    if request.text:
+        cache_key = post_config_cache.make_key(request.text, features_catalog.content_hash)
+        cached = post_config_cache.get(cache_key)
+        if cached is None:
+            require_llm_capacity()
+    
+    async def events():
+        if cached is not None:
+            print("⚡ post-config/stream из кэша")
+            yield format_stream_event({"event": "skeleton", **cached}, sse)
+            yield format_stream_event({"event": "done", "cached": True}, sse)
+            return
+        
+        skeleton = build_result_groups(features_data, {}, {})
+        yield format_stream_event({"event": "skeleton", "features_groups": skeleton}, sse)
+        
+        parsed_values: Dict[str, Dict[str, str]] = {}
+        updated_options: Dict[str, List[Dict]] = {}
+        
+        if request.text:
+            all_features = collect_all_features(features_data)
+            reused_values, reused_options = get_reused_values(request, all_features)
+            queue: asyncio.Queue = asyncio.Queue()
+            
+            def on_field(feature_id: str, value: Dict[str, str], options: Optional[List[Dict]]) -> None:
+                event = {
+                    "event": "field",
+                    "id": feature_id,
+                    "label": value.get("label", ""),
+                    "label_id": value.get("label_id", ""),
+                }
+                if options:
+                    event["options"] = options
+                queue.put_nowait(event)
+            
+            # Задача копирует контекст при создании — сбои LLM попадут в failures
+            with llm_metrics.track_failures() as failures:
+                task = asyncio.create_task(parse_listing(
+                    request.text,
+                    all_features,
+                    reused_values=reused_values,
+                    reused_options=reused_options,
+                    on_field=on_field
+                ))
+            task.add_done_callback(lambda _: queue.put_nowait(None))
+            
+            try:
+                while (event := await queue.get()) is not None:
+                    yield format_stream_event(event, sse)
+                parsed_values, updated_options = await task
+                if failures["rejected"]:
+                    raise LLMQueueFullError(llm_governor.retry_after())
+            except LLMQueueFullError as e:
+                print(f"⛔ {str(e)}")
+                yield format_stream_event({"event": "error", "error": str(e), "retry_after": e.retry_after}, sse)
+                return
+            except Exception as e:
+                print(f"❌ Ошибка потокового парсинга: {str(e)}")
+                yield format_stream_event({"event": "error", "error": str(e)}, sse)
+                return
+            finally:
+                # Клиент отключился — останавливаем парсинг
+                if not task.done():
+                    task.cancel()
+        
+        result_groups = build_result_groups(features_data, parsed_values, updated_options)
+        empty_labels_count = log_result_groups(result_groups)
+        if cache_key:
+            cache_post_config(
+                cache_key, {"features_groups": result_groups}, failures, parsed_values, updated_options, reused_values
+            )
+        
+        yield format_stream_event({"event": "done", "empty_labels": empty_labels_count}, sse)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/post-config/catalog")
+async def get_catalog_stats() -> Dict[str, Any]:
+    """Версия каталога характеристик и состояние синхронизации с 999.md."""
+    return {**features_catalog.stats(), "sync": catalog_sync.stats()}
+
+
+@router.post("/post-config/catalog/sync")
+async def sync_catalog() -> Dict[str, Any]:
+    """Сверяет каталог со схемой 999.md сейчас, не дожидаясь фоновой задачи."""
+    return await catalog_sync.sync_once()
+
+
+@router.get("/post-config/cache")
+async def get_post_config_cache_stats() -> Dict[str, Any]:
+    """Статистика кэша результатов post-config."""
+    return post_config_cache.stats()
+
+
+@router.delete("/post-config/cache")
+async def clear_post_config_cache() -> Dict[str, Any]:
+    """Очищает кэш результатов post-config."""
+    post_config_cache.clear()
+    return post_config_cache.stats()
@@ -0,0 +1,3 @@
+"""
+Консольные утилиты сервиса (запуск: python -m app.cli.<имя>).
+"""
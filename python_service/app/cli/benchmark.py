@@ -0,0 +1,173 @@
+"""
+Бенчмарк конвейера post-config на записанных ответах LLM.
+
+Прогоняет get_post_config по текстам объявлений несколько раз и печатает
+перцентили задержки и итоги вызовов LLM. Кэш результатов сбрасывается
+перед каждым прогоном, чтобы каждый раз работал весь конвейер.
+Справочники 999.md (модели, поколения) пишутся и воспроизводятся
+в подкаталоге кассет NINE_CASSETTE_SUBDIR с тем же режимом, что и LLM,
+поэтому воспроизведение не ходит в сеть.
+
+Запись кассет (нужен OPENAI_API_KEY и сеть):
+    python -m app.cli.benchmark listings.json --backend record --iterations 1
+
+Воспроизведение без сети с синтетической задержкой (LLM_BACKEND=replay
+позволяет запускать без OPENAI_API_KEY):
+    LLM_BACKEND=replay python -m app.cli.benchmark listings.json \\
+        --latency lognormal:0.8,0.5 --seed 7 --iterations 20 --output report.json
+
+Файл с текстами: JSON (строка, {"text": ...} или их список) или обычный текст
+(весь файл — одно объявление).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+from app.api.posts_router import get_post_config
+from app.config.settings import LLM_CASSETTE_DIR, LLM_REPLAY_LATENCY, LLM_REPLAY_SEED
+from app.schemas.models import PostConfigRequest
+from app.services.ai_parser import ai_parser_service
+from app.services.llm_metrics import llm_metrics
+from app.services.nine_api import nine_service
+from app.services.post_config_cache import post_config_cache
+
+
+# Подкаталог кассет для ответов 999.md
+NINE_CASSETTE_SUBDIR = "999"
+
+
+def load_texts(paths: List[str]) -> List[str]:
+    """Тексты объявлений из файлов."""
+    texts: List[str] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        try:
+            data: Any = json.loads(raw)
+        except ValueError:
+            texts.append(raw)
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            text = item.get("text") if isinstance(item, dict) else item
+            if isinstance(text, str) and text.strip():
+                texts.append(text)
+    return texts
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль q (0..1) с линейной интерполяцией."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "runs": len(latencies),
+        "mean": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+        "min": round(min(latencies), 4) if latencies else 0.0,
+        "p50": round(percentile(latencies, 0.5), 4),
+        "p90": round(percentile(latencies, 0.9), 4),
+        "p95": round(percentile(latencies, 0.95), 4),
+        "p99": round(percentile(latencies, 0.99), 4),
+        "max": round(max(latencies), 4) if latencies else 0.0,
+    }
+
+
+async def run_benchmark(texts: List[str], iterations: int, warmup: int) -> Dict[str, Any]:
+    """Прогоны get_post_config; прогрев в статистику не входит."""
+    latencies: List[float] = []
+    errors = 0
+    try:
+        for iteration in range(warmup + iterations):
+            if iteration == warmup:
+                llm_metrics.reset()
+            for text in texts:
+                post_config_cache.clear()
+                started = time.perf_counter()
+                with llm_metrics.track_request("BENCH", "/api/post-config"):
+                    result = await get_post_config(PostConfigRequest(text=text))
+                elapsed = time.perf_counter() - started
+                if not isinstance(result, dict):
+                    errors += 1
+                if iteration >= warmup:
+                    latencies.append(elapsed)
+    finally:
+        await ai_parser_service.aclose()
+        await nine_service.aclose()
+
+    cassette = ai_parser_service.cassette
+    nine_cassette = nine_service.cassette
+    return {
+        "latency": summarize(latencies),
+        "errors": errors,
+        "llm": llm_metrics.stats()["totals"],
+        "backend": cassette.stats() if cassette else {"mode": "live"},
+        "nine_backend": nine_cassette.stats() if nine_cassette else {"mode": "live"},
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк post-config на кассетах LLM")
+    parser.add_argument("inputs", nargs="+", help="Файлы с текстами объявлений")
+    parser.add_argument("--backend", choices=["live", "record", "replay"], default="replay")
+    parser.add_argument("--cassettes", default=LLM_CASSETTE_DIR, help="Каталог кассет")
+    parser.add_argument("--latency", default=LLM_REPLAY_LATENCY, help="Задержка воспроизведения")
+    parser.add_argument("--seed", type=int, default=LLM_REPLAY_SEED, help="Seed синтетической задержки")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=0, help="Прогоны без учёта в статистике")
+    parser.add_argument("--output", help="Сохранить отчёт в JSON")
+    parser.add_argument("--max-p95", type=float, help="Код 1, если p95 (сек) выше порога")
+    args = parser.parse_args(argv)
+
+    texts = load_texts(args.inputs)
+    if not texts:
+        print("❌ Нет текстов объявлений", file=sys.stderr)
+        return 2
+
+    async def run() -> Dict[str, Any]:
+        await ai_parser_service.use_backend(
+            args.backend,
+            directory=args.cassettes,
+            latency=args.latency,
+            seed=args.seed
+        )
+        await nine_service.use_backend(
+            args.backend,
+            directory=os.path.join(args.cassettes, NINE_CASSETTE_SUBDIR),
+            latency=args.latency,
+            seed=args.seed
+        )
+        return await run_benchmark(texts, args.iterations, args.warmup)
+
+    report = asyncio.run(run())
+    report["listings"] = len(texts)
+    report["iterations"] = args.iterations
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    backend = report["backend"]
+    if backend.get("misses"):
+        print(f"⚠️ Нет кассет для {backend['misses']} вызовов — перезапишите их (--backend record)")
+    nine_backend = report["nine_backend"]
+    if nine_backend.get("misses"):
+        print(f"⚠️ Нет кассет 999.md для {nine_backend['misses']} запросов — перезапишите их (--backend record)")
+    if args.max_p95 is not None and report["latency"]["p95"] > args.max_p95:
+        print(f"❌ p95 {report['latency']['p95']}с выше порога {args.max_p95}с")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
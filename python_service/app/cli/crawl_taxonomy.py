@@ -0,0 +1,130 @@
+"""
+Обход справочников 999.md в снимок на диске (TaxonomyStore).
+
+Марки → модели (dependent_options по характеристике 20) → поколения
+(по характеристике 21). Запросы идут через NineService с ограничением
+параллельности и паузой между запросами, чтобы не упираться в лимиты 999.md.
+Списки, которые не удалось получить, в снимок не попадают — для них
+сервис продолжит ходить в 999.md.
+
+Запуск:
+    python -m app.cli.crawl_taxonomy --concurrency 4 --delay 0.2
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config.settings import (
+    DEFAULT_SUBCATEGORY,
+    FEATURE_MARKA_ID,
+    FEATURE_MODEL_ID,
+    TAXONOMY_STORE_PATH,
+)
+from app.services.nine_api import nine_service
+from app.services.taxonomy_store import TaxonomyStore, TaxonomyKey
+
+
+class TaxonomyCrawler:
+    """Обход марок, моделей и поколений с ограничением нагрузки на 999.md."""
+
+    def __init__(self, subcat: str, lang: str, concurrency: int, delay: float, retries: int):
+        self.subcat = subcat
+        self.lang = lang
+        self.delay = delay
+        self.retries = retries
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.rows: List[Tuple[TaxonomyKey, List[Dict[str, str]]]] = []
+        self.requests = 0
+        self.failed: List[TaxonomyKey] = []
+
+    async def crawl(
+        self,
+        make_ids: Optional[List[str]] = None,
+        with_generations: bool = True
+    ) -> None:
+        makes = await nine_service.fetch_makes(self.subcat, self.lang)
+        if not makes:
+            raise RuntimeError("Не удалось получить список марок")
+        self.rows.append((("makes", self.subcat, "", self.lang), makes))
+        if make_ids:
+            selected = set(make_ids)
+            makes = [make for make in makes if make["id"] in selected]
+        print(f"🕷️ Марок для обхода: {len(makes)}")
+
+        models_by_make = await asyncio.gather(*[
+            self._fetch("models", FEATURE_MARKA_ID, make["id"]) for make in makes
+        ])
+        model_ids = list(dict.fromkeys(
+            model["id"] for models in models_by_make if models for model in models
+        ))
+        print(f"🕷️ Моделей: {len(model_ids)}")
+
+        if with_generations:
+            await asyncio.gather(*[
+                self._fetch("generations", FEATURE_MODEL_ID, model_id) for model_id in model_ids
+            ])
+
+    async def _fetch(self, kind: str, dependency_feature_id: str, parent_id: str) -> Optional[List[Dict[str, str]]]:
+        key = (kind, self.subcat, parent_id, self.lang)
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                self.requests += 1
+                try:
+                    items = await nine_service.fetch_dependent_options(
+                        dependency_feature_id, parent_id, self.subcat, self.lang
+                    )
+                except Exception as e:
+                    error = e
+                else:
+                    self.rows.append((key, items))
+                    return items
+                finally:
+                    if self.delay > 0:
+                        await asyncio.sleep(self.delay)
+            if attempt < self.retries:
+                await asyncio.sleep(2 ** attempt)
+        print(f"❌ {kind} для ID={parent_id} не получены: {str(error)}")
+        self.failed.append(key)
+        return None
+
+
+async def run(args: argparse.Namespace) -> int:
+    crawler = TaxonomyCrawler(args.subcat, args.lang, args.concurrency, args.delay, args.retries)
+    started = time.perf_counter()
+    try:
+        await crawler.crawl(args.makes, with_generations=not args.no_generations)
+    finally:
+        await nine_service.aclose()
+
+    store = TaxonomyStore(args.output)
+    count = store.write_snapshot(crawler.rows, meta={
+        "subcat": args.subcat,
+        "lang": args.lang,
+        "requests": crawler.requests,
+        "failed": len(crawler.failed),
+    })
+    print(
+        f"✅ Снимок {args.output}: {count} списков, {crawler.requests} запросов, "
+        f"ошибок {len(crawler.failed)}, {time.perf_counter() - started:.1f}с"
+    )
+    return 1 if crawler.failed else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Обход справочников 999.md в снимок SQLite")
+    parser.add_argument("--subcat", default=DEFAULT_SUBCATEGORY, help="ID подкатегории")
+    parser.add_argument("--lang", default="ru")
+    parser.add_argument("--output", default=TAXONOMY_STORE_PATH, help="Файл снимка")
+    parser.add_argument("--concurrency", type=int, default=4, help="Одновременных запросов к 999.md")
+    parser.add_argument("--delay", type=float, default=0.2, help="Пауза после каждого запроса (сек)")
+    parser.add_argument("--retries", type=int, default=2, help="Повторов при ошибке")
+    parser.add_argument("--makes", nargs="*", help="Только эти ID марок")
+    parser.add_argument("--no-generations", action="store_true", help="Без поколений")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
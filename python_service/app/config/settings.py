@@ -2,6 +2,7 @@
 Конфигурация приложения.
 Загрузка переменных окружения и константы.
 """
+import json
 import os
 from dotenv import load_dotenv
 
@@ -64,6 +65,85 @@ DYNAMIC_IDS_MAP = {
     "generation": "2095",   # Поколение
 }
 
+# Параллельный парсинг post-config: максимум одновременных вызовов LLM
+POST_CONFIG_MAX_CONCURRENCY = int(os.getenv("POST_CONFIG_MAX_CONCURRENCY", "8"))
+
+# Пакетный парсинг: максимум объявлений в одном запросе
+POST_CONFIG_BATCH_MAX_ITEMS = int(os.getenv("POST_CONFIG_BATCH_MAX_ITEMS", "100"))
+
+# Извлекать независимые динамические поля одним общим вызовом LLM
+POST_CONFIG_COMBINED_EXTRACTION = os.getenv("POST_CONFIG_COMBINED_EXTRACTION", "true").lower() == "true"
+
+# Минимальная уверенность локального извлечения (regex), при которой LLM не вызывается
+LOCAL_EXTRACTION_MIN_CONFIDENCE = float(os.getenv("LOCAL_EXTRACTION_MIN_CONFIDENCE", "0.9"))
+
+# Сколько наиболее вероятных моделей получают предзагрузку поколений
+GENERATION_PREFETCH_CANDIDATES = int(os.getenv("GENERATION_PREFETCH_CANDIDATES", "2"))
+# Минимальный балл модели для предзагрузки поколений: совпадение хотя бы
+# половины токенов названия, а не только общих триграмм
+GENERATION_PREFETCH_MIN_SCORE = float(os.getenv("GENERATION_PREFETCH_MIN_SCORE", "0.5"))
+
+# Кэш готовых результатов post-config: максимум записей и время жизни (сек)
+POST_CONFIG_CACHE_MAX_SIZE = int(os.getenv("POST_CONFIG_CACHE_MAX_SIZE", "256"))
+POST_CONFIG_CACHE_TTL = float(os.getenv("POST_CONFIG_CACHE_TTL", "3600"))
+# Время жизни неполного результата: 999.md не вернул опции зависимого поля
+POST_CONFIG_CACHE_PARTIAL_TTL = float(os.getenv("POST_CONFIG_CACHE_PARTIAL_TTL", "60"))
+
+# Сокращение больших списков options перед отправкой в LLM:
+# списки длиннее порога заменяются top-k кандидатами + вариантом "другое"
+OPTIONS_PRUNE_THRESHOLD = int(os.getenv("OPTIONS_PRUNE_THRESHOLD", "30"))
+OPTIONS_PRUNE_TOP_K = int(os.getenv("OPTIONS_PRUNE_TOP_K", "15"))
+
+# Описание (id=13) одним вызовом LLM: блоки, резюме и трансформация вместе.
+# При ошибке fused-режима используется обычный пошаговый конвейер
+DESCRIPTION_FUSED_MODE = os.getenv("DESCRIPTION_FUSED_MODE", "false").lower() == "true"
+
+# Строгие JSON-схемы ответа (response_format) и лимиты max_tokens для промптов парсера
+LLM_STRUCTURED_OUTPUTS = os.getenv("LLM_STRUCTURED_OUTPUTS", "true").lower() == "true"
+
+# Кэш переводов RU→RO (заголовок, описание): максимум записей и время жизни (сек)
+TRANSLATION_CACHE_MAX_SIZE = int(os.getenv("TRANSLATION_CACHE_MAX_SIZE", "512"))
+TRANSLATION_CACHE_TTL = float(os.getenv("TRANSLATION_CACHE_TTL", "86400"))
+
+# Метрики вызовов LLM: сколько последних запросов хранить в истории
+LLM_METRICS_RECENT_REQUESTS = int(os.getenv("LLM_METRICS_RECENT_REQUESTS", "50"))
+
+# Маршрутизация моделей: быстрая модель отвечает первой, сложные поля — сильная.
+# Правила: ключ — ID поля, тип поля или вид промпта, значение — маршрут:
+#   "fast" — только быстрая модель, "strong" — сразу сильная,
+#   "escalate" — быстрая, при низкой уверенности (logprobs) — повтор на сильной
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+LLM_STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4o")
+LLM_ESCALATION_MIN_CONFIDENCE = float(os.getenv("LLM_ESCALATION_MIN_CONFIDENCE", "0.8"))
+LLM_ROUTING_RULES = {
+    "default": "fast",
+    "drop_down_options": "escalate",
+    DYNAMIC_IDS_MAP["generation"]: "strong",   # Поколение по VIN — самое сложное поле
+    **json.loads(os.getenv("LLM_ROUTING_RULES") or "{}"),
+}
+
+# Ограничитель частоты вызовов LLM (лимиты аккаунта OpenAI; 0 — без ограничения)
+# и максимум вызовов в очереди ожидания, после которого запросы получают 429
+LLM_RATE_LIMIT_RPM = int(os.getenv("LLM_RATE_LIMIT_RPM", "500"))
+LLM_RATE_LIMIT_TPM = int(os.getenv("LLM_RATE_LIMIT_TPM", "200000"))
+LLM_QUEUE_MAX_SIZE = int(os.getenv("LLM_QUEUE_MAX_SIZE", "200"))
+
+# Хеджирование вызовов LLM: если вызов дольше перцентиля задержки поля
+# (накопленного за время работы), отправляется дубликат — побеждает первый
+# корректный ответ. Бюджет — доля дополнительных вызовов от основных.
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGING_PERCENTILE = float(os.getenv("LLM_HEDGING_PERCENTILE", "0.95"))
+LLM_HEDGING_MIN_SAMPLES = int(os.getenv("LLM_HEDGING_MIN_SAMPLES", "20"))
+LLM_HEDGING_WINDOW = int(os.getenv("LLM_HEDGING_WINDOW", "200"))
+LLM_HEDGING_MIN_DELAY = float(os.getenv("LLM_HEDGING_MIN_DELAY", "0.3"))
+LLM_HEDGING_BUDGET = float(os.getenv("LLM_HEDGING_BUDGET", "0.05"))
+
+# Общий пул HTTP-соединений к OpenAI (keep-alive между вызовами LLM)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+
 # CORS настройки
 CORS_ORIGINS = [
     "http://localhost:4200",
@@ -75,8 +155,34 @@ CORS_ORIGINS = [
     "*",                              # <-- Разрешить всё (для отладки)
 ]
 BASE_URL_999 = "https://partners-api.999.md"
+# Общий HTTP-клиент 999.md: пул соединений с keep-alive и таймауты (сек)
+NINE_HTTP_MAX_CONNECTIONS = int(os.getenv("NINE_HTTP_MAX_CONNECTIONS", "20"))
+NINE_HTTP_MAX_KEEPALIVE = int(os.getenv("NINE_HTTP_MAX_KEEPALIVE", "10"))
+NINE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("NINE_HTTP_KEEPALIVE_EXPIRY", "60"))
+NINE_HTTP_TIMEOUT = float(os.getenv("NINE_HTTP_TIMEOUT", "30"))
+NINE_HTTP_CONNECT_TIMEOUT = float(os.getenv("NINE_HTTP_CONNECT_TIMEOUT", "10"))
+# Кэш справочников 999.md (марки, модели, поколения): свежесть, окно отдачи
+# устаревших данных с фоновым обновлением и время жизни пустых ответов/ошибок (сек)
+TAXONOMY_CACHE_MAX_SIZE = int(os.getenv("TAXONOMY_CACHE_MAX_SIZE", "5000"))
+TAXONOMY_CACHE_TTL = float(os.getenv("TAXONOMY_CACHE_TTL", "21600"))
+TAXONOMY_CACHE_STALE_TTL = float(os.getenv("TAXONOMY_CACHE_STALE_TTL", "604800"))
+TAXONOMY_CACHE_NEGATIVE_TTL = float(os.getenv("TAXONOMY_CACHE_NEGATIVE_TTL", "60"))
 # Путь к файлам данных
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 FEATURES_FILE_PATH = os.path.join(BASE_DIR, "data", "feacher_for_post.json")
+# Фоновая синхронизация каталога с живой схемой /features 999.md, сек (0 — выкл.)
+FEATURES_SYNC_INTERVAL = float(os.getenv("FEATURES_SYNC_INTERVAL", "3600"))
+OPTION_SYNONYMS_FILE_PATH = os.path.join(BASE_DIR, "data", "option_synonyms.json")
+# Снимок справочников 999.md (марки → модели → поколения), см. app/cli/crawl_taxonomy.py
+TAXONOMY_STORE_PATH = os.getenv("TAXONOMY_STORE_PATH") or os.path.join(BASE_DIR, "data", "taxonomy.sqlite3")
+
+# Бэкенд вызовов LLM: "live" — OpenAI напрямую, "record" — OpenAI с записью
+# ответов в кассеты, "replay" — ответы из кассет без сети (для бенчмарков).
+# Задержка воспроизведения: "recorded", "none", "fixed:0.5", "uniform:0.2,1.5",
+# "normal:0.8,0.3", "lognormal:0.8,0.5" (медиана, sigma)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live").lower()
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR") or os.path.join(BASE_DIR, "data", "llm_cassettes")
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "recorded")
+LLM_REPLAY_SEED = int(os.getenv("LLM_REPLAY_SEED", "42"))
 
 TYPE_999_ADVERT = 'hidden' # public or hidden
\ No newline at end of file
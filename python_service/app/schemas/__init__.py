@@ -8,5 +8,8 @@ from app.schemas.models import (
     ProcessedFeature,
     FeatureGroup,
     PostConfigResponse,
+    PostConfigBatchRequest,
+    PostConfigBatchItem,
+    PostConfigBatchResponse,
     MakeModel,
 )
@@ -10,11 +10,6 @@ class ParseRequest(BaseModel):
     text: str
 
 
-class PostConfigRequest(BaseModel):
-    """Запрос на получение конфигурации поста."""
-    text: Optional[str] = None
-
-
 class FeatureOption(BaseModel):
     """Опция характеристики."""
     id: str
@@ -44,6 +39,36 @@ class PostConfigResponse(BaseModel):
     features_groups: List[FeatureGroup]
 
 
+class PostConfigRequest(BaseModel):
+    """
+    Запрос на получение конфигурации поста.
+    
+    Для повторного парсинга отредактированного объявления можно передать
+    предыдущий текст и предыдущий результат — тогда заново извлекаются
+    только поля, чьи исходные строки изменились.
+    """
+    text: Optional[str] = None
+    previous_text: Optional[str] = None
+    previous_result: Optional[PostConfigResponse] = None
+
+
+class PostConfigBatchRequest(BaseModel):
+    """Запрос на пакетный парсинг нескольких объявлений."""
+    texts: List[str]
+
+
+class PostConfigBatchItem(BaseModel):
+    """Результат парсинга одного объявления из пакета."""
+    index: int
+    features_groups: Optional[List[FeatureGroup]] = None
+    error: Optional[str] = None
+
+
+class PostConfigBatchResponse(BaseModel):
+    """Ответ пакетного парсинга."""
+    items: List[PostConfigBatchItem]
+
+
 class MakeModel(BaseModel):
     """Марка/модель автомобиля."""
     id: str
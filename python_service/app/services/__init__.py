@@ -3,3 +3,4 @@
 """
 from app.services.ai_parser import ai_parser_service
 from app.services.nine_api import nine_service
+from app.services.local_extractor import local_extractor
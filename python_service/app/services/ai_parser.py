@@ -1,38 +1,373 @@
 """
 AI парсер для извлечения данных из текста объявлений.
 Обрабатывает каждое поле по отдельности с типизированными промптами.
+
+Все вызовы LLM асинхронные (ainvoke) и идут через общий пул
+HTTP-соединений с keep-alive, поэтому не блокируют event loop.
 """
+import asyncio
+import hashlib
 import json
-from typing import Dict, Any, List, Optional
+import math
+import time
+import unicodedata
+from typing import Callable, Dict, Any, List, Optional
+import httpx
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from app.config.settings import OPENAI_API_KEY
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from app.config.settings import (
+    OPENAI_API_KEY,
+    DYNAMIC_IDS_MAP,
+    OPTIONS_PRUNE_THRESHOLD,
+    OPTIONS_PRUNE_TOP_K,
+    DESCRIPTION_FUSED_MODE,
+    LLM_STRUCTURED_OUTPUTS,
+    LLM_FAST_MODEL,
+    LLM_STRONG_MODEL,
+    LLM_ESCALATION_MIN_CONFIDENCE,
+    LLM_ROUTING_RULES,
+    TRANSLATION_CACHE_MAX_SIZE,
+    TRANSLATION_CACHE_TTL,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_HTTP_TIMEOUT,
+)
+from app.utils.features_helpers import find_option_by_id, find_option_by_title, rank_options_by_text
+from app.services.post_config_cache import PostConfigCache
+from app.services.llm_metrics import llm_metrics, get_usage_tokens
+from app.services.rate_governor import llm_governor, LLMQueueFullError
+from app.services.llm_hedging import llm_hedger
+from app.services.llm_cassette import CassetteTransport, create_llm_transport, BACKEND_REPLAY
+from app.services.prompt_compiler import (
+    compiled_prompts,
+    build_dropdown_schema,
+    build_listing_messages,
+    get_listing_cache_key,
+)
 from app.services.prompts import (
+    COMBINED_FIELDS_PROMPT,
     DESCRIPTION_BLOCKS_PARSING_PROMPT,
+    DESCRIPTION_FUSED_PROMPT,
     SPECIFIC_PROMPTS,
-    PROMPTS,
     FIELD_SPECIFIC_MAPPING,
     GENERATION_DETECTION_PROMPT,
     TRANSLATION_RUSSIAN_TO_ROMANIAN_PROMPT,
+    TRANSLATION_BATCH_RUSSIAN_TO_ROMANIAN_PROMPT,
+    RESPONSE_SCHEMAS,
+    LABEL_ID_SCHEMA,
+    STRING_SCHEMA,
+    MAX_OUTPUT_TOKENS,
+    MAX_OUTPUT_TOKENS_LIMIT,
+    OUTPUT_TOKENS_PER_INPUT_CHAR,
+    COMBINED_MAX_TOKENS_PER_FIELD,
+    COMBINED_MAX_TOKENS_BASE,
+    TRANSLATION_MAX_TOKENS_PER_CHAR,
+    TRANSLATION_MAX_TOKENS_BASE,
+    TRANSLATION_MAX_TOKENS_LIMIT,
 )
 
 
+# Вариант-"лазейка" для сокращённого списка options: LLM выбирает его,
+# если нужного значения нет среди кандидатов
+OTHER_OPTION = {"id": "other", "title": "Другое (нет в списке)"}
+
+# Маршруты моделей (LLM_ROUTING_RULES)
+ROUTE_FAST = "fast"
+ROUTE_STRONG = "strong"
+ROUTE_ESCALATE = "escalate"
+
+
+def get_answer_confidence(response: AIMessage) -> float:
+    """
+    Уверенность модели в ответе: минимальная вероятность токена ответа
+    (по logprobs). Если logprobs недоступны — 1.0 (эскалации нет).
+    """
+    logprobs = (response.response_metadata or {}).get("logprobs") or {}
+    token_logprobs = [
+        token["logprob"] for token in logprobs.get("content") or []
+        if token.get("logprob") is not None
+    ]
+    if not token_logprobs:
+        return 1.0
+    return math.exp(min(token_logprobs))
+
+
+def is_truncated(response: AIMessage) -> bool:
+    """Ответ оборван по лимиту max_tokens (finish_reason == "length")."""
+    return (response.response_metadata or {}).get("finish_reason") == "length"
+
+
+def get_max_output_tokens(schema_name: str, source_length: int) -> int:
+    """
+    Лимит ответа по ключу схемы; для пересказа текста объявления
+    (OUTPUT_TOKENS_PER_INPUT_CHAR) растёт с длиной входа source_length.
+    """
+    scaled = int(source_length * OUTPUT_TOKENS_PER_INPUT_CHAR.get(schema_name, 0))
+    return min(MAX_OUTPUT_TOKENS_LIMIT, max(MAX_OUTPUT_TOKENS[schema_name], scaled))
+
+
+# Оценка токенов для ограничителя: ~3 символа на токен + ответ по умолчанию
+CHARS_PER_TOKEN = 3
+DEFAULT_COMPLETION_TOKENS = 256
+
+
+def estimate_tokens(messages: List[BaseMessage], max_tokens: Optional[int]) -> int:
+    """Оценка токенов вызова (вход + максимум выхода) до отправки запроса."""
+    prompt_chars = sum(len(str(message.content)) for message in messages)
+    return prompt_chars // CHARS_PER_TOKEN + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+# Кэш переводов RU→RO по хэшу текста: повторная публикация не вызывает LLM
+translation_cache = PostConfigCache(max_size=TRANSLATION_CACHE_MAX_SIZE, ttl=TRANSLATION_CACHE_TTL)
+
+
+def make_translation_cache_key(text: str) -> str:
+    """Ключ кэша перевода: хэш текста (NFC) и промпта перевода."""
+    payload = "\x00".join([
+        unicodedata.normalize("NFC", text).strip(),
+        TRANSLATION_BATCH_RUSSIAN_TO_ROMANIAN_PROMPT,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class AIParserService:
     """Сервис для AI парсинга текста объявлений по одному полю."""
 
     def __init__(self):
+        self._build_clients(create_llm_transport(self._http_limits()))
+
+    def _http_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY
+        )
+
+    def _build_clients(self, cassette: Optional[CassetteTransport]) -> None:
+        """Создаёт HTTP-клиент и модели (cassette — запись/воспроизведение ответов)."""
+        self.cassette = cassette
+        # Общий пул соединений: TLS-рукопожатие не повторяется на каждый вызов
+        self.http_client = httpx.AsyncClient(
+            limits=self._http_limits(),
+            timeout=httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+            transport=cassette
+        )
+        # Воспроизведению ключ не нужен, но ChatOpenAI требует его наличия
+        api_key = OPENAI_API_KEY or ("replay" if cassette and cassette.mode == BACKEND_REPLAY else None)
         self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
+            model=LLM_FAST_MODEL,
+            temperature=0,
+            api_key=api_key,
+            http_async_client=self.http_client
+        )
+        self.strong_llm = ChatOpenAI(
+            model=LLM_STRONG_MODEL,
             temperature=0,
-            api_key=OPENAI_API_KEY
+            api_key=api_key,
+            http_async_client=self.http_client
         )
 
-    def parse_single_field(
+    async def use_backend(self, backend: str, **cassette_options: Any) -> None:
+        """
+        Переключает бэкенд LLM во время работы (бенчмарки, регрессионные прогоны).
+
+        Args:
+            backend: "live", "record" или "replay"
+            **cassette_options: directory, latency, seed (см. create_llm_transport)
+        """
+        await self.http_client.aclose()
+        self._build_clients(create_llm_transport(self._http_limits(), backend, **cassette_options))
+
+    def get_route(self, *keys: str) -> str:
+        """
+        Маршрут модели по правилам LLM_ROUTING_RULES: первый найденный
+        ключ (ID поля, тип поля, вид промпта), иначе "default".
+        """
+        for key in keys:
+            if key and key in LLM_ROUTING_RULES:
+                return LLM_ROUTING_RULES[key]
+        return LLM_ROUTING_RULES.get("default", ROUTE_FAST)
+
+    async def aclose(self) -> None:
+        """Закрывает пул HTTP-соединений (при остановке приложения)."""
+        await self.http_client.aclose()
+
+    async def _ainvoke(
+        self,
+        messages: List[BaseMessage],
+        schema_name: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None,
+        max_tokens: Optional[int] = None,
+        prompt_kind: Optional[str] = None,
+        route: Optional[str] = None,
+        logprobs: bool = False,
+        prompt_cache_key: Optional[str] = None,
+        is_valid: Optional[Callable[[AIMessage], bool]] = None
+    ) -> AIMessage:
+        """
+        Асинхронный вызов LLM — единая точка для всех промптов.
+        Каждый вызов записывается в llm_metrics (токены, задержка, модель).
+        Медленный вызов хеджируется дубликатом (llm_hedger).
+        
+        Args:
+            messages: Сообщения (system + human)
+            schema_name: Ключ схемы ответа (RESPONSE_SCHEMAS / MAX_OUTPUT_TOKENS)
+            schema: Схема ответа, если она собирается динамически
+            max_tokens: Лимит длины ответа (по умолчанию из MAX_OUTPUT_TOKENS)
+            prompt_kind: Вид промпта для метрик (по умолчанию schema_name)
+            route: "fast" или "strong" (по умолчанию — по правилам для вида промпта)
+            logprobs: Запросить logprobs токенов (для оценки уверенности)
+            prompt_cache_key: Ключ кэша промптов провайдера (хэш объявления)
+            is_valid: Проверка ответа при хеджировании (некорректный ждёт дубликат)
+        
+        Returns:
+            Ответ модели
+        """
+        llm_kwargs: Dict[str, Any] = {}
+        if schema_name:
+            schema = schema or RESPONSE_SCHEMAS.get(schema_name)
+            max_tokens = max_tokens or MAX_OUTPUT_TOKENS.get(schema_name)
+        if LLM_STRUCTURED_OUTPUTS and schema:
+            llm_kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": schema_name or "response", "strict": True, "schema": schema},
+            }
+        if max_tokens:
+            llm_kwargs["max_tokens"] = max_tokens
+        if logprobs:
+            llm_kwargs["logprobs"] = True
+        if prompt_cache_key:
+            llm_kwargs["prompt_cache_key"] = prompt_cache_key
+        
+        kind = prompt_kind or schema_name or "text"
+        route = route or self.get_route(kind)
+        base_llm, model = (
+            (self.strong_llm, LLM_STRONG_MODEL) if route == ROUTE_STRONG
+            else (self.llm, LLM_FAST_MODEL)
+        )
+        llm = base_llm.bind(**llm_kwargs) if llm_kwargs else base_llm
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+        
+        async def invoke_once() -> AIMessage:
+            started = time.perf_counter()
+            try:
+                response = await llm.ainvoke(messages)
+            except Exception:
+                llm_metrics.record_call(kind, time.perf_counter() - started, success=False, model=model)
+                raise
+            usage = get_usage_tokens(response)
+            llm_governor.settle(estimated_tokens, usage["prompt_tokens"] + usage["completion_tokens"])
+            llm_metrics.record_call(
+                kind,
+                time.perf_counter() - started,
+                success=True,
+                model=model,
+                **usage
+            )
+            return response
+        
+        # Общий лимит RPM/TPM процесса: ждём своей очереди до старта вызова,
+        # чтобы ожидание не попадало в задержку, по которой хеджируются вызовы.
+        # Дубликату лимит нужен сразу — в очередь он не встаёт
+        try:
+            await llm_governor.acquire(estimated_tokens)
+        except LLMQueueFullError:
+            llm_metrics.record_rejection(kind)
+            raise
+        hedge_key = (llm_metrics.current_field() or "-", f"{kind}:{model}")
+        response, hedged = await llm_hedger.run(
+            hedge_key,
+            invoke_once,
+            is_valid,
+            admit_hedge=lambda: llm_governor.try_acquire(estimated_tokens)
+        )
+        if hedged:
+            print(f"🪃 Хедж {kind} ({hedge_key[0]}): отправлен дубликат вызова")
+            llm_metrics.record_hedge(kind)
+        # Оборванный ответ (обычно незакрытый JSON) повторяем с удвоенным лимитом
+        if max_tokens and max_tokens < MAX_OUTPUT_TOKENS_LIMIT and is_truncated(response):
+            retry_tokens = min(MAX_OUTPUT_TOKENS_LIMIT, max_tokens * 2)
+            print(f"✂️ Ответ {kind} оборван на {max_tokens} токенах, повтор с лимитом {retry_tokens}")
+            llm_metrics.record_truncation(kind)
+            return await self._ainvoke(
+                messages,
+                schema_name,
+                schema,
+                retry_tokens,
+                prompt_kind,
+                route,
+                logprobs,
+                prompt_cache_key,
+                is_valid
+            )
+        return response
+
+    async def _acomplete(self, messages: List[BaseMessage], *args, **kwargs) -> str:
+        """Вызов LLM, возвращает текст ответа (аргументы как у _ainvoke)."""
+        response = await self._ainvoke(messages, *args, **kwargs)
+        return response.content
+
+    def _is_json_response(self, response: AIMessage) -> bool:
+        """Ответ разбирается как JSON (критерий победителя при хеджировании)."""
+        try:
+            json.loads(self._clean_json_response(response.content))
+        except json.JSONDecodeError:
+            return False
+        return True
+
+    def _parse_json_output(self, output: str, kind: str) -> Any:
+        """Разбирает JSON-ответ; ошибка учитывается в метриках (parse_failures)."""
+        try:
+            return json.loads(self._clean_json_response(output))
+        except json.JSONDecodeError:
+            llm_metrics.record_parse_failure(kind)
+            raise
+
+    async def _acomplete_json(
+        self,
+        messages: List[BaseMessage],
+        schema_name: str,
+        **kwargs
+    ) -> Any:
+        """
+        Вызов LLM с разбором JSON-ответа. Ошибка разбора учитывается
+        в метриках (parse_failures) и пробрасывается вызывающему.
+        
+        Маршрут "escalate": сначала быстрая модель с logprobs; если ответ
+        не разобран или уверенность ниже LLM_ESCALATION_MIN_CONFIDENCE,
+        запрос повторяется на сильной модели.
+        """
+        kind = kwargs.get("prompt_kind") or schema_name
+        route = kwargs.pop("route", None) or self.get_route(kind)
+        
+        kwargs.setdefault("is_valid", self._is_json_response)
+        
+        if route != ROUTE_ESCALATE:
+            output = await self._acomplete(messages, schema_name, route=route, **kwargs)
+            return self._parse_json_output(output, kind)
+        
+        response = await self._ainvoke(messages, schema_name, route=ROUTE_FAST, logprobs=True, **kwargs)
+        confidence = get_answer_confidence(response)
+        try:
+            result = self._parse_json_output(response.content, kind)
+        except json.JSONDecodeError:
+            result, confidence = None, 0.0
+        if result is not None and confidence >= LLM_ESCALATION_MIN_CONFIDENCE:
+            return result
+        
+        print(f"⬆️ Эскалация {kind} на {LLM_STRONG_MODEL}: уверенность {confidence:.2f}")
+        llm_metrics.record_escalation(kind)
+        output = await self._acomplete(messages, schema_name, route=ROUTE_STRONG, **kwargs)
+        return self._parse_json_output(output, kind)
+
+    async def parse_single_field(
         self,
         text: str,
         field: Dict[str, Any],
         options: Optional[List[Dict]] = None,
-        use_specific: bool = True
+        use_specific: bool = True,
+        prune_options: bool = True
     ) -> Dict[str, Any]:
         """
         Парсит одно поле из текста объявления.
@@ -42,6 +377,7 @@ class AIParserService:
             field: Данные поля (id, title, type, options)
             options: Опции для зависимых полей (загруженные через API)
             use_specific: Использовать специфичную обработку для особых полей
+            prune_options: Сокращать большие списки options до кандидатов
         
         Returns:
             {"label": "...", "label_id": "..."} или {"label": ""}
@@ -57,37 +393,35 @@ class AIParserService:
         specific_key = FIELD_SPECIFIC_MAPPING.get(field_id)
         
         if use_specific and specific_key:
-            return self._parse_specific_field(text, field_id, specific_key)
+            with llm_metrics.field_scope(field_id):
+                return await self._parse_specific_field(text, field_id, specific_key)
         
         try:
-            # Получаем промпт для типа поля
-            prompt_template = PROMPTS.get(field_type, PROMPTS["textbox_text"])
-            system_prompt = prompt_template.format(field_title=field_title)
-            
-            # Формируем сообщение пользователя
-            user_message = f"ТЕКСТ ОБЪЯВЛЕНИЯ:\n{text}"
-            
-            # Добавляем options для dropdown
-            if field_type == "drop_down_options" and field_options:
-                options_text = json.dumps(
-                    [{"id": str(o.get("id")), "title": o.get("title") or o.get("name", "")} 
-                     for o in field_options],
-                    ensure_ascii=False
-                )
-                user_message += f"\n\nOPTIONS:\n{options_text}"
+            # Options для dropdown (большие списки сокращаем до кандидатов)
+            pruned = False
+            prompt_options = field_options
+            if field_type == "drop_down_options" and field_options and prune_options:
+                prompt_options, pruned = self._prune_options(text, field_options)
             
-            # Вызов LLM
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_message)
-            ]
+            # Скомпилированная инструкция поля идёт после общего префикса с объявлением
+            compiled = compiled_prompts.get_field_prompt(field, prompt_options)
+            messages = build_listing_messages(text, compiled["instruction"])
             
-            response = self.llm.invoke(messages)
-            output = response.content
+            with llm_metrics.field_scope(field_id):
+                result = await self._acomplete_json(
+                    messages,
+                    compiled["schema_name"],
+                    schema=compiled["schema"],
+                    route=self.get_route(field_id, field_type),
+                    prompt_cache_key=get_listing_cache_key(text)
+                )
             
-            # Очистка и парсинг JSON
-            result_text = self._clean_json_response(output)
-            result = json.loads(result_text)
+            # Нужного значения нет среди кандидатов — повторяем с полным списком
+            if pruned and str(result.get("label_id", "")) == OTHER_OPTION["id"]:
+                print(f"↩️ {field_title}: значение вне кандидатов, повтор с полным списком")
+                return await self.parse_single_field(
+                    text, field, options, use_specific=use_specific, prune_options=False
+                )
             
             print(f"✅ Результат для {field_title}: {result}")
             return result
@@ -96,7 +430,153 @@ class AIParserService:
             print(f"❌ Ошибка парсинга поля {field_title}: {str(e)}")
             return {"label": "", "label_id": ""} if field_type == "drop_down_options" else {"label": ""}
 
-    def _parse_specific_field(
+    async def parse_fields_combined(
+        self,
+        text: str,
+        fields: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Извлекает несколько независимых полей одним вызовом LLM.
+        
+        Текст объявления отправляется один раз вместе с общим описанием
+        всех полей. Возвращаются только непустые и валидные значения —
+        остальные поля нужно допарсить через parse_single_field.
+        
+        Args:
+            text: Текст объявления
+            fields: Список полей (id, title, type, options)
+        
+        Returns:
+            {"field_id": {"label": "...", "label_id": "..."}}
+        """
+        if not fields:
+            return {}
+        
+        print(f"🧩 Комбинированный парсинг {len(fields)} полей одним вызовом")
+        
+        try:
+            fields_schema = []
+            for field in fields:
+                field_schema = {
+                    "id": str(field.get("id", "")),
+                    "title": field.get("title", ""),
+                    "type": field.get("type", "textbox_text"),
+                }
+                if field.get("type") == "drop_down_options" and field.get("options"):
+                    # "other" не пройдёт валидацию — поле допарсится отдельно
+                    prompt_options, _ = self._prune_options(text, field["options"])
+                    field_schema["options"] = [
+                        {"id": str(o.get("id")), "title": o.get("title") or o.get("name", "")}
+                        for o in prompt_options
+                    ]
+                fields_schema.append(field_schema)
+            
+            messages = build_listing_messages(
+                text,
+                f"{COMBINED_FIELDS_PROMPT.strip()}\n\n"
+                f"FIELDS:\n{json.dumps(fields_schema, ensure_ascii=False)}"
+            )
+            
+            # Схема: по объекту {label, label_id} на каждое поле
+            schema = {
+                "type": "object",
+                "properties": {
+                    field_schema["id"]: (
+                        build_dropdown_schema(field_schema["options"])
+                        if field_schema.get("options") else LABEL_ID_SCHEMA
+                    )
+                    for field_schema in fields_schema
+                },
+                "required": [field_schema["id"] for field_schema in fields_schema],
+                "additionalProperties": False,
+            }
+            with llm_metrics.field_scope("combined"):
+                raw_results = await self._acomplete_json(
+                    messages,
+                    "combined_fields",
+                    schema=schema,
+                    max_tokens=COMBINED_MAX_TOKENS_BASE + COMBINED_MAX_TOKENS_PER_FIELD * len(fields),
+                    prompt_cache_key=get_listing_cache_key(text)
+                )
+            
+            results = {}
+            for field in fields:
+                field_id = str(field.get("id", ""))
+                value = self._validate_field_value(field, raw_results.get(field_id))
+                if value:
+                    results[field_id] = value
+            
+            print(f"✅ Комбинированный парсинг: заполнено {len(results)} из {len(fields)} полей")
+            return results
+            
+        except Exception as e:
+            print(f"❌ Ошибка комбинированного парсинга: {str(e)}")
+            return {}
+
+    def _prune_options(
+        self,
+        text: str,
+        options: List[Dict[str, Any]]
+    ) -> tuple[List[Dict[str, Any]], bool]:
+        """
+        Сокращает большой список options до наиболее вероятных кандидатов.
+        
+        Списки не длиннее OPTIONS_PRUNE_THRESHOLD возвращаются как есть.
+        Если ни одна опция не похожа на текст, тоже возвращается полный
+        список — чтобы не потерять значение.
+        
+        Returns:
+            (options для промпта, был ли список сокращён)
+        """
+        if len(options) <= OPTIONS_PRUNE_THRESHOLD:
+            return options, False
+        
+        candidates = rank_options_by_text(text, options, limit=OPTIONS_PRUNE_TOP_K)
+        if not candidates:
+            return options, False
+        
+        print(f"✂️ Options сокращены: {len(options)} → {len(candidates)} + другое")
+        return candidates + [OTHER_OPTION], True
+
+    def _validate_field_value(
+        self,
+        field: Dict[str, Any],
+        value: Any
+    ) -> Optional[Dict[str, str]]:
+        """
+        Проверяет значение поля из комбинированного ответа.
+        
+        Returns:
+            Нормализованное значение или None, если оно пустое или невалидное
+        """
+        if not isinstance(value, dict):
+            return None
+        
+        label = str(value.get("label") or "").strip()
+        label_id = str(value.get("label_id") or "").strip()
+        field_type = field.get("type", "textbox_text")
+        
+        if not label and not label_id:
+            return None
+        
+        if field_type == "drop_down_options":
+            options = field.get("options") or []
+            matched = find_option_by_id(options, label_id) if label_id else None
+            if not matched:
+                matched = find_option_by_title(options, label)
+            if not matched:
+                return None
+            return {"label": matched["title"], "label_id": matched["id"]}
+        
+        if field_type.startswith("textbox_numeric"):
+            digits = label.replace(" ", "").replace("\u00a0", "")
+            if not digits.replace(".", "", 1).isdigit():
+                return None
+            return {"label": digits}
+        
+        return {"label": label}
+
+    async def _parse_specific_field(
         self,
         text: str,
         field_id: str,
@@ -118,22 +598,20 @@ class AIParserService:
         try:
             # Для описания используем специальный метод
             if specific_key == "description":
-                return self._parse_description_field(text)
+                return await self._parse_description_field(text)
             
             specific_prompt = SPECIFIC_PROMPTS.get(specific_key)
             if not specific_prompt:
                 return {"label": ""}
             
-            messages = [
-                SystemMessage(content=specific_prompt),
-                HumanMessage(content=f"ТЕКСТ ОБЪЯВЛЕНИЯ:\n{text}")
-            ]
-            
-            response = self.llm.invoke(messages)
-            output = response.content
+            messages = build_listing_messages(text, specific_prompt.strip())
             
-            result_text = self._clean_json_response(output)
-            result = json.loads(result_text)
+            result = await self._acomplete_json(
+                messages,
+                specific_key,
+                route=self.get_route(field_id, specific_key),
+                prompt_cache_key=get_listing_cache_key(text)
+            )
             
             print(f"✅ Специфичный результат: {str(result)[:100]}...")
             return result
@@ -142,10 +620,13 @@ class AIParserService:
             print(f"❌ Ошибка специфичного парсинга: {str(e)}")
             return {"label": ""}
 
-    def _parse_description_field(self, text: str) -> Dict[str, Any]:
+    async def _parse_description_field(self, text: str) -> Dict[str, Any]:
         """
         Парсит поле описания с извлечением блоков, генерацией резюме, трансформацией и финальным форматированием.
         
+        Резюме и трансформация зависят только от блоков и выполняются параллельно.
+        В режиме DESCRIPTION_FUSED_MODE все шаги делаются одним вызовом LLM.
+        
         Args:
             text: Текст объявления
         
@@ -155,30 +636,28 @@ class AIParserService:
         print("📝 Парсинг поля описания (с резюме, блоками и трансформацией)")
         
         try:
+            if DESCRIPTION_FUSED_MODE:
+                fused = await self._parse_description_fused(text)
+                if fused:
+                    return fused
+                print("⚠️ Fused-описание не получено, переходим к пошаговому конвейеру")
+            
             # Шаг 1: Извлекаем блоки из текста
-            blocks = self._extract_description_blocks(text)
+            blocks = await self._extract_description_blocks(text)
             print(f"✅ Извлечены блоки: {list(blocks.keys())}")
             
             if not blocks:
                 print("⚠️ Блоки не найдены, возвращаем пустое описание")
                 return {"label": ""}
             
-            # Шаг 2: Генерируем краткое резюме
-            summary = self._generate_description_summary(blocks)
+            # Шаги 2-3: Резюме и трансформация блоков — параллельно
+            summary, transformed_description = await asyncio.gather(
+                self._generate_description_summary(blocks),
+                self._transform_description_blocks(blocks)
+            )
             print(f"✅ Резюме сгенерировано: {summary[:80]}...")
             
-            # Шаг 3: Трансформируем блоки в красивое описание
-            transformed_description = self._transform_description_blocks(blocks)
-            
-            # Шаг 4: Добавляем финальный шаблон с контактами
-            address = self._extract_address_from_blocks(blocks)
-            final_description = self._add_description_footer(transformed_description, address)
-            
-            # Шаг 5: Объединяем резюме с полным описанием
-            complete_description = f"{summary}\n\n{final_description}"
-            
-            print(f"✅ Сформировано финальное описание, длина: {len(complete_description)} символов")
-            return {"label": complete_description}
+            return {"label": self._assemble_description(summary, transformed_description, blocks)}
             
         except Exception as e:
             print(f"❌ Ошибка при парсинге описания: {str(e)}")
@@ -186,7 +665,64 @@ class AIParserService:
             traceback.print_exc()
             return {"label": ""}
 
-    def _extract_description_blocks(self, text: str) -> Dict[str, str]:
+    async def _parse_description_fused(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Формирует описание одним структурированным вызовом LLM
+        (блоки, резюме и трансформация вместе).
+        
+        Args:
+            text: Текст объявления
+        
+        Returns:
+            {"label": "...полное описание..."} или None, если ответ неполный
+        """
+        try:
+            messages = build_listing_messages(text, DESCRIPTION_FUSED_PROMPT.strip())
+            
+            result = await self._acomplete_json(
+                messages,
+                "description_fused",
+                max_tokens=get_max_output_tokens("description_fused", len(text)),
+                prompt_cache_key=get_listing_cache_key(text)
+            )
+            result = {k: v.strip() for k, v in result.items() if isinstance(v, str) and v.strip()}
+            
+            transformed_description = self._format_transformed_blocks(result)
+            if not transformed_description:
+                return None
+            
+            summary = result.get("summary") or self._generate_fallback_summary(result)
+            return {"label": self._assemble_description(summary, transformed_description, result)}
+            
+        except Exception as e:
+            print(f"❌ Ошибка fused-описания: {str(e)}")
+            return None
+
+    def _assemble_description(
+        self,
+        summary: str,
+        transformed_description: str,
+        blocks: Dict[str, str]
+    ) -> str:
+        """
+        Собирает итоговое описание: резюме, трансформированные блоки и футер с контактами.
+        
+        Args:
+            summary: Краткое резюме
+            transformed_description: Описание с разделами СОСТОЯНИЕ, КОМПЛЕКТАЦИЯ, ПРЕИМУЩЕСТВА
+            blocks: Блоки объявления (для адреса)
+        
+        Returns:
+            Полное описание
+        """
+        address = self._extract_address_from_blocks(blocks)
+        final_description = self._add_description_footer(transformed_description, address)
+        complete_description = f"{summary}\n\n{final_description}"
+        
+        print(f"✅ Сформировано финальное описание, длина: {len(complete_description)} символов")
+        return complete_description
+
+    async def _extract_description_blocks(self, text: str) -> Dict[str, str]:
         """
         Извлекает из текста структурированные блоки описания.
         
@@ -197,16 +733,14 @@ class AIParserService:
             {"available": "...", "location": "...", "vin": "...", "condition": "...", "possible": "..."}
         """
         try:
-            messages = [
-                SystemMessage(content=DESCRIPTION_BLOCKS_PARSING_PROMPT),
-                HumanMessage(content=f"ТЕКСТ ОБЪЯВЛЕНИЯ:\n{text}")
-            ]
+            messages = build_listing_messages(text, DESCRIPTION_BLOCKS_PARSING_PROMPT.strip())
             
-            response = self.llm.invoke(messages)
-            output = response.content
-            
-            result_text = self._clean_json_response(output)
-            blocks = json.loads(result_text)
+            blocks = await self._acomplete_json(
+                messages,
+                "description_blocks",
+                max_tokens=get_max_output_tokens("description_blocks", len(text)),
+                prompt_cache_key=get_listing_cache_key(text)
+            )
             
             # Очищаем блоки от пустых значений
             blocks = {k: v.strip() for k, v in blocks.items() if isinstance(v, str) and v.strip()}
@@ -219,7 +753,7 @@ class AIParserService:
             traceback.print_exc()
             return {}
 
-    def _transform_description_blocks(self, blocks: Dict[str, str]) -> str:
+    async def _transform_description_blocks(self, blocks: Dict[str, str]) -> str:
         """
         Трансформирует извлеченные блоки в красивое, структурированное описание.
         Преобразует сухие списки в читаемый текст с заголовками СОСТОЯНИЕ, КОМПЛЕКТАЦИЯ, ПРЕИМУЩЕСТВА.
@@ -251,30 +785,13 @@ class AIParserService:
                 HumanMessage(content=user_message)
             ]
             
-            response = self.llm.invoke(messages)
-            output = response.content
-            
-            result_text = self._clean_json_response(output)
-            transformed = json.loads(result_text)
-            
-            # Собираем финальный текст из трансформированных блоков
-            result = []
-            
-            if transformed.get("condition"):
-                result.append("СОСТОЯНИЕ:")
-                result.append(transformed["condition"])
-                result.append("")
-            
-            if transformed.get("features"):
-                result.append("КОМПЛЕКТАЦИЯ:")
-                result.append(transformed["features"])
-                result.append("")
-            
-            if transformed.get("advantages"):
-                result.append("ПРЕИМУЩЕСТВА:")
-                result.append(transformed["advantages"])
+            transformed = await self._acomplete_json(
+                messages,
+                "description_transformation",
+                max_tokens=get_max_output_tokens("description_transformation", len(user_message))
+            )
             
-            return "\n".join(result).strip()
+            return self._format_transformed_blocks(transformed)
             
         except Exception as e:
             print(f"❌ Ошибка при трансформации блоков: {str(e)}")
@@ -283,6 +800,34 @@ class AIParserService:
             # Возвращаем блоки как есть, если трансформация не сработала
             return self._build_description_from_blocks(blocks)
 
+    def _format_transformed_blocks(self, transformed: Dict[str, str]) -> str:
+        """
+        Собирает текст из трансформированных блоков с заголовками разделов.
+        
+        Args:
+            transformed: {"condition": "...", "features": "...", "advantages": "..."}
+        
+        Returns:
+            Отформатированное описание (пустая строка, если разделов нет)
+        """
+        result = []
+        
+        if transformed.get("condition"):
+            result.append("СОСТОЯНИЕ:")
+            result.append(transformed["condition"])
+            result.append("")
+        
+        if transformed.get("features"):
+            result.append("КОМПЛЕКТАЦИЯ:")
+            result.append(transformed["features"])
+            result.append("")
+        
+        if transformed.get("advantages"):
+            result.append("ПРЕИМУЩЕСТВА:")
+            result.append(transformed["advantages"])
+        
+        return "\n".join(result).strip()
+
     def _extract_address_from_blocks(self, blocks: Dict[str, str]) -> str:
         """
         Извлекает адрес из блока location.
@@ -372,7 +917,7 @@ class AIParserService:
         # Возвращаем просто детали, т.к. DESCRIPTION_TEMPLATE больше не используется
         return car_details
 
-    def detect_generation(
+    async def detect_generation(
         self,
         vin: str,
         year: int,
@@ -412,11 +957,13 @@ class AIParserService:
                 HumanMessage(content="Определи поколение автомобиля.")
             ]
             
-            response = self.llm.invoke(messages)
-            output = response.content
-            
-            result_text = self._clean_json_response(output)
-            result = json.loads(result_text)
+            with llm_metrics.field_scope(DYNAMIC_IDS_MAP["generation"]):
+                result = await self._acomplete_json(
+                    messages,
+                    "generation",
+                    schema=build_dropdown_schema(generations),
+                    route=self.get_route(DYNAMIC_IDS_MAP["generation"], "generation")
+                )
             
             print(f"🎯 Поколение: {result}")
             return result
@@ -425,7 +972,7 @@ class AIParserService:
             print(f"❌ Ошибка определения поколения: {str(e)}")
             return {"label": "", "label_id": ""}
 
-    def translate_russian_to_romanian(self, text: str) -> str:
+    async def translate_russian_to_romanian(self, text: str) -> str:
         """
         Переводит текст с русского на румынский.
         
@@ -443,8 +990,14 @@ class AIParserService:
                 HumanMessage(content=text)
             ]
             
-            response = self.llm.invoke(messages)
-            output = response.content
+            output = await self._acomplete(
+                messages,
+                prompt_kind="translation",
+                max_tokens=min(
+                    TRANSLATION_MAX_TOKENS_LIMIT,
+                    TRANSLATION_MAX_TOKENS_BASE + int(len(text) * TRANSLATION_MAX_TOKENS_PER_CHAR)
+                )
+            )
             
             print("✅ Перевод завершен")
             return output.strip()
@@ -453,6 +1006,87 @@ class AIParserService:
             print(f"❌ Ошибка перевода: {str(e)}")
             return ""
 
+    async def translate_fields_russian_to_romanian(self, texts: Dict[str, str]) -> Dict[str, str]:
+        """
+        Переводит несколько текстов с русского на румынский одним вызовом LLM.
+        
+        Уже переведённые тексты берутся из кэша, остальные отправляются
+        одним JSON-запросом. Если пакетный ответ не разобран, недостающие
+        тексты переводятся по одному (параллельно).
+        
+        Args:
+            texts: {"ключ": "текст на русском"}, например {"12": "...", "13": "..."}
+        
+        Returns:
+            {"ключ": "текст на румынском"} — только для успешно переведённых текстов
+        """
+        translations: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+        
+        for key, text in texts.items():
+            if not text or not text.strip():
+                continue
+            cached = translation_cache.get(make_translation_cache_key(text))
+            if cached is not None:
+                translations[key] = cached["ro"]
+            else:
+                pending[key] = text
+        
+        if not pending:
+            if translations:
+                print(f"⚡ Переводы из кэша: {list(translations)}")
+            return translations
+        
+        print(f"🌐 Пакетный перевод с русского на румынский: {list(pending)}")
+        
+        try:
+            messages = [
+                SystemMessage(content=TRANSLATION_BATCH_RUSSIAN_TO_ROMANIAN_PROMPT),
+                HumanMessage(content=json.dumps(pending, ensure_ascii=False))
+            ]
+            
+            source_length = sum(len(text) for text in pending.values())
+            with llm_metrics.field_scope("+".join(pending)):
+                batch = await self._acomplete_json(
+                    messages,
+                    "translation_batch",
+                    schema={
+                        "type": "object",
+                        "properties": {key: STRING_SCHEMA for key in pending},
+                        "required": list(pending),
+                        "additionalProperties": False,
+                    },
+                    max_tokens=min(
+                        TRANSLATION_MAX_TOKENS_LIMIT,
+                        TRANSLATION_MAX_TOKENS_BASE + int(source_length * TRANSLATION_MAX_TOKENS_PER_CHAR)
+                    )
+                )
+            if not isinstance(batch, dict):
+                batch = {}
+        except Exception as e:
+            print(f"❌ Ошибка пакетного перевода: {str(e)}")
+            batch = {}
+        
+        missing = [
+            key for key in pending
+            if not isinstance(batch.get(key), str) or not batch[key].strip()
+        ]
+        if missing:
+            print(f"⚠️ Пакетный перевод неполный, переводим по одному: {missing}")
+            single = await asyncio.gather(
+                *(self.translate_russian_to_romanian(pending[key]) for key in missing)
+            )
+            batch.update(zip(missing, single))
+        
+        for key, text in pending.items():
+            ro_text = (batch.get(key) or "").strip() if isinstance(batch.get(key), str) else ""
+            if ro_text:
+                translations[key] = ro_text
+                translation_cache.set(make_translation_cache_key(text), {"ro": ro_text})
+        
+        print(f"✅ Переведено полей: {len(translations)} из {len(texts)}")
+        return translations
+
     def _clean_json_response(self, text: str) -> str:
         """Очищает ответ от markdown и лишних символов."""
         if "```json" in text:
@@ -461,7 +1095,7 @@ class AIParserService:
             text = text.split("```")[1].split("```")[0].strip()
         return text.strip()
 
-    def _generate_description_summary(self, blocks: Dict[str, str]) -> str:
+    async def _generate_description_summary(self, blocks: Dict[str, str]) -> str:
         """
         Генерирует краткое резюме описания - самое важное о машине в 1-2 предложениях.
         
@@ -492,11 +1126,7 @@ class AIParserService:
                 HumanMessage(content=user_message)
             ]
             
-            response = self.llm.invoke(messages)
-            output = response.content
-            
-            result_text = self._clean_json_response(output)
-            result = json.loads(result_text)
+            result = await self._acomplete_json(messages, "description_summary")
             
             summary = result.get("summary", "").strip()
             
@@ -8,7 +8,7 @@ from typing import List, Dict, Any, Optional
 from app.services.nine_api import nine_service
 
 
-def search_car_generations(
+async def search_car_generations(
     model_id: str,
     subcat: Optional[str] = None
 ) -> Dict[str, Any]:
@@ -44,9 +44,9 @@ def search_car_generations(
     try:
         # Вызов основной функции
         if subcat:
-            generations = nine_service.get_generations(model_id=model_id, subcat=subcat)
+            generations = await nine_service.get_generations(model_id=model_id, subcat=subcat)
         else:
-            generations = nine_service.get_generations(model_id=model_id)
+            generations = await nine_service.get_generations(model_id=model_id)
         
         return {
             "success": True,
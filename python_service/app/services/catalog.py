@@ -0,0 +1,113 @@
+"""
+Каталог характеристик 999.md (data/feacher_for_post.json).
+
+Файл читается один раз и хранится в памяти вместе с хэшем содержимого
+и номером версии, которые используют кэши результатов для инвалидации
+при смене каталога. Фоновая синхронизация (catalog_sync) подменяет
+каталог версией с актуальными опциями 999.md без перезапуска: данные, хэш и версия
+меняются одним присваиванием.
+"""
+import hashlib
+import json
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from app.config.settings import FEATURES_FILE_PATH
+
+
+class CatalogState(NamedTuple):
+    """Неизменяемое состояние каталога (подменяется целиком)."""
+    data: Dict[str, Any]
+    content_hash: str
+    version: int
+    source: str
+    loaded_at: float
+
+
+def compute_content_hash(data: Dict[str, Any]) -> str:
+    """Хэш содержимого каталога, не зависящий от порядка ключей и форматирования."""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class FeaturesCatalog:
+    """Загруженный в память каталог характеристик."""
+
+    def __init__(self, path: str = FEATURES_FILE_PATH):
+        self.path = path
+        self._state: Optional[CatalogState] = None
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Каталог; при первом обращении загружается из файла."""
+        return self.state.data
+
+    @property
+    def content_hash(self) -> str:
+        return self.state.content_hash
+
+    @property
+    def version(self) -> int:
+        """Номер версии: растёт при каждой подмене каталога."""
+        return self.state.version
+
+    @property
+    def state(self) -> CatalogState:
+        """Текущее состояние (данные, хэш и версия из одной подмены)."""
+        if self._state is None:
+            self.load()
+        return self._state or CatalogState({}, "", 0, "", 0.0)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Загружает каталог из файла.
+        
+        При ошибке возвращает пустой словарь и не запоминает его,
+        чтобы следующий запрос попробовал загрузить файл снова.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            data = json.loads(raw)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки features: {e}")
+            return {}
+
+        self.swap(data, source="file")
+        return data
+
+    def swap(self, data: Dict[str, Any], source: str) -> bool:
+        """
+        Подменяет каталог, если содержимое изменилось.
+        
+        Args:
+            data: Новый каталог ({"features_groups": [...]})
+            source: Откуда получен ("file", "999.md")
+        
+        Returns:
+            True, если каталог подменён (версия увеличена)
+        """
+        content_hash = compute_content_hash(data)
+        current = self._state
+        if current is not None and current.content_hash == content_hash:
+            return False
+
+        version = current.version + 1 if current is not None else 1
+        self._state = CatalogState(data, content_hash, version, source, time.time())
+        print(f"📚 Каталог характеристик загружен (v{version}, {source}, hash={content_hash[:12]})")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Версия и происхождение текущего каталога."""
+        state = self.state
+        return {
+            "version": state.version,
+            "content_hash": state.content_hash,
+            "source": state.source,
+            "loaded_at": state.loaded_at,
+            "features": sum(len(group.get("features", [])) for group in state.data.get("features_groups", [])),
+        }
+
+
+# Singleton instance
+features_catalog = FeaturesCatalog()
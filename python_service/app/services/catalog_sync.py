@@ -0,0 +1,171 @@
+"""
+Фоновая синхронизация каталога характеристик со схемой 999.md.
+
+Локальный файл каталога устаревает, когда 999.md добавляет опции, и это
+проявлялось только ошибками публикации. Задача периодически запрашивает
+/features для настроенной подкатегории и типа предложения.
+
+Локальный каталог — отобранная часть схемы (свои группы, названия полей,
+поле заголовка), поэтому схема 999.md не заменяет его целиком: в копию
+каталога переносятся актуальные списки опций полей, которые в нём есть.
+Если хэш содержимого изменился, каталог в памяти подменяется
+(features_catalog.swap). Версия каталога растёт, и кэши,
+привязанные к хэшу/версии (post-config, промпты, индекс марок),
+перестают отдавать результаты по старой схеме.
+"""
+import asyncio
+import copy
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from app.config.settings import DEFAULT_SUBCATEGORY, FEATURES_SYNC_INTERVAL
+from app.services.catalog import features_catalog, compute_content_hash
+from app.services.nine_api import nine_service
+
+
+def _option_ids_by_feature(data: Dict[str, Any]) -> Dict[str, Set[str]]:
+    return {
+        str(feature.get("id")): {str(opt.get("id")) for opt in feature.get("options") or []}
+        for group in data.get("features_groups", [])
+        for feature in group.get("features", [])
+    }
+
+
+def merge_live_options(catalog: Dict[str, Any], live: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Копия каталога с опциями полей из живой схемы.
+
+    Структура, группы и названия полей остаются локальными; обновляются
+    только списки options полей, у которых они есть в обеих схемах.
+    """
+    live_features = {
+        str(feature.get("id")): feature
+        for group in live.get("features_groups", [])
+        for feature in group.get("features", [])
+    }
+    merged = copy.deepcopy(catalog)
+    for group in merged.get("features_groups", []):
+        for feature in group.get("features", []):
+            live_feature = live_features.get(str(feature.get("id")))
+            if feature.get("options") and live_feature and live_feature.get("options"):
+                feature["options"] = copy.deepcopy(live_feature["options"])
+    return merged
+
+
+def diff_catalogs(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Краткая разница опций каталогов для логов и статистики.
+
+    Returns:
+        {"options_added": {feature_id: n}, "options_removed": {feature_id: n}}
+    """
+    old_options = _option_ids_by_feature(old)
+    new_options = _option_ids_by_feature(new)
+    common = sorted(old_options.keys() & new_options.keys())
+    return {
+        "options_added": {
+            feature_id: len(new_options[feature_id] - old_options[feature_id])
+            for feature_id in common if new_options[feature_id] - old_options[feature_id]
+        },
+        "options_removed": {
+            feature_id: len(old_options[feature_id] - new_options[feature_id])
+            for feature_id in common if old_options[feature_id] - new_options[feature_id]
+        },
+    }
+
+
+class CatalogSync:
+    """Периодическая сверка каталога с /features 999.md."""
+
+    def __init__(self, interval: float = FEATURES_SYNC_INTERVAL, subcat: str = DEFAULT_SUBCATEGORY):
+        self.interval = interval
+        self.subcat = subcat
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self.checks = 0
+        self.swaps = 0
+        self.errors = 0
+        self.last_checked_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_diff: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        """Запускает фоновую синхронизацию (при старте приложения)."""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def aclose(self) -> None:
+        """Останавливает фоновую синхронизацию."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sync_once(self) -> Dict[str, Any]:
+        """
+        Одна сверка каталога со схемой 999.md.
+
+        Returns:
+            {"changed": bool, "version": ..., "diff": {...} | None, "error": ... | None}
+        """
+        # Ручной запуск и фоновая задача не запрашивают схему одновременно
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self.checks += 1
+            self.last_checked_at = time.time()
+            try:
+                live = await nine_service.fetch_features(self.subcat, "ru")
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"❌ Синхронизация каталога не удалась: {str(e)}")
+                return {"changed": False, "version": features_catalog.version, "diff": None, "error": str(e)}
+
+            if not self._is_valid(live):
+                self.errors += 1
+                self.last_error = "Пустая или некорректная схема /features"
+                print(f"⚠️ {self.last_error} — каталог не изменён")
+                return {"changed": False, "version": features_catalog.version, "diff": None, "error": self.last_error}
+
+            self.last_error = None
+            current = features_catalog.state
+            merged = merge_live_options(current.data, live)
+            if compute_content_hash(merged) == current.content_hash:
+                return {"changed": False, "version": current.version, "diff": None, "error": None}
+
+            diff = diff_catalogs(current.data, merged)
+            features_catalog.swap(merged, source="999.md")
+            self.swaps += 1
+            self.last_diff = diff
+            print(f"🔄 Каталог обновлён из 999.md (v{features_catalog.version}): {diff}")
+            return {"changed": True, "version": features_catalog.version, "diff": diff, "error": None}
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние синхронизации."""
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "checks": self.checks,
+            "swaps": self.swaps,
+            "errors": self.errors,
+            "last_checked_at": self.last_checked_at,
+            "last_error": self.last_error,
+            "last_diff": self.last_diff,
+        }
+
+    @staticmethod
+    def _is_valid(data: Any) -> bool:
+        """Схема похожа на каталог: есть группы с характеристиками."""
+        groups: List[Dict[str, Any]] = data.get("features_groups") if isinstance(data, dict) else None
+        return bool(groups) and any(group.get("features") for group in groups)
+
+    async def _loop(self) -> None:
+        while True:
+            await self.sync_once()
+            await asyncio.sleep(self.interval)
+
+
+# Singleton instance
+catalog_sync = CatalogSync()
@@ -0,0 +1,132 @@
+"""
+Планировщик извлечения полей на основе графа зависимостей (DAG).
+
+Каждое поле — узел графа. Узел запускается, как только завершились все его
+родители, а общее число одновременно выполняемых узлов ограничено семафором.
+Таким образом время ответа определяется критическим путём
+(Марка → Модель → Поколение), а не суммой всех вызовов LLM.
+"""
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.config.settings import POST_CONFIG_MAX_CONCURRENCY
+
+
+class FieldScheduler:
+    """Выполняет задачи полей по мере готовности их зависимостей."""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ):
+        """
+        Args:
+            max_concurrency: Максимум одновременно выполняемых узлов
+            on_result: Вызывается в event loop сразу после готовности узла
+                       (node_id, результат) — например, для предзагрузки
+            semaphore: Общий семафор нескольких планировщиков (пакетная обработка);
+                       если передан, max_concurrency не используется
+        """
+        self.max_concurrency = max(1, max_concurrency or POST_CONFIG_MAX_CONCURRENCY)
+        self.on_result = on_result
+        self.semaphore = semaphore
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        node_id: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Iterable[str] = (),
+        priority: bool = False
+    ) -> None:
+        """
+        Регистрирует узел графа.
+        
+        Args:
+            node_id: ID узла (обычно ID поля)
+            func: Функция, принимающая словарь уже готовых результатов.
+                  Может быть обычной (выполняется в потоке) или корутинной
+            depends_on: ID родительских узлов
+            priority: Запускать узел раньше остальных при равной готовности
+        """
+        self._nodes[node_id] = {
+            "func": func,
+            "depends_on": [str(dep) for dep in depends_on if str(dep) != node_id],
+            "priority": priority,
+        }
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._nodes
+
+    def _check_acyclic(self) -> None:
+        """Проверяет, что граф не содержит циклов."""
+        state: Dict[str, int] = {}
+
+        def visit(node_id: str, path: List[str]) -> None:
+            if state.get(node_id) == 2:
+                return
+            if state.get(node_id) == 1:
+                raise ValueError(f"Цикл в графе полей: {' → '.join(path + [node_id])}")
+            state[node_id] = 1
+            for dep in self._nodes[node_id]["depends_on"]:
+                if dep in self._nodes:
+                    visit(dep, path + [node_id])
+            state[node_id] = 2
+
+        for node_id in self._nodes:
+            visit(node_id, [])
+
+    async def run(self, results: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Выполняет весь граф.
+        
+        Зависимости, которых нет среди узлов, считаются уже разрешёнными
+        (например, статичные поля, заранее положенные в results).
+        Если узел упал с исключением, его результат не записывается,
+        а зависимые узлы всё равно запускаются и видят отсутствие значения.
+        
+        Args:
+            results: Начальные результаты (общий словарь, дополняется на месте)
+        
+        Returns:
+            Словарь {node_id: результат}
+        """
+        self._check_acyclic()
+
+        results = results if results is not None else {}
+        semaphore = self.semaphore or asyncio.Semaphore(self.max_concurrency)
+        done = {node_id: asyncio.Event() for node_id in self._nodes}
+        started_at = time.perf_counter()
+
+        async def run_node(node_id: str) -> None:
+            node = self._nodes[node_id]
+            try:
+                for dep in node["depends_on"]:
+                    if dep in done:
+                        await done[dep].wait()
+
+                async with semaphore:
+                    func = node["func"]
+                    if inspect.iscoroutinefunction(func):
+                        value = await func(results)
+                    else:
+                        value = await asyncio.to_thread(func, results)
+
+                results[node_id] = value
+                print(f"⏱️ Поле {node_id} готово через {time.perf_counter() - started_at:.2f}с")
+                if self.on_result:
+                    self.on_result(node_id, value)
+            except Exception as e:
+                print(f"❌ Ошибка узла {node_id}: {str(e)}")
+            finally:
+                done[node_id].set()
+
+        # Приоритетные узлы создаются первыми и первыми занимают семафор
+        ordered = sorted(self._nodes, key=lambda node_id: not self._nodes[node_id]["priority"])
+        await asyncio.gather(*(run_node(node_id) for node_id in ordered))
+
+        return results
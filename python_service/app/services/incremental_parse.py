@@ -0,0 +1,175 @@
+"""
+Инкрементальный повторный парсинг отредактированного объявления.
+
+Сравнивает предыдущий и новый текст построчно и определяет, какие поля
+нужно извлечь заново. Поле переиспользуется из предыдущего результата,
+если ни одна изменённая строка не является для него "источником":
+не содержит его прежнего значения или подписи поля ("Цена", "КПП"...).
+"""
+import difflib
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from app.config.settings import DYNAMIC_IDS_MAP, STATIC_DEFAULTS
+from app.services.local_extractor import local_extractor
+from app.services.option_matcher import normalize_phrase, option_matcher
+from app.services.post_config_cache import normalize_listing_text
+
+
+# Поля, которые генерируются по всему тексту — парсятся заново при любой правке
+WHOLE_TEXT_FIELDS = {DYNAMIC_IDS_MAP["description"], "1404"}
+
+# Заголовок собирается из марки, модели и года
+DERIVED_FIELDS = {
+    DYNAMIC_IDS_MAP["title"]: {DYNAMIC_IDS_MAP["make"], DYNAMIC_IDS_MAP["model"], DYNAMIC_IDS_MAP["year"]},
+}
+
+# Слова из названий полей, слишком общие для поиска подписи
+GENERIC_TITLE_WORDS = {"тип", "количество", "код"}
+
+
+def diff_listing_lines(previous_text: str, text: str) -> Tuple[List[str], List[str]]:
+    """
+    Построчный diff двух текстов объявления.
+
+    Returns:
+        (removed, added) — изменённые строки старого и нового текста
+    """
+    old_lines = normalize_listing_text(previous_text).splitlines()
+    new_lines = normalize_listing_text(text).splitlines()
+    removed: List[str] = []
+    added: List[str] = []
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        removed.extend(line for line in old_lines[i1:i2] if line)
+        added.extend(line for line in new_lines[j1:j2] if line)
+    return removed, added
+
+
+def get_field_keywords(feature: Dict[str, Any]) -> List[str]:
+    """Нормализованные подписи поля: первое слово названия и подписи из словаря синонимов."""
+    keywords = []
+    title_words = normalize_phrase(feature.get("title", "")).split()
+    if title_words and title_words[0] not in GENERIC_TITLE_WORDS and len(title_words[0]) >= 3:
+        keywords.append(f" {title_words[0]} ")
+    config = option_matcher.synonyms.get(str(feature.get("id", "")), {})
+    keywords.extend(normalize_phrase(label) for label in config.get("labels", []))
+    return [keyword for keyword in keywords if keyword.strip()]
+
+
+def _mentions(line: str, value: str, keywords: Iterable[str]) -> bool:
+    """Упоминает ли строка значение поля или его подпись."""
+    normalized = normalize_phrase(line)
+    if any(keyword in normalized for keyword in keywords):
+        return True
+    if not value:
+        return False
+    if normalize_phrase(value) in normalized:
+        return True
+    # Числа в тексте пишутся с разделителями: "7 300 €" для значения "7300"
+    digits = "".join(ch for ch in value if ch.isdigit())
+    return len(digits) >= 2 and digits == value.strip() and digits in "".join(ch for ch in line if ch.isdigit())
+
+
+def _previous_values(previous_result: Dict[str, Any]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[Dict]]]:
+    """Значения и options полей из предыдущего ответа post-config."""
+    values: Dict[str, Dict[str, str]] = {}
+    options: Dict[str, List[Dict]] = {}
+    for group in previous_result.get("features_groups", []):
+        for feature in group.get("features", []):
+            feature_id = str(feature.get("id", ""))
+            values[feature_id] = {
+                "label": feature.get("label", "") or "",
+                "label_id": feature.get("label_id", "") or "",
+            }
+            if feature.get("options"):
+                options[feature_id] = [
+                    {"id": str(opt.get("id")), "title": opt.get("title", "")}
+                    for opt in feature["options"]
+                ]
+    return values, options
+
+
+def plan_incremental_parse(
+    previous_text: str,
+    text: str,
+    previous_result: Dict[str, Any],
+    all_features: List[Dict],
+    get_dependencies: Callable[[str], Set[str]]
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[Dict]]]:
+    """
+    Определяет, какие значения можно переиспользовать из предыдущего результата.
+
+    Args:
+        previous_text: Текст, по которому был получен previous_result
+        text: Новый текст объявления
+        previous_result: Предыдущий ответ post-config ({"features_groups": [...]})
+        all_features: Плоский список полей каталога
+        get_dependencies: Функция, возвращающая родительские поля для поля
+
+    Returns:
+        (reused_values, reused_options) — значения полей, которые не нужно
+        парсить заново, и options зависимых полей (модель, поколение)
+    """
+    previous_values, previous_options = _previous_values(previous_result)
+    removed, added = diff_listing_lines(previous_text, text)
+    print(f"✏️ Инкрементальный парсинг: изменено строк -{len(removed)} +{len(added)}")
+
+    features_by_id = {str(f.get("id", "")): f for f in all_features}
+    dirty: Set[str] = set()
+
+    for feature_id, feature in features_by_id.items():
+        if feature_id in STATIC_DEFAULTS:
+            continue
+        if feature_id not in previous_values:
+            dirty.add(feature_id)
+            continue
+        if not removed and not added:
+            continue
+        if feature_id in WHOLE_TEXT_FIELDS:
+            dirty.add(feature_id)
+            continue
+
+        label = previous_values[feature_id]["label"]
+        keywords = get_field_keywords(feature)
+        if any(_mentions(line, label, keywords) for line in removed):
+            dirty.add(feature_id)
+        elif any(_mentions(line, "", keywords) for line in added):
+            dirty.add(feature_id)
+        elif local_extractor.supports(feature_id):
+            # Новое значение без подписи ("автомат", "73 000 км") в добавленных строках
+            local_value = local_extractor.extract_field("\n".join(added), feature)
+            if local_value and local_value["label"] != label:
+                dirty.add(feature_id)
+
+    # Зависимые и производные поля пересчитываются вслед за родителями
+    changed = True
+    while changed:
+        changed = False
+        for feature_id in features_by_id:
+            if feature_id in dirty:
+                continue
+            parents = get_dependencies(feature_id) | DERIVED_FIELDS.get(feature_id, set())
+            if parents & dirty:
+                dirty.add(feature_id)
+                changed = True
+
+    reused_values = {
+        feature_id: previous_values[feature_id]
+        for feature_id in features_by_id
+        if feature_id not in dirty and feature_id not in STATIC_DEFAULTS and feature_id in previous_values
+    }
+    reused_options = {
+        feature_id: options
+        for feature_id, options in previous_options.items()
+        if feature_id in reused_values and feature_id in get_dependent_ids(features_by_id, get_dependencies)
+    }
+
+    print(f"♻️ Переиспользовано полей: {len(reused_values)}, парсится заново: {sorted(dirty)}")
+    return reused_values, reused_options
+
+
+def get_dependent_ids(features_by_id: Dict[str, Dict], get_dependencies: Callable[[str], Set[str]]) -> Set[str]:
+    """ID полей, у которых есть родители (их options загружаются через API)."""
+    return {feature_id for feature_id in features_by_id if get_dependencies(feature_id)}
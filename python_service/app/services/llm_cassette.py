@@ -0,0 +1,210 @@
+"""
+Запись и воспроизведение ответов LLM ("кассеты") для воспроизводимых бенчмарков.
+
+Бэкенд подключается к общему httpx-клиенту AIParserService как транспорт,
+поэтому весь конвейер (схемы, маршрутизация, ограничитель, хеджирование,
+метрики) работает так же, как с OpenAI:
+- record: запрос уходит в OpenAI, ответ сохраняется на диск по хэшу запроса;
+- replay: ответ читается с диска, сеть не нужна, задержка синтетическая
+  (записанная или из заданного распределения с фиксированным seed).
+
+Хэш берётся от тела запроса (модель, сообщения, схема, лимиты) с сортировкой
+ключей, поэтому одинаковые промпты всегда попадают в одну кассету.
+Тот же транспорт записывает справочники 999.md для бенчмарков (GET-запросы
+различаются параметрами строки запроса).
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config.settings import (
+    LLM_BACKEND,
+    LLM_CASSETTE_DIR,
+    LLM_REPLAY_LATENCY,
+    LLM_REPLAY_SEED,
+)
+
+
+BACKEND_LIVE = "live"
+BACKEND_RECORD = "record"
+BACKEND_REPLAY = "replay"
+
+
+class LatencyModel:
+    """
+    Синтетическая задержка воспроизведения.
+
+    Спецификация: "recorded" (как при записи), "none", "fixed:S",
+    "uniform:MIN,MAX", "normal:MEAN,STD", "lognormal:MEDIAN,SIGMA" (секунды).
+    """
+
+    def __init__(self, spec: str = LLM_REPLAY_LATENCY, seed: int = LLM_REPLAY_SEED):
+        self.spec = spec
+        name, _, params = spec.partition(":")
+        self.name = name.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+        expected = {"recorded": 0, "none": 0, "fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if (
+            self.name not in expected
+            or len(self.params) != expected[self.name]
+            or (self.name == "lognormal" and self.params[0] <= 0)
+        ):
+            raise ValueError(f"Некорректная задержка воспроизведения: {spec!r}")
+        self._random = random.Random(seed)
+
+    def sample(self, recorded: float) -> float:
+        """Задержка (сек) для одного ответа; recorded — задержка при записи."""
+        if self.name == "recorded":
+            return recorded
+        if self.name == "none":
+            return 0.0
+        if self.name == "fixed":
+            return self.params[0]
+        if self.name == "uniform":
+            return self._random.uniform(*self.params)
+        if self.name == "normal":
+            return max(0.0, self._random.gauss(*self.params))
+        median, sigma = self.params
+        return self._random.lognormvariate(math.log(median), sigma)
+
+
+def make_cassette_key(request: httpx.Request) -> str:
+    """Хэш запроса: путь API + параметры запроса + тело JSON с отсортированными ключами."""
+    try:
+        body: Any = json.loads(request.content or b"{}")
+    except ValueError:
+        body = request.content.decode("utf-8", "replace")
+    key: Dict[str, Any] = {"path": request.url.path, "body": body}
+    if request.url.params:
+        # Только при наличии: ключи записанных ранее кассет LLM не меняются
+        key["params"] = sorted(request.url.params.multi_items())
+    payload = json.dumps(key, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """httpx-транспорт, записывающий или воспроизводящий ответы LLM."""
+
+    def __init__(
+        self,
+        mode: str,
+        directory: str = LLM_CASSETTE_DIR,
+        latency: Optional[LatencyModel] = None,
+        inner: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if mode not in (BACKEND_RECORD, BACKEND_REPLAY):
+            raise ValueError(f"Неизвестный режим кассет: {mode!r}")
+        self.mode = mode
+        self.directory = directory
+        self.latency = latency or LatencyModel()
+        self.inner = inner
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = make_cassette_key(request)
+        if self.mode == BACKEND_REPLAY:
+            return await self._replay(key)
+        return await self._record(key, request)
+
+    async def aclose(self) -> None:
+        if self.inner is not None:
+            await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "latency": self.latency.spec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+    async def _replay(self, key: str) -> httpx.Response:
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as f:
+                cassette = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            print(f"📼 Нет кассеты для запроса {key[:12]}")
+            # 404 не повторяется клиентом OpenAI — вызов сразу завершается ошибкой
+            return httpx.Response(
+                404,
+                json={"error": {"message": f"Cassette not found: {key}", "type": "cassette_miss"}}
+            )
+
+        self.hits += 1
+        delay = self.latency.sample(float(cassette.get("latency") or 0.0))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return httpx.Response(cassette.get("status", 200), json=cassette["response"])
+
+    async def _record(self, key: str, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        latency = time.perf_counter() - started
+
+        if response.status_code == 200:
+            try:
+                body = json.loads(response.content)
+            except ValueError:
+                return response
+            path = self.path_for(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Запись через временный файл: параллельные вызовы не оставят обрывков
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "key": key,
+                    "request": json.loads(request.content or b"{}"),
+                    "status": response.status_code,
+                    "latency": round(latency, 4),
+                    "response": body,
+                }, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+            self.recorded += 1
+        return response
+
+
+def create_llm_transport(
+    limits: httpx.Limits,
+    backend: str = LLM_BACKEND,
+    directory: str = LLM_CASSETTE_DIR,
+    latency: str = LLM_REPLAY_LATENCY,
+    seed: int = LLM_REPLAY_SEED,
+    name: str = "LLM"
+) -> Optional[CassetteTransport]:
+    """
+    Транспорт для httpx-клиента LLM (или 999.md в бенчмарках).
+
+    Args:
+        limits: Лимиты пула соединений (для записи через сеть)
+        backend: "live", "record" или "replay"
+        directory: Каталог кассет
+        latency: Задержка воспроизведения (см. LatencyModel)
+        seed: Seed синтетической задержки
+        name: Название бэкенда для лога
+
+    Returns:
+        CassetteTransport для record/replay или None — обычный транспорт (live)
+    """
+    if backend == BACKEND_LIVE:
+        return None
+    inner = httpx.AsyncHTTPTransport(limits=limits) if backend == BACKEND_RECORD else None
+    transport = CassetteTransport(backend, directory, LatencyModel(latency, seed), inner=inner)
+    print(f"📼 {name} бэкенд: {backend} ({directory}, задержка {latency})")
+    return transport
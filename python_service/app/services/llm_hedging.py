@@ -0,0 +1,177 @@
+"""
+Хеджирование вызовов LLM для сокращения хвостовой задержки.
+
+Один медленный ответ модели задерживает весь /api/post-config, поэтому
+p99 заметно хуже p50. Если вызов идёт дольше перцентиля задержки
+своего поля (накопленного за время работы процесса), отправляется
+дубликат; побеждает первый корректный ответ, второй вызов отменяется.
+
+Дополнительные вызовы ограничены бюджетом: каждый основной вызов
+пополняет его на долю LLM_HEDGING_BUDGET, каждый дубликат тратит единицу.
+В перцентиль попадает только время самого вызова: ожидание лимита
+(ограничитель RPM/TPM) происходит до run(), а дубликат отправляется,
+только если admit_hedge разрешает его без очереди.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.config.settings import (
+    LLM_HEDGING_ENABLED,
+    LLM_HEDGING_PERCENTILE,
+    LLM_HEDGING_MIN_SAMPLES,
+    LLM_HEDGING_WINDOW,
+    LLM_HEDGING_MIN_DELAY,
+    LLM_HEDGING_BUDGET,
+)
+
+
+T = TypeVar("T")
+
+HedgeKey = Tuple[str, str]
+
+
+class LLMHedger:
+    """Задержки вызовов по полям и запуск дубликатов в пределах бюджета."""
+
+    def __init__(
+        self,
+        enabled: bool = LLM_HEDGING_ENABLED,
+        percentile: float = LLM_HEDGING_PERCENTILE,
+        min_samples: int = LLM_HEDGING_MIN_SAMPLES,
+        window: int = LLM_HEDGING_WINDOW,
+        min_delay: float = LLM_HEDGING_MIN_DELAY,
+        budget: float = LLM_HEDGING_BUDGET
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.budget = budget
+        # Запас бюджета ограничен, чтобы после простоя не уйти в серию дубликатов
+        self.max_credits = max(1.0, budget * window)
+        self.reset()
+
+    def get_delay(self, key: HedgeKey) -> Optional[float]:
+        """
+        Через сколько секунд отправлять дубликат вызова.
+
+        Args:
+            key: (ID поля, вид промпта)
+
+        Returns:
+            Перцентиль задержки поля или None — данных пока мало
+        """
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return max(self.min_delay, ordered[index])
+
+    def observe(self, key: HedgeKey, latency: float) -> None:
+        """Добавляет задержку завершённого вызова в окно поля."""
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    async def run(
+        self,
+        key: HedgeKey,
+        call: Callable[[], Awaitable[T]],
+        is_valid: Optional[Callable[[T], bool]] = None,
+        admit_hedge: Optional[Callable[[], bool]] = None
+    ) -> Tuple[T, bool]:
+        """
+        Выполняет вызов с хеджированием.
+
+        Args:
+            key: (ID поля, вид промпта)
+            call: Фабрика вызова (вызывается повторно для дубликата)
+            is_valid: Проверка ответа; некорректный ответ ждёт второй вызов
+            admit_hedge: Разрешение на дубликат (например, свободный лимит
+                         RPM/TPM); False — ждём основной вызов
+
+        Returns:
+            (ответ, был ли отправлен дубликат)
+        """
+        delay = self.get_delay(key) if self.enabled else None
+        self.calls += 1
+        self._credits = min(self.max_credits, self._credits + self.budget)
+        if delay is None:
+            return await self._timed(key, call), False
+
+        primary = asyncio.ensure_future(self._timed(key, call))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or self._credits < 1:
+                return await primary, False
+            if admit_hedge is not None and not admit_hedge():
+                self.hedges_denied += 1
+                return await primary, False
+
+            self._credits -= 1
+            self.hedges += 1
+            hedge = asyncio.ensure_future(self._timed(key, call))
+            tasks.append(hedge)
+            pending = set(tasks)
+            fallback: Optional[asyncio.Future] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and (is_valid is None or is_valid(task.result())):
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result(), True
+                    if fallback is None or fallback.exception() is not None:
+                        fallback = task
+            # Оба ответа некорректны: отдаём тот, что есть (ошибку — если оба упали)
+            return fallback.result(), True
+        finally:
+            # Проигравший (или брошенный при отмене запроса) вызов не нужен
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние хеджирования и текущие пороги по полям."""
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_denied": self.hedges_denied,
+            "hedge_ratio": round(self.hedges / self.calls, 4) if self.calls else 0.0,
+            "credits": round(self._credits, 2),
+            "thresholds": {
+                f"{field_id}:{kind}": round(delay, 3)
+                for (field_id, kind) in self._latencies
+                if (delay := self.get_delay((field_id, kind))) is not None
+            },
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает накопленные задержки и счётчики."""
+        self._latencies: Dict[HedgeKey, Deque[float]] = {}
+        self._credits = 0.0
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_denied = 0
+
+    async def _timed(self, key: HedgeKey, call: Callable[[], Awaitable[T]]) -> T:
+        # Отменённый проигравший не учитывается: его обрезанная
+        # задержка занижала бы перцентиль
+        started = time.perf_counter()
+        result = await call()
+        self.observe(key, time.perf_counter() - started)
+        return result
+
+
+# Singleton instance
+llm_hedger = LLMHedger()
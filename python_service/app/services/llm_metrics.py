@@ -0,0 +1,266 @@
+"""
+Учёт вызовов LLM: токены, задержка и успешность разбора ответа.
+
+Каждый вызов AIParserService записывается с ID поля, видом промпта и моделью.
+Записи агрегируются по полям, видам промптов, моделям и HTTP-запросам
+(текущий запрос и поле передаются через contextvars, поэтому учёт
+работает и для параллельных узлов графа полей).
+"""
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional, Set
+
+from app.config.settings import LLM_METRICS_RECENT_REQUESTS
+
+
+# Сводка текущего HTTP-запроса и ID поля, для которого вызывается LLM
+_current_request: ContextVar[Optional[Dict[str, Any]]] = ContextVar("llm_metrics_request", default=None)
+_current_field: ContextVar[str] = ContextVar("llm_metrics_field", default="")
+# Счётчик сбоев LLM текущего блока track_failures
+_current_failures: ContextVar[Optional[Dict[str, Any]]] = ContextVar("llm_metrics_failures", default=None)
+
+
+def _empty_aggregate() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "parse_failures": 0,
+        "rejected": 0,
+        "escalations": 0,
+        "hedges": 0,
+        "truncations": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "latency_total": 0.0,
+        "latency_max": 0.0,
+    }
+
+
+def _add_call(aggregate: Dict[str, Any], call: Dict[str, Any]) -> None:
+    aggregate["calls"] += 1
+    aggregate["errors"] += 0 if call["success"] else 1
+    aggregate["prompt_tokens"] += call["prompt_tokens"]
+    aggregate["completion_tokens"] += call["completion_tokens"]
+    aggregate["cached_tokens"] += call["cached_tokens"]
+    aggregate["latency_total"] += call["latency"]
+    aggregate["latency_max"] = max(aggregate["latency_max"], call["latency"])
+
+
+def _summarize(aggregate: Dict[str, Any]) -> Dict[str, Any]:
+    """Агрегат с округлёнными значениями и средней задержкой."""
+    calls = aggregate["calls"]
+    return {
+        **aggregate,
+        "latency_total": round(aggregate["latency_total"], 3),
+        "latency_max": round(aggregate["latency_max"], 3),
+        "latency_avg": round(aggregate["latency_total"] / calls, 3) if calls else 0.0,
+        # Доля входных токенов, попавших в кэш промптов провайдера
+        "cached_ratio": (
+            round(aggregate["cached_tokens"] / aggregate["prompt_tokens"], 4)
+            if aggregate["prompt_tokens"] else 0.0
+        ),
+    }
+
+
+def get_usage_tokens(response: Any) -> Dict[str, int]:
+    """
+    Токены из ответа LangChain (usage_metadata).
+
+    Returns:
+        {"prompt_tokens": ..., "completion_tokens": ..., "cached_tokens": ...}
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "prompt_tokens": int(usage.get("input_tokens") or 0),
+        "completion_tokens": int(usage.get("output_tokens") or 0),
+        "cached_tokens": int(details.get("cache_read") or 0),
+    }
+
+
+class LLMMetrics:
+    """Накопитель метрик вызовов LLM."""
+
+    def __init__(self, recent_requests: int = LLM_METRICS_RECENT_REQUESTS):
+        self.max_recent_requests = recent_requests
+        self.reset()
+
+    @contextmanager
+    def track_request(self, method: str, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Открывает сводку HTTP-запроса: все вызовы LLM внутри (включая
+        дочерние задачи asyncio) суммируются в неё. Запросы без вызовов LLM
+        в историю не попадают.
+        """
+        request_summary = {
+            "request_id": uuid.uuid4().hex[:12],
+            "method": method,
+            "path": path,
+            "started_at": time.time(),
+            "totals": _empty_aggregate(),
+            "by_field": {},
+        }
+        token = _current_request.set(request_summary)
+        started = time.perf_counter()
+        try:
+            yield request_summary
+        finally:
+            _current_request.reset(token)
+            request_summary["duration"] = round(time.perf_counter() - started, 3)
+            if request_summary["totals"]["calls"]:
+                self.recent_requests.append(request_summary)
+
+    @contextmanager
+    def field_scope(self, field_id: str) -> Iterator[None]:
+        """Привязывает вызовы LLM внутри блока к полю."""
+        token = _current_field.set(str(field_id))
+        try:
+            yield
+        finally:
+            _current_field.reset(token)
+
+    @contextmanager
+    def track_failures(self) -> Iterator[Dict[str, Any]]:
+        """
+        Считает ошибки вызовов и неразобранные ответы LLM внутри блока
+        (включая дочерние задачи asyncio). В отличие от сводки HTTP-запроса,
+        блок можно открыть на одно объявление пакета.
+
+        Yields:
+            {"errors": ..., "parse_failures": ..., "rejected": ..., "fields": {ID полей со сбоями}} —
+            заполняется по ходу блока. Вызовы без поля дают ID "-", вызов
+            для нескольких полей ("12+13") даёт ID каждого из них.
+        """
+        failures: Dict[str, Any] = {"errors": 0, "parse_failures": 0, "rejected": 0, "fields": set()}
+        token = _current_failures.set(failures)
+        try:
+            yield failures
+        finally:
+            _current_failures.reset(token)
+
+    def current_field(self) -> str:
+        """ID поля, к которому привязаны текущие вызовы LLM."""
+        return _current_field.get()
+
+    def record_call(
+        self,
+        kind: str,
+        latency: float,
+        success: bool,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        model: str = ""
+    ) -> None:
+        """Записывает один вызов LLM для текущего поля и запроса."""
+        field_id = _current_field.get() or "-"
+        call = {
+            "latency": latency,
+            "success": success,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cached_tokens": cached_tokens,
+        }
+        if model:
+            _add_call(self.by_model.setdefault(model, _empty_aggregate()), call)
+        for aggregate in self._aggregates(field_id, kind):
+            _add_call(aggregate, call)
+        if not success:
+            self._count_failure("errors")
+
+    def record_parse_failure(self, kind: str) -> None:
+        """Ответ получен, но не разобран как JSON."""
+        field_id = _current_field.get() or "-"
+        for aggregate in self._aggregates(field_id, kind):
+            aggregate["parse_failures"] += 1
+        self._count_failure("parse_failures")
+
+    def record_rejection(self, kind: str) -> None:
+        """Вызов не отправлен: очередь ограничителя заполнена."""
+        field_id = _current_field.get() or "-"
+        for aggregate in self._aggregates(field_id, kind):
+            aggregate["rejected"] += 1
+        self._count_failure("rejected")
+
+    def record_escalation(self, kind: str) -> None:
+        """Ответ быстрой модели недостаточно уверенный — запрос повторён на сильной."""
+        field_id = _current_field.get() or "-"
+        for aggregate in self._aggregates(field_id, kind):
+            aggregate["escalations"] += 1
+
+    def record_truncation(self, kind: str) -> None:
+        """Ответ оборван по max_tokens — запрос повторён с большим лимитом."""
+        field_id = _current_field.get() or "-"
+        for aggregate in self._aggregates(field_id, kind):
+            aggregate["truncations"] += 1
+
+    def record_hedge(self, kind: str) -> None:
+        """Вызов затянулся дольше перцентиля поля — отправлен дубликат."""
+        field_id = _current_field.get() or "-"
+        for aggregate in self._aggregates(field_id, kind):
+            aggregate["hedges"] += 1
+
+    @staticmethod
+    def _count_failure(name: str) -> None:
+        failures = _current_failures.get()
+        if failures is not None:
+            failures[name] += 1
+            fields: Set[str] = failures["fields"]
+            fields.update((_current_field.get() or "-").split("+"))
+
+    def _aggregates(self, field_id: str, kind: str):
+        """Агрегаты, которые обновляет вызов: общий, поле, вид промпта, запрос."""
+        yield self.totals
+        yield self.by_field.setdefault(field_id, _empty_aggregate())
+        yield self.by_kind.setdefault(kind, _empty_aggregate())
+        request_summary = _current_request.get()
+        if request_summary is not None:
+            yield request_summary["totals"]
+            yield request_summary["by_field"].setdefault(field_id, _empty_aggregate())
+
+    def request_stats(self) -> Optional[Dict[str, Any]]:
+        """Сводка текущего запроса (для логов в конце обработки)."""
+        request_summary = _current_request.get()
+        if request_summary is None:
+            return None
+        return _summarize(request_summary["totals"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Агрегаты по полям (самые медленные первыми), видам промптов и последним запросам."""
+        by_field = sorted(
+            self.by_field.items(),
+            key=lambda item: item[1]["latency_total"],
+            reverse=True
+        )
+        return {
+            "since": self.started_at,
+            "totals": _summarize(self.totals),
+            "by_field": {field_id: _summarize(agg) for field_id, agg in by_field},
+            "by_kind": {kind: _summarize(agg) for kind, agg in self.by_kind.items()},
+            "by_model": {model: _summarize(agg) for model, agg in self.by_model.items()},
+            "recent_requests": [
+                {
+                    **{k: v for k, v in request.items() if k not in ("totals", "by_field")},
+                    "totals": _summarize(request["totals"]),
+                    "by_field": {field_id: _summarize(agg) for field_id, agg in request["by_field"].items()},
+                }
+                for request in reversed(self.recent_requests)
+            ],
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает накопленные метрики."""
+        self.started_at = time.time()
+        self.totals = _empty_aggregate()
+        self.by_field: Dict[str, Dict[str, Any]] = {}
+        self.by_kind: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, Dict[str, Any]] = {}
+        self.recent_requests: Deque[Dict[str, Any]] = deque(maxlen=self.max_recent_requests)
+
+
+# Singleton instance
+llm_metrics = LLMMetrics()
@@ -0,0 +1,306 @@
+"""
+Локальное (без LLM) извлечение простых полей из текста объявления.
+
+VIN, год, цена, пробег, мощность и объём двигателя надёжно находятся
+регулярными выражениями, а выпадающие поля с закрытым списком опций
+(топливо, КПП, привод, кузов, цвет) — словарём синонимов OptionMatcher.
+Каждое значение возвращается с оценкой уверенности:
+уверенные результаты подставляются сразу и не требуют вызова LLM.
+"""
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import DYNAMIC_IDS_MAP, LOCAL_EXTRACTION_MIN_CONFIDENCE
+from app.services.option_matcher import option_matcher, MATCH, AMBIGUOUS
+from app.utils.features_helpers import find_option_by_title
+
+
+# Уверенность: значение стоит после явной подписи ("Цена:", "Год:")
+LABELED_CONFIDENCE = 0.95
+# Уверенность: единственное значение в тексте с явными единицами ("км", "€", "л.с.")
+UNIQUE_CONFIDENCE = 0.9
+# Уверенность: единственный год без подписи (годы встречаются и в истории обслуживания)
+UNLABELED_YEAR_CONFIDENCE = 0.8
+# Уверенность: пробег или объём без подписи ("100 км", "6.5 л" бывают
+# скоростью, расходом или запасом хода) — ниже порога, решает LLM
+UNLABELED_MEASURE_CONFIDENCE = 0.8
+# Уверенность: значений несколько, выбрано первое
+AMBIGUOUS_CONFIDENCE = 0.5
+
+VIN_PATTERN = re.compile(r"(?<![A-Z0-9])([A-HJ-NPR-Z0-9]{17})(?![A-Z0-9])")
+VIN_LABEL_PATTERN = re.compile(r"vin\W{0,5}([A-HJ-NPR-Z0-9]{17})(?![A-Z0-9])", re.IGNORECASE)
+
+YEAR_LABEL_PATTERN = re.compile(
+    r"\b(?:год(?:\s+выпуска)?|anul(?:\s+fabricației)?|an|year)\s*[:\-–]\s*((?:19|20)\d{2})\b",
+    re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+# Число с разделителями тысяч или с дробной частью ("2.5 тыс", "2,5k")
+NUMBER = r"(\d{1,3}(?:[  .,]\d{3})+|\d+(?:[.,]\d{1,2})?)"
+# Множитель тысяч — только целым словом: "k" из "km" и "тыс" из "тысXX" не считаются
+THOUSANDS = r"(?:\s*(?:тыс(?:яч[а-я]*)?(?:\.|(?![^\W\d_]))|т\.|k(?![^\W\d_]))\s*)"
+
+PRICE_LABEL_PATTERN = re.compile(
+    rf"(?:цена|стоимость|preț|pret|price)\s*[:\-–]?\s*{NUMBER}({THOUSANDS})?",
+    re.IGNORECASE
+)
+PRICE_PATTERN = re.compile(rf"{NUMBER}({THOUSANDS})?\s*(?:€|eur\b|euro|евро|\$|usd\b)", re.IGNORECASE)
+MONTHLY_PATTERN = re.compile(r"(?:в\s+месяц|/\s*мес|pe\s+lun[ăa]|per\s+month)", re.IGNORECASE)
+
+MILEAGE_LABEL_PATTERN = re.compile(
+    rf"(?:пробег|rulaj|mileage)\s*[:\-–]?\s*{NUMBER}({THOUSANDS})?",
+    re.IGNORECASE
+)
+MILEAGE_PATTERN = re.compile(rf"{NUMBER}({THOUSANDS})?\s*(?:км|km)\b", re.IGNORECASE)
+# Не пробег: скорость ("100 км/ч") и расход на расстояние ("6.5 л на 100 км")
+SPEED_SUFFIX_PATTERN = re.compile(r"\s*(?:/\s*(?:ч|h)\b|в\s+час|pe\s+or[aă])", re.IGNORECASE)
+PER_DISTANCE_PREFIX_PATTERN = re.compile(r"(?:\bна|\bper|\bla|/)\s*$", re.IGNORECASE)
+
+POWER_LABEL_PATTERN = re.compile(
+    r"(?:мощность|putere|power)\s*[:\-–]?\s*(\d{2,4})\s*(л\.?\s*с\.?|hp|cp|квт|kw)?",
+    re.IGNORECASE
+)
+POWER_PATTERN = re.compile(r"(\d{2,4})\s*(л\.?\s*с\.?|hp\b|cp\b|квт|kw\b)", re.IGNORECASE)
+
+ENGINE_LABEL_PATTERN = re.compile(
+    r"(?:объ[её]м(?:\s+двигателя)?|двигатель|motor|capacitate\s+motor|engine)\s*[:\-–]?\s*(\d[.,]\d)",
+    re.IGNORECASE
+)
+ENGINE_PATTERN = re.compile(
+    r"(?<![\d.,])(\d[.,]\d)\s*(?:л\b|l\b|литр|бензин|дизель|гибрид|tdi|tsi|tfsi|hdi|dci|crdi|d\b|i\b)",
+    re.IGNORECASE
+)
+# Не объём: расход топлива ("6.5 л на 100 км", "Расход в городе 8.2 л")
+CONSUMPTION_SUFFIX_PATTERN = re.compile(r"\s*(?:на|/|per|la)\s*100\b", re.IGNORECASE)
+CONSUMPTION_PREFIX_PATTERN = re.compile(
+    r"(?:расход\w*|consum\w*)\W{0,3}(?:[^\W\d_]+\W{1,3}){0,2}$",
+    re.IGNORECASE
+)
+ENGINE_CC_PATTERN = re.compile(r"(\d{3,4})\s*(?:см3|см³|cm3|cc)\b", re.IGNORECASE)
+# Электромобиль: само слово или "электро" после подписи двигателя/топлива
+# ("электро-зеркала" и "электрический люк" — не про двигатель)
+ELECTRIC_PATTERN = re.compile(
+    r"электромобил|\bbev\b|(?:двигатель|мотор|motor|engine|топливо|combustibil|fuel)\s*[:\-–]?\s*(?:электр|electric)",
+    re.IGNORECASE
+)
+
+
+def _to_int(raw: str) -> str:
+    """Убирает разделители тысяч: '7 300' / '7.300' -> '7300'."""
+    return re.sub(r"[  .,]", "", raw)
+
+
+def _to_amount(match: re.Match) -> Optional[str]:
+    """
+    Сумма из совпадения (число, множитель тысяч): '2.5' + 'тыс' -> '2500'.
+
+    Returns:
+        Целое число строкой или None для дробного значения без множителя
+        ("2.5 евро" — скорее опечатка, чем цена)
+    """
+    raw, thousands = match.group(1), match.group(2)
+    if re.fullmatch(r"\d+[.,]\d{1,2}", raw):
+        if not thousands:
+            return None
+        return str(round(float(raw.replace(",", ".")) * 1000))
+    value = int(_to_int(raw))
+    if thousands:
+        value *= 1000
+    return str(value)
+
+
+def _result(label: str, confidence: float, label_id: Optional[str] = None) -> Dict[str, Any]:
+    result = {"label": label, "confidence": confidence}
+    if label_id is not None:
+        result["label_id"] = label_id
+    return result
+
+
+def _pick(candidates: List[str], confidence: float = UNIQUE_CONFIDENCE) -> Optional[Dict[str, Any]]:
+    """Выбирает значение из кандидатов без подписи."""
+    unique = list(dict.fromkeys(candidates))
+    if not unique:
+        return None
+    if len(unique) > 1:
+        confidence = AMBIGUOUS_CONFIDENCE
+    return _result(unique[0], confidence)
+
+
+class LocalExtractor:
+    """Детерминированное извлечение простых полей до вызова LLM."""
+
+    def __init__(self):
+        self._extractors: Dict[str, Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]] = {
+            DYNAMIC_IDS_MAP["vin"]: self.extract_vin,
+            DYNAMIC_IDS_MAP["year"]: self.extract_year,
+            DYNAMIC_IDS_MAP["price"]: self.extract_price,
+            DYNAMIC_IDS_MAP["mileage"]: self.extract_mileage,
+            DYNAMIC_IDS_MAP["power"]: self.extract_power,
+            DYNAMIC_IDS_MAP["engine"]: self.extract_engine,
+        }
+
+    def supports(self, field_id: str) -> bool:
+        """Есть ли локальный извлекатель для поля."""
+        return str(field_id) in self._extractors or option_matcher.supports(field_id)
+
+    def extract_field(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Извлекает значение одного поля.
+
+        Args:
+            text: Текст объявления
+            field: Данные поля (id, title, type, options)
+
+        Returns:
+            {"label": "...", "label_id": "...", "confidence": 0..1} или None
+        """
+        field_id = str(field.get("id", ""))
+        extractor = self._extractors.get(field_id)
+        if not extractor and option_matcher.supports(field_id):
+            extractor = self.extract_option
+        if not extractor or not text:
+            return None
+        try:
+            return extractor(text, field)
+        except Exception as e:
+            print(f"❌ Ошибка локального извлечения поля {field.get('id')}: {str(e)}")
+            return None
+
+    def extract_confident(
+        self,
+        text: str,
+        fields: List[Dict[str, Any]],
+        min_confidence: float = LOCAL_EXTRACTION_MIN_CONFIDENCE
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Извлекает все поддерживаемые поля и оставляет только уверенные.
+
+        Returns:
+            {"field_id": {"label": "...", "label_id": "..."}} — без confidence,
+            в формате результата parse_single_field
+        """
+        results = {}
+        for field in fields:
+            field_id = str(field.get("id", ""))
+            value = self.extract_field(text, field)
+            if not value or value["confidence"] < min_confidence:
+                continue
+            result = {"label": value["label"]}
+            if "label_id" in value:
+                result["label_id"] = value["label_id"]
+            results[field_id] = result
+            print(f"⚡ Локально: {field.get('title', field_id)} = {value['label']} ({value['confidence']:.2f})")
+        return results
+
+    def extract_option(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        matched = option_matcher.match(text, field)
+        if matched["status"] == MATCH:
+            confidence = LABELED_CONFIDENCE if matched["labeled"] else UNIQUE_CONFIDENCE
+            return _result(matched["label"], confidence, matched["label_id"])
+        if matched["status"] == AMBIGUOUS:
+            first = matched["candidates"][0]
+            return _result(first["title"], AMBIGUOUS_CONFIDENCE, first["id"])
+        return None
+
+    def extract_vin(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        labeled = VIN_LABEL_PATTERN.search(text)
+        if labeled:
+            return _result(labeled.group(1).upper(), LABELED_CONFIDENCE)
+        # VIN без подписи: только кандидаты, где есть и буквы, и цифры
+        candidates = [
+            vin for vin in VIN_PATTERN.findall(text.upper())
+            if re.search(r"\d", vin) and re.search(r"[A-Z]", vin)
+        ]
+        return _pick(candidates)
+
+    def extract_year(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        max_year = date.today().year + 1
+        labeled = YEAR_LABEL_PATTERN.search(text)
+        if labeled and 1950 <= int(labeled.group(1)) <= max_year:
+            return _result(labeled.group(1), LABELED_CONFIDENCE)
+        candidates = [year for year in YEAR_PATTERN.findall(text) if 1950 <= int(year) <= max_year]
+        return _pick(candidates, UNLABELED_YEAR_CONFIDENCE)
+
+    def extract_price(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        labeled = PRICE_LABEL_PATTERN.search(text)
+        if labeled and _to_amount(labeled):
+            return _result(_to_amount(labeled), LABELED_CONFIDENCE)
+        # Цены без подписи, кроме ежемесячных платежей
+        candidates = [
+            _to_amount(match)
+            for line in text.splitlines()
+            if not MONTHLY_PATTERN.search(line)
+            for match in PRICE_PATTERN.finditer(line)
+        ]
+        return _pick([price for price in candidates if price])
+
+    def extract_mileage(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        labeled = MILEAGE_LABEL_PATTERN.search(text)
+        if labeled and _to_amount(labeled):
+            return _result(_to_amount(labeled), LABELED_CONFIDENCE)
+        candidates = [
+            _to_amount(match)
+            for match in MILEAGE_PATTERN.finditer(text)
+            if not SPEED_SUFFIX_PATTERN.match(text, match.end())
+            and not PER_DISTANCE_PREFIX_PATTERN.search(text, 0, match.start())
+        ]
+        return _pick([km for km in candidates if km], UNLABELED_MEASURE_CONFIDENCE)
+
+    def extract_power(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def to_hp(value: str, unit: Optional[str]) -> str:
+            if unit and unit.lower() in ("квт", "kw"):
+                return str(round(int(value) * 1.36))
+            return value
+
+        labeled = POWER_LABEL_PATTERN.search(text)
+        if labeled:
+            return _result(to_hp(labeled.group(1), labeled.group(2)), LABELED_CONFIDENCE)
+        candidates = [to_hp(value, unit) for value, unit in POWER_PATTERN.findall(text)]
+        return _pick(candidates)
+
+    def extract_engine(self, text: str, field: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        options = field.get("options") or []
+
+        labeled = ENGINE_LABEL_PATTERN.search(text)
+        if labeled:
+            volume, confidence = labeled.group(1), LABELED_CONFIDENCE
+        else:
+            candidates = [
+                match.group(1)
+                for match in ENGINE_PATTERN.finditer(text)
+                if not CONSUMPTION_SUFFIX_PATTERN.match(text, match.end())
+                and not CONSUMPTION_PREFIX_PATTERN.search(text, 0, match.start())
+            ]
+            if not candidates:
+                candidates = [
+                    f"{round(int(cc) / 1000, 1)}"
+                    for cc in ENGINE_CC_PATTERN.findall(text)
+                    if 600 <= int(cc) <= 8500
+                ]
+            if not candidates and ELECTRIC_PATTERN.search(text):
+                matched = find_option_by_title(options, "Электрический")
+                if matched:
+                    return _result(matched["title"], UNIQUE_CONFIDENCE, matched["id"])
+            picked = _pick([c.replace(",", ".") for c in candidates], UNLABELED_MEASURE_CONFIDENCE)
+            if not picked:
+                return None
+            volume, confidence = picked["label"], picked["confidence"]
+
+        volume = volume.replace(",", ".")
+        matched = next(
+            (
+                {"id": str(opt["id"]), "title": opt.get("title", "")}
+                for opt in options
+                if opt.get("title", "").replace(",", ".").split(" ")[0] == volume
+            ),
+            None
+        )
+        if not matched:
+            return None
+        return _result(matched["title"], confidence, matched["id"])
+
+
+# Singleton instance
+local_extractor = LocalExtractor()
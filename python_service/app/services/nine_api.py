@@ -1,8 +1,20 @@
 """
 Сервис для работы с 999.md API.
+
+Марки отдаются из заранее отсортированного индекса каталога характеристик
+(features_catalog, который фоновая синхронизация держит в актуальном
+состоянии). Модели и поколения берутся из снимка на диске
+(TaxonomyStore), при промахе — из TaxonomyCache.
+Все запросы к 999.md (справочники, загрузка изображений, создание объявлений)
+идут через один асинхронный httpx-клиент с пулом keep-alive соединений
+и заранее собранными заголовками авторизации: TLS-рукопожатие не повторяется
+на каждый запрос, а обработчики не блокируют event loop.
 """
-import requests
-from typing import List, Dict, Any
+import asyncio
+from functools import partial
+from typing import List, Dict, Any, Optional
+
+import httpx
 
 from app.config.settings import (
     CATEGORY_ID,
@@ -10,70 +22,161 @@ from app.config.settings import (
     DEFAULT_OFFER_TYPE,
     FEATURE_MARKA_ID,
     FEATURE_MODEL_ID,
-    BASE_URL_999
+    BASE_URL_999,
+    NINE_HTTP_MAX_CONNECTIONS,
+    NINE_HTTP_MAX_KEEPALIVE,
+    NINE_HTTP_KEEPALIVE_EXPIRY,
+    NINE_HTTP_TIMEOUT,
+    NINE_HTTP_CONNECT_TIMEOUT,
 )
+from app.services.catalog import features_catalog
+from app.services.llm_cassette import CassetteTransport, create_llm_transport
+from app.services.taxonomy_cache import TaxonomyCache, TaxonomyKey, Loader
+from app.services.taxonomy_store import taxonomy_store
 from app.utils.api_helpers import get_api_headers
 
 
+def extract_makes(features_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Марки (характеристика 20) из схемы /features, отсортированные по названию."""
+    for group in features_data.get("features_groups", []):
+        for feature in group.get("features", []):
+            if str(feature.get("id")) == FEATURE_MARKA_ID:
+                options = feature.get("options") or []
+                return sorted(
+                    [{"id": str(opt["id"]), "name": opt["title"]} for opt in options],
+                    key=lambda x: x["name"]
+                )
+    return []
+
+
+class NineAPIError(Exception):
+    """Ошибочный ответ API 999.md."""
+
+
 class NineService:
     """Сервис для работы с API 999.md."""
     
     BASE_URL = BASE_URL_999
+
+    def __init__(self):
+        # Справочники (марки, модели, поколения) — из памяти, 999.md только при промахе
+        self.taxonomy_cache = TaxonomyCache()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Закрытие клиента прошлого event loop (ссылка держит задачу до завершения)
+        self._closing: Optional[asyncio.Task] = None
+        # Запись/воспроизведение ответов 999.md (бенчмарки); None — обычная сеть
+        self.cassette: Optional[CassetteTransport] = None
+        # Отсортированные марки (подкатегория по умолчанию, ru) и версия каталога, из которой они собраны
+        self._makes_index: List[Dict[str, str]] = []
+        self._makes_catalog_hash = ""
+        self._makes_catalog_version = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Общий клиент 999.md (base_url, авторизация, пул соединений).
+        Создаётся при первом обращении в текущем event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._close_stale_client(loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.BASE_URL,
+                headers=get_api_headers(),
+                limits=self._http_limits(),
+                timeout=httpx.Timeout(NINE_HTTP_TIMEOUT, connect=NINE_HTTP_CONNECT_TIMEOUT),
+                transport=self.cassette
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _close_stale_client(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Закрывает клиент, созданный в другом event loop (соединения пула
+        привязаны к своему loop). Если тот loop ещё работает (другой поток),
+        клиент закрывается в нём; если уже остановлен — в текущем loop,
+        насколько возможно (сокеты закрытого loop освобождает сборщик мусора).
+        Штатно клиент закрывается через aclose() до завершения своего loop
+        (lifespan приложения, CLI).
+        """
+        client, client_loop = self._client, self._client_loop
+        if client_loop is not None and client_loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), client_loop)
+            return
+        print("⚠️ Клиент 999.md не закрыт в своём event loop — закрываем при смене loop")
+        self._closing = loop.create_task(self._aclose_quietly(client))
+
+    @staticmethod
+    async def _aclose_quietly(client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Транспорт закрытого event loop: пул помечен закрытым, сокеты уйдут со сборкой мусора
+            pass
+
+    def _http_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=NINE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=NINE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=NINE_HTTP_KEEPALIVE_EXPIRY
+        )
+
+    async def use_backend(self, backend: str, **cassette_options: Any) -> None:
+        """
+        Переключает ответы 999.md на кассеты (бенчмарки без сети).
+
+        Args:
+            backend: "live", "record" или "replay"
+            **cassette_options: directory, latency, seed (см. create_llm_transport)
+        """
+        await self.aclose()
+        self.cassette = create_llm_transport(self._http_limits(), backend, name="999.md", **cassette_options)
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений (при остановке приложения)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
     
-    def get_makes(self, subcat: str = DEFAULT_SUBCATEGORY) -> List[Dict[str, str]]:
+    async def get_makes(self, subcat: str = DEFAULT_SUBCATEGORY, lang: str = "ru") -> List[Dict[str, str]]:
         """
         Получает список марок автомобилей.
         
+        Для подкатегории по умолчанию — из индекса локального каталога
+        (без запроса к 999.md и без сортировки), иначе — из кэша справочников.
+        
         Args:
             subcat: ID подкатегории
+            lang: Язык названий
             
         Returns:
             Список марок [{"id": "...", "name": "..."}]
         """
-        print(f"🔄 Запрос МАРОК (feature_id={FEATURE_MARKA_ID})...")
-        
-        url = f"{self.BASE_URL}/features"
-        params = {
-            "category_id": CATEGORY_ID,
-            "subcategory_id": subcat,
-            "offer_type": DEFAULT_OFFER_TYPE,
-            "lang": "ru"
-        }
-        
-        try:
-            response = requests.get(url, headers=get_api_headers(), params=params)
-            
-            if response.status_code != 200:
-                print(f"Ошибка 999: {response.text}")
-                return []
-
-            data = response.json()
-
-            # Ищем характеристику "Марка" (ID 20)
-            for group in data.get("features_groups", []):
-                for feature in group.get("features", []):
-                    if str(feature["id"]) == FEATURE_MARKA_ID:
-                        options = feature.get("options", [])
-                        result = sorted(
-                            [{"id": str(opt["id"]), "name": opt["title"]} for opt in options],
-                            key=lambda x: x["name"]
-                        )
-                        print(f"✅ Успех: Найдено {len(result)} марок.")
-                        return result
-            
-            return []
+        if subcat == DEFAULT_SUBCATEGORY and lang == "ru":
+            makes = self._get_makes_index()
+            if makes:
+                return [dict(make) for make in makes]
 
-        except Exception as e:
-            print(f"❌ Exception: {str(e)}")
-            return []
+        return await self._get_list(
+            ("makes", subcat, "", lang),
+            partial(self.fetch_makes, subcat, lang)
+        )
 
-    def get_models(self, make_id: str, subcat: str = DEFAULT_SUBCATEGORY) -> List[Dict[str, str]]:
+    async def get_models(
+        self,
+        make_id: str,
+        subcat: str = DEFAULT_SUBCATEGORY,
+        lang: str = "ru"
+    ) -> List[Dict[str, str]]:
         """
-        Получает список моделей для выбранной марки.
+        Получает список моделей для выбранной марки (из кэша справочников).
         
         Args:
             make_id: ID марки
             subcat: ID подкатегории
+            lang: Язык названий
             
         Returns:
             Список моделей [{"id": "...", "name": "..."}]
@@ -81,50 +184,24 @@ class NineService:
         if not make_id or make_id == "undefined":
             return []
 
-        print(f"🚀 ЗАПРОС МОДЕЛЕЙ для марки ID: {make_id}...")
-
-        url = f"{self.BASE_URL}/dependent_options"
-        params = {
-            "subcategory_id": subcat,
-            "dependency_feature_id": FEATURE_MARKA_ID,
-            "parent_option_id": make_id,
-            "lang": "ru"
-        }
+        return await self._get_list(
+            ("models", subcat, str(make_id), lang),
+            partial(self.fetch_dependent_options, FEATURE_MARKA_ID, str(make_id), subcat, lang)
+        )
 
-        try:
-            response = requests.get(url, headers=get_api_headers(), params=params)
-            
-            print(f"🔗 Ссылка: {response.url}")
-            
-            if response.status_code != 200:
-                print(f"📦 Ошибка 999: {response.text}")
-                return []
-
-            data = response.json()
-            options = data.get("Options", [])
-            
-            if not options:
-                print("⚠️ Список моделей пуст.")
-                return data
-
-            result = sorted(
-                [{"id": str(opt["id"]), "name": opt.get("title", opt.get("value", "???"))} for opt in options],
-                key=lambda x: x["name"]
-            )
-            print(f"✅ Успех: Найдено {len(result)} моделей.")
-            return result
-
-        except Exception as e:
-            print(f"❌ CRITICAL ERROR: {str(e)}")
-            return []
-
-    def get_generations(self, model_id: str, subcat: str = DEFAULT_SUBCATEGORY) -> List[Dict[str, str]]:
+    async def get_generations(
+        self,
+        model_id: str,
+        subcat: str = DEFAULT_SUBCATEGORY,
+        lang: str = "ru"
+    ) -> List[Dict[str, str]]:
         """
-        Получает список поколений для выбранной модели.
+        Получает список поколений для выбранной модели (из кэша справочников).
         
         Args:
             model_id: ID модели
             subcat: ID подкатегории
+            lang: Язык названий
             
         Returns:
             Список поколений [{"id": "...", "name": "..."}]
@@ -132,47 +209,111 @@ class NineService:
         if not model_id or model_id == "undefined":
             return []
 
-        print(f"🚀 ЗАПРОС ПОКОЛЕНИЙ. Родитель (Модель): {FEATURE_MODEL_ID}, Значение ID: {model_id}")
+        return await self._get_list(
+            ("generations", subcat, str(model_id), lang),
+            partial(self.fetch_dependent_options, FEATURE_MODEL_ID, str(model_id), subcat, lang)
+        )
+
+    async def _get_list(self, key: TaxonomyKey, fetch: Loader) -> List[Dict[str, str]]:
+        """Список справочника: снимок на диске, затем кэш (и 999.md при промахе)."""
+        stored = taxonomy_store.get(key)
+        if stored is not None:
+            return stored
+        return await self.taxonomy_cache.get(key, fetch)
+
+    def _get_makes_index(self) -> List[Dict[str, str]]:
+        """Индекс марок; пересобирается из каталога, если каталог сменился."""
+        catalog = features_catalog.state
+        if self._makes_catalog_hash != catalog.content_hash or not self._makes_catalog_hash:
+            self._makes_index = extract_makes(catalog.data)
+            self._makes_catalog_hash = catalog.content_hash
+            self._makes_catalog_version = catalog.version
+            print(f"🏷️ Индекс марок из каталога v{catalog.version}: {len(self._makes_index)}")
+        return self._makes_index
 
-        url = f"{self.BASE_URL}/dependent_options"
+    def makes_index_stats(self) -> Dict[str, Any]:
+        """Состояние индекса марок."""
+        return {"size": len(self._makes_index), "catalog_version": self._makes_catalog_version}
+
+    async def fetch_features(self, subcat: str = DEFAULT_SUBCATEGORY, lang: str = "ru") -> Dict[str, Any]:
+        """
+        Запрос схемы характеристик (/features) напрямую у 999.md.
+        Ошибка HTTP пробрасывается.
+        
+        Returns:
+            {"features_groups": [...]}
+        """
         params = {
+            "category_id": CATEGORY_ID,
             "subcategory_id": subcat,
-            "dependency_feature_id": FEATURE_MODEL_ID,
-            "parent_option_id": model_id,
-            "lang": "ru"
+            "offer_type": DEFAULT_OFFER_TYPE,
+            "lang": lang
         }
+        
+        response = await self.client.get("/features", params=params)
+        
+        if response.status_code != 200:
+            raise NineAPIError(f"Ошибка 999 ({response.status_code}): {response.text}")
 
-        try:
-            response = requests.get(url, headers=get_api_headers(), params=params)
-            
-            print(f"🔗 Ссылка: {response.url}")
-            
-            if response.status_code != 200:
-                print(f"📦 Ошибка от 999: {response.text}")
-                return []
-
-            data = response.json()
-            print(f"📦 Ответ 999: {data}")
-
-            # Парсинг ответа (Универсальный)
-            options = []
-            if isinstance(data, list):
-                options = data
-            elif isinstance(data, dict):
-                options = data.get("Options", [])
-
-            result = sorted(
-                [{"id": str(opt["id"]), "name": opt.get("title", opt.get("value", "???"))} for opt in options],
-                key=lambda x: x["name"]
-            )
-            
-            print(f"✅ Успех: Найдено {len(result)} поколений.")
-            return result
+        return response.json()
 
-        except Exception as e:
-            print(f"❌ Python Error: {str(e)}")
+    async def fetch_makes(self, subcat: str, lang: str) -> List[Dict[str, str]]:
+        """Запрос марок напрямую у 999.md; ошибка HTTP пробрасывается (её учитывает кэш или краулер)."""
+        print(f"🔄 Запрос МАРОК (feature_id={FEATURE_MARKA_ID})...")
+        
+        result = extract_makes(await self.fetch_features(subcat, lang))
+        print(f"✅ Успех: Найдено {len(result)} марок.")
+        return result
+
+    async def fetch_dependent_options(
+        self,
+        dependency_feature_id: str,
+        parent_option_id: str,
+        subcat: str,
+        lang: str
+    ) -> List[Dict[str, str]]:
+        """
+        Запрос зависимых опций напрямую у 999.md, минуя снимок и кэш:
+        модели марки (dependency_feature_id=20) или поколения модели (21).
+        Ошибка HTTP пробрасывается (её учитывает кэш или краулер).
+        """
+        kind = "МОДЕЛЕЙ" if dependency_feature_id == FEATURE_MARKA_ID else "ПОКОЛЕНИЙ"
+        print(f"🚀 ЗАПРОС {kind}. Родитель: {dependency_feature_id}, Значение ID: {parent_option_id}")
+
+        params = {
+            "subcategory_id": subcat,
+            "dependency_feature_id": dependency_feature_id,
+            "parent_option_id": parent_option_id,
+            "lang": lang
+        }
+
+        response = await self.client.get("/dependent_options", params=params)
+        
+        print(f"🔗 Ссылка: {response.url}")
+        
+        if response.status_code != 200:
+            raise NineAPIError(f"Ошибка 999 ({response.status_code}): {response.text}")
+
+        data = response.json()
+
+        # Парсинг ответа (Универсальный)
+        options = []
+        if isinstance(data, list):
+            options = data
+        elif isinstance(data, dict):
+            options = data.get("Options", [])
+
+        if not options:
+            print(f"⚠️ Список {kind.lower()} пуст.")
             return []
 
+        result = sorted(
+            [{"id": str(opt["id"]), "name": opt.get("title", opt.get("value", "???"))} for opt in options],
+            key=lambda x: x["name"]
+        )
+        print(f"✅ Успех: Найдено {len(result)} {kind.lower()}.")
+        return result
+
 
 # Singleton instance
 nine_service = NineService()
@@ -0,0 +1,159 @@
+"""
+Локальное сопоставление текста объявления с опциями выпадающих списков.
+
+Тип топлива, КПП, привод, тип кузова и цвет имеют небольшие закрытые
+списки опций. Словарь синонимов (RU/RO/EN) в data/option_synonyms.json
+сопоставляет фразы из текста с опциями каталога без вызова LLM.
+LLM нужен только если совпадений нет или они неоднозначны.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import OPTION_SYNONYMS_FILE_PATH
+
+
+# Результаты сопоставления
+MATCH = "match"
+AMBIGUOUS = "ambiguous"
+NOT_FOUND = "none"
+
+# Транслитерация румынских диакритик и унификация похожих букв
+_CHAR_MAP = str.maketrans({
+    "ё": "е",
+    "ă": "a", "â": "a", "î": "i",
+    "ș": "s", "ş": "s", "ț": "t", "ţ": "t",
+})
+
+
+def normalize_phrase(text: str) -> str:
+    """
+    Нормализует текст для сопоставления: нижний регистр, без диакритик,
+    пунктуация заменена пробелами. Результат обрамлён пробелами,
+    чтобы фразы искались по границам слов.
+    """
+    text = (text or "").lower().translate(_CHAR_MAP)
+    # "4х4" с кириллической "х" -> "4x4"
+    text = re.sub(r"(?<=\d)х(?=\d)", "x", text)
+    text = re.sub(r"[^0-9a-zа-я]+", " ", text)
+    return f" {text.strip()} "
+
+
+def load_option_synonyms() -> Dict[str, Dict[str, Any]]:
+    """Загружает словарь синонимов опций."""
+    try:
+        with open(OPTION_SYNONYMS_FILE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"❌ Файл {OPTION_SYNONYMS_FILE_PATH} не найден")
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"❌ Ошибка парсинга словаря синонимов: {e}")
+        return {}
+
+
+class OptionMatcher:
+    """Сопоставляет текст с опциями выпадающих полей по словарю синонимов."""
+
+    def __init__(self, synonyms: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.synonyms = synonyms if synonyms is not None else load_option_synonyms()
+
+    def supports(self, field_id: str) -> bool:
+        """Есть ли словарь синонимов для поля."""
+        return str(field_id) in self.synonyms
+
+    def match(self, text: str, field: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ищет опцию поля в тексте.
+
+        Совпадения в строках с подписью поля ("КПП: автомат") приоритетнее
+        совпадений в остальном тексте. Для полей с "anywhere": false
+        (привод, цвет) учитываются только строки с подписью, т.к.
+        "передний" или "белый" могут относиться к бамперу или салону.
+        Синонимы из "labeled_options" тоже ищутся только в строках с подписью:
+        "электро" — топливо в "Двигатель: электро", но не в "электро-зеркала".
+
+        Args:
+            text: Текст объявления
+            field: Данные поля (id, options)
+
+        Returns:
+            {"status": "match" | "ambiguous" | "none",
+             "label": "...", "label_id": "...", "labeled": bool,
+             "candidates": [{"id": "...", "title": "..."}]}
+        """
+        config = self.synonyms.get(str(field.get("id", "")))
+        options = field.get("options") or []
+        if not config or not options or not text:
+            return {"status": NOT_FOUND, "candidates": []}
+
+        labels = [normalize_phrase(label) for label in config.get("labels", [])]
+        phrases = self._build_phrases(config.get("options", {}), options)
+        labeled_phrases = phrases
+        if config.get("labeled_options"):
+            labeled_phrases = phrases + self._build_phrases(config["labeled_options"], options)
+            labeled_phrases.sort(key=lambda item: len(item[0]), reverse=True)
+
+        labeled_matches: List[Dict[str, str]] = []
+        other_matches: List[Dict[str, str]] = []
+
+        for line in text.splitlines():
+            normalized = normalize_phrase(line)
+            if not normalized.strip():
+                continue
+            is_labeled = any(label in normalized for label in labels)
+            if not is_labeled and not config.get("anywhere", True):
+                continue
+            found = self._match_line(normalized, labeled_phrases if is_labeled else phrases)
+            (labeled_matches if is_labeled else other_matches).extend(found)
+
+        for matches, labeled in ((labeled_matches, True), (other_matches, False)):
+            unique = list({opt["id"]: opt for opt in matches}.values())
+            if len(unique) == 1:
+                return {
+                    "status": MATCH,
+                    "label": unique[0]["title"],
+                    "label_id": unique[0]["id"],
+                    "labeled": labeled,
+                    "candidates": unique,
+                }
+            if len(unique) > 1:
+                return {"status": AMBIGUOUS, "labeled": labeled, "candidates": unique}
+
+        return {"status": NOT_FOUND, "candidates": []}
+
+    def _build_phrases(self, synonyms_by_title: Dict[str, List[str]], options: List[Dict]) -> List[tuple]:
+        """
+        Собирает пары (нормализованная фраза, опция), длинные фразы первыми.
+        Синонимы опций, которых нет в каталоге, пропускаются.
+        """
+        by_title = {normalize_phrase(opt.get("title", "")): opt for opt in options}
+        phrases = []
+        for title, synonyms in synonyms_by_title.items():
+            option = by_title.get(normalize_phrase(title))
+            if not option:
+                continue
+            option = {"id": str(option["id"]), "title": option.get("title", "")}
+            for phrase in [title, *synonyms]:
+                normalized = normalize_phrase(phrase)
+                if normalized.strip():
+                    phrases.append((normalized, option))
+        phrases.sort(key=lambda item: len(item[0]), reverse=True)
+        return phrases
+
+    def _match_line(self, normalized_line: str, phrases: List[tuple]) -> List[Dict[str, str]]:
+        """
+        Находит опции в строке. Более длинная фраза "забирает" свой фрагмент,
+        поэтому "плагин гибрид" не даёт лишнего совпадения с "гибрид".
+        """
+        line = normalized_line
+        found = []
+        for phrase, option in phrases:
+            if phrase in line:
+                found.append(option)
+                line = line.replace(phrase, " " * len(phrase))
+        return found
+
+
+# Singleton instance
+option_matcher = OptionMatcher()
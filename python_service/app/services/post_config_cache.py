@@ -0,0 +1,119 @@
+"""
+Кэш готовых результатов /api/post-config.
+
+LLM вызывается с temperature=0, поэтому одинаковый текст при одинаковом
+каталоге и наборе промптов даёт одинаковый результат. Ключ кэша — хэш
+нормализованного текста, хэша каталога и отпечатка промптов/словарей.
+"""
+import copy
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.config.settings import POST_CONFIG_CACHE_MAX_SIZE, POST_CONFIG_CACHE_TTL
+from app.services import prompts
+from app.services.option_matcher import option_matcher
+
+
+def normalize_listing_text(text: str) -> str:
+    """
+    Нормализует текст объявления для ключа кэша: Unicode NFC,
+    схлопнутые пробелы внутри строк, без пустых строк по краям.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    lines = [re.sub(r"[ \t ]+", " ", line).strip() for line in text.splitlines()]
+    return "\n".join(lines).strip()
+
+
+def compute_prompts_fingerprint() -> str:
+    """Хэш всех промптов и словаря синонимов, влияющих на результат парсинга."""
+    prompt_set = {
+        name: value
+        for name, value in vars(prompts).items()
+        if name.isupper() and isinstance(value, (str, dict))
+    }
+    payload = json.dumps(
+        {"prompts": prompt_set, "synonyms": option_matcher.synonyms},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PostConfigCache:
+    """LRU-кэш с TTL и счётчиками попаданий."""
+
+    def __init__(self, max_size: int = POST_CONFIG_CACHE_MAX_SIZE, ttl: float = POST_CONFIG_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.prompts_fingerprint = compute_prompts_fingerprint()
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, text: str, catalog_hash: str) -> str:
+        """Ключ кэша для текста объявления и версии каталога."""
+        payload = "\x00".join([normalize_listing_text(text), catalog_hash, self.prompts_fingerprint])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает копию сохранённого результата или None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет копию результата, вытесняя самые старые записи.
+
+        Args:
+            key: Ключ кэша
+            value: Результат post-config
+            ttl: Время жизни записи (по умолчанию self.ttl)
+        """
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Очищает кэш (счётчики сохраняются)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# Singleton instance
+post_config_cache = PostConfigCache()
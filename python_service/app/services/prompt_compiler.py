@@ -0,0 +1,166 @@
+"""
+Скомпилированные промпты парсера полей.
+
+Сообщения для LLM строятся так, чтобы у всех вызовов по одному объявлению
+был одинаковый префикс: общий системный промпт + текст объявления.
+Инструкция конкретного поля (с options) идёт последним сообщением.
+Одинаковый префикс (от 1024 токенов) переиспользуется кэшем промптов
+провайдера, и повторный текст объявления не оплачивается полностью.
+
+Инструкции полей каталога (PROMPTS[...] с названием поля и JSON options)
+и их схемы ответа собираются один раз на загрузку каталога.
+Инструкции для options, загруженных через API (модели, поколения),
+компилируются по запросу и хранятся в ограниченном LRU.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.services.catalog import features_catalog
+from app.services.post_config_cache import normalize_listing_text
+from app.services.prompts import (
+    LISTING_PARSER_SYSTEM_PROMPT,
+    PROMPTS,
+    RESPONSE_SCHEMAS,
+    RESPONSE_SCHEMA_MAX_ENUM,
+    LABEL_ID_SCHEMA,
+    STRING_SCHEMA,
+)
+
+
+# Максимум скомпилированных инструкций для options из API
+DYNAMIC_PROMPTS_MAX_SIZE = 512
+
+
+def build_dropdown_schema(options: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Схема ответа выпадающего поля: label_id ограничен id из options
+    (или пустой строкой). Для очень длинных списков — без enum.
+    """
+    option_ids = list(dict.fromkeys(str(o.get("id")) for o in options))
+    if not option_ids or len(option_ids) >= RESPONSE_SCHEMA_MAX_ENUM:
+        return LABEL_ID_SCHEMA
+    return {
+        **LABEL_ID_SCHEMA,
+        "properties": {
+            "label": STRING_SCHEMA,
+            "label_id": {"type": "string", "enum": ["", *option_ids]},
+        },
+    }
+
+
+def format_options(options: List[Dict[str, Any]]) -> str:
+    """JSON-список options для промпта: [{"id": "...", "title": "..."}]."""
+    return json.dumps(
+        [{"id": str(o.get("id")), "title": o.get("title") or o.get("name", "")} for o in options],
+        ensure_ascii=False
+    )
+
+
+def build_listing_messages(text: str, instruction: str) -> List[BaseMessage]:
+    """
+    Сообщения для вызова по тексту объявления: общий префикс
+    (системный промпт + объявление) и инструкция последней.
+    """
+    return [
+        SystemMessage(content=LISTING_PARSER_SYSTEM_PROMPT),
+        HumanMessage(content=f"ТЕКСТ ОБЪЯВЛЕНИЯ:\n{text}"),
+        HumanMessage(content=instruction),
+    ]
+
+
+def get_listing_cache_key(text: str) -> str:
+    """
+    Ключ prompt_cache_key: вызовы по одному объявлению направляются
+    на один и тот же узел кэша провайдера.
+    """
+    return hashlib.sha256(normalize_listing_text(text).encode("utf-8")).hexdigest()[:32]
+
+
+class CompiledPrompts:
+    """Инструкции и схемы ответа полей, собранные один раз на версию каталога."""
+
+    def __init__(self):
+        self.catalog_hash = ""
+        self._compiled: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        self._dynamic: "OrderedDict[Tuple[str, Tuple[str, ...]], Dict[str, Any]]" = OrderedDict()
+
+    def get_field_prompt(
+        self,
+        field: Dict[str, Any],
+        options: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Скомпилированный промпт поля.
+
+        Args:
+            field: Данные поля (id, title, type)
+            options: Options для промпта (по умолчанию — options поля)
+
+        Returns:
+            {"instruction": "...", "schema_name": "...", "schema": {...} | None}
+        """
+        self._ensure_catalog()
+        if options is None:
+            options = field.get("options") or []
+        key = self._make_key(field, options)
+
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        compiled = self._dynamic.get(key)
+        if compiled is not None:
+            self._dynamic.move_to_end(key)
+            return compiled
+
+        compiled = self._compile(field, options)
+        self._dynamic[key] = compiled
+        while len(self._dynamic) > DYNAMIC_PROMPTS_MAX_SIZE:
+            self._dynamic.popitem(last=False)
+        return compiled
+
+    def _ensure_catalog(self) -> None:
+        """Пересобирает инструкции полей каталога, если каталог сменился."""
+        catalog_data = features_catalog.data
+        if self.catalog_hash == features_catalog.content_hash:
+            return
+
+        compiled = {}
+        for group in catalog_data.get("features_groups", []):
+            for feature in group.get("features", []):
+                options = feature.get("options") or []
+                compiled[self._make_key(feature, options)] = self._compile(feature, options)
+
+        self._compiled = compiled
+        self._dynamic.clear()
+        self.catalog_hash = features_catalog.content_hash
+        print(f"🧱 Промпты полей скомпилированы: {len(compiled)} (каталог {self.catalog_hash[:12]})")
+
+    def _make_key(self, field: Dict[str, Any], options: List[Dict[str, Any]]) -> Tuple[str, Tuple[str, ...]]:
+        field_type = field.get("type", "textbox_text")
+        option_ids = tuple(str(o.get("id")) for o in options) if field_type == "drop_down_options" else ()
+        return f"{field.get('id', '')}:{field_type}:{field.get('title', '')}", option_ids
+
+    def _compile(self, field: Dict[str, Any], options: List[Dict[str, Any]]) -> Dict[str, Any]:
+        field_type = field.get("type", "textbox_text")
+        prompt_template = PROMPTS.get(field_type, PROMPTS["textbox_text"])
+        instruction = prompt_template.format(field_title=field.get("title", "")).strip()
+        schema = None
+
+        if field_type == "drop_down_options" and options:
+            instruction += f"\n\nOPTIONS:\n{format_options(options)}"
+            schema = build_dropdown_schema(options)
+
+        return {
+            "instruction": instruction,
+            "schema_name": field_type if field_type in RESPONSE_SCHEMAS else "textbox_text",
+            "schema": schema,
+        }
+
+
+# Singleton instance
+compiled_prompts = CompiledPrompts()
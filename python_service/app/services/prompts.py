@@ -120,6 +120,48 @@ DESCRIPTION_SUMMARY_PROMPT = """
 """
 
 
+# Промпт для описания одним вызовом: блоки + резюме + трансформация (id=13)
+DESCRIPTION_FUSED_PROMPT = """
+Ты — интеллектуальный помощник для подготовки описаний объявлений о продаже автомобилей.
+
+ТВОЯ ЗАДАЧА:
+За один шаг извлечь из текста объявления информационные блоки, составить краткое резюме
+и преобразовать блоки в красивое описание с разделами состояние, комплектация, преимущества.
+
+ШАГ 1 — БЛОКИ:
+1. "available" (В НАЛИЧИИ ИМЕЕТСЯ) — основная информация об авто (марка, год, объем, КПП, пробег, привод, цена)
+2. "location" (📍Мы находимся) — адрес и контакты
+3. "possible" (ВОЗМОЖЕН) — условия продажи (кредит, обмен и т.д.)
+Извлекай текст блока целиком, без строки-заголовка. Если блока нет — пустая строка.
+
+ШАГ 2 — РЕЗЮМЕ:
+1-2 продающих предложения (максимум 150 символов) о главном преимуществе машины:
+состояние, цена или комплектация. Не перечисляй просто технические характеристики.
+
+ШАГ 3 — ТРАНСФОРМАЦИЯ:
+- "condition" — текст о состоянии
+- "features" — текст комплектации с маркерами
+- "advantages" — текст преимуществ с маркерами
+
+ПРАВИЛА:
+1. Используй ТОЛЬКО информацию из текста объявления
+2. Не добавляй выдуманную информацию
+3. Сохраняй оригинальные названия брендов (Harman/Kardon, BMW и т.д.)
+4. Сохраняй маркеры (▪️, 📍, 🔘) и переносы строк (\\n)
+
+ФОРМАТ ОТВЕТА (только JSON, без markdown):
+{
+  "available": "▪️Марка: BMW X5\\n▪️Год: 2025\\n...",
+  "location": "📍Мы находимся: Bugeac, Pavlova 1A\\n📞 +37379911994",
+  "possible": "▪️ОБМЕН В ОБЕ СТОРОНЫ!!!",
+  "summary": "краткое резюме 1-2 предложения",
+  "condition": "текст о состоянии",
+  "features": "текст комплектации с маркерами",
+  "advantages": "текст преимуществ с маркерами"
+}
+"""
+
+
 # Финальный шаблон описания (добавляется в конец)
 DESCRIPTION_FOOTER_TEMPLATE = """
 
@@ -212,6 +254,18 @@ SPECIFIC_PROMPTS = {
 }
 
 
+# Общий системный промпт для всех вызовов по тексту объявления.
+# Сообщения строятся как: этот промпт → текст объявления → инструкция поля,
+# чтобы общий префикс переиспользовался кэшем промптов провайдера
+LISTING_PARSER_SYSTEM_PROMPT = """
+Ты — интеллектуальный парсер объявлений о продаже автомобилей.
+
+Сначала ты получаешь текст объявления, затем — задание: какое поле извлечь
+или что сформировать, с правилами и форматом ответа.
+Используй только информацию из текста объявления и строго следуй формату ответа из задания.
+""".strip()
+
+
 # Промпты для разных типов полей
 PROMPTS = {
     "drop_down_options": """
@@ -224,6 +278,7 @@ PROMPTS = {
 1. Выбирай ТОЛЬКО из предоставленного списка options
 2. Если точного совпадения нет — ищи похожее значение
 3. Если значение не найдено в тексте или нет подходящего варианта — верни пустые строки
+4. Если значение есть в тексте, но его нет в списке и в списке есть вариант с id "other" — выбери "other"
 
 ФОРМАТ ОТВЕТА (только JSON, без markdown):
 {{"label": "название выбранного варианта", "label_id": "id выбранного варианта"}}
@@ -306,6 +361,28 @@ PROMPTS = {
 """
 }
 
+# Промпт для извлечения всех независимых полей одним вызовом
+COMBINED_FIELDS_PROMPT = """
+Ты — интеллектуальный парсер объявлений о продаже автомобилей.
+
+ТВОЯ ЗАДАЧА:
+Найти в тексте объявления значения сразу для всех полей из списка FIELDS.
+
+ПРАВИЛА:
+1. Для полей с options выбирай ТОЛЬКО из предоставленного списка options этого поля и указывай его id
+2. Для числовых полей (textbox_numeric, textbox_numeric_measurement) верни только число без пробелов, валют и единиц измерения
+3. Для текстовых полей извлеки значение напрямую из текста
+4. Если значение не найдено — верни пустые строки
+5. Если значение есть в тексте, но его нет в options и в options есть вариант с id "other" — выбери "other"
+6. Верни ответ для КАЖДОГО поля из списка, ключ — id поля
+
+ФОРМАТ ОТВЕТА (только JSON, без markdown):
+{
+  "ID поля": {"label": "значение или название варианта", "label_id": "id варианта или пустая строка"}
+}
+"""
+
+
 # Маппинг ID полей на специфичные промпты
 FIELD_SPECIFIC_MAPPING = {
     "13": "description",      # Описание
@@ -343,3 +420,117 @@ GENERATION_DETECTION_PROMPT = """
 
 # Промпт для перевода с русского на румынский
 TRANSLATION_RUSSIAN_TO_ROMANIAN_PROMPT = """Ты — профессиональный переводчик. Переведи текст с русского на румынский. Сохрани форматирование и структуру текста."""
+
+# Промпт для пакетного перевода нескольких полей одним вызовом
+TRANSLATION_BATCH_RUSSIAN_TO_ROMANIAN_PROMPT = """
+Ты — профессиональный переводчик. Переведи с русского на румынский значения всех полей из JSON.
+
+ПРАВИЛА:
+1. Переводи только значения, ключи оставляй без изменений
+2. Сохрани форматирование, переносы строк, эмодзи и маркеры (▪️, 📍)
+3. Не переводи названия брендов, моделей, VIN-коды, телефоны и ссылки
+4. Верни ответ для КАЖДОГО ключа из входного JSON
+
+ФОРМАТ ОТВЕТА (только JSON, без markdown):
+{"ключ": "перевод на румынский"}
+"""
+
+
+# ===== Схемы структурированного ответа (response_format, strict) =====
+# Ответ модели гарантированно соответствует схеме — без markdown и битого JSON.
+# Схемы с динамическими ключами (options, комбинированный парсинг, пакетный
+# перевод) собираются в AIParserService из этих же блоков.
+
+def _object_schema(properties: dict) -> dict:
+    """Строгий JSON-объект: все свойства обязательны, лишние запрещены."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+STRING_SCHEMA = {"type": "string"}
+
+LABEL_SCHEMA = _object_schema({"label": STRING_SCHEMA})
+
+LABEL_ID_SCHEMA = _object_schema({"label": STRING_SCHEMA, "label_id": STRING_SCHEMA})
+
+RESPONSE_SCHEMAS = {
+    # Поля по типу (PROMPTS)
+    "drop_down_options": LABEL_ID_SCHEMA,
+    "textbox_text": LABEL_SCHEMA,
+    "textarea_text": LABEL_SCHEMA,
+    "textbox_numeric": LABEL_SCHEMA,
+    "textbox_numeric_measurement": LABEL_SCHEMA,
+    # Специфичные поля (SPECIFIC_PROMPTS)
+    "description": _object_schema({"car_details": STRING_SCHEMA}),
+    "seo_description": LABEL_SCHEMA,
+    "title": LABEL_SCHEMA,
+    # Описание (id=13)
+    "description_blocks": _object_schema({
+        "available": STRING_SCHEMA,
+        "location": STRING_SCHEMA,
+        "vin": STRING_SCHEMA,
+        "condition": STRING_SCHEMA,
+        "possible": STRING_SCHEMA,
+    }),
+    "description_transformation": _object_schema({
+        "condition": STRING_SCHEMA,
+        "features": STRING_SCHEMA,
+        "advantages": STRING_SCHEMA,
+    }),
+    "description_summary": _object_schema({"summary": STRING_SCHEMA}),
+    "description_fused": _object_schema({
+        "available": STRING_SCHEMA,
+        "location": STRING_SCHEMA,
+        "possible": STRING_SCHEMA,
+        "summary": STRING_SCHEMA,
+        "condition": STRING_SCHEMA,
+        "features": STRING_SCHEMA,
+        "advantages": STRING_SCHEMA,
+    }),
+    # Поколение
+    "generation": LABEL_ID_SCHEMA,
+}
+
+# Максимум enum-значений id в схеме выпадающего поля (ограничение strict-режима)
+RESPONSE_SCHEMA_MAX_ENUM = 500
+
+# Лимиты длины ответа (max_tokens) по ключу схемы
+MAX_OUTPUT_TOKENS = {
+    "drop_down_options": 60,
+    "textbox_text": 100,
+    "textarea_text": 400,
+    "textbox_numeric": 20,
+    "textbox_numeric_measurement": 20,
+    "description": 400,
+    "seo_description": 120,
+    "title": 60,
+    "description_blocks": 1500,
+    "description_transformation": 1200,
+    "description_summary": 150,
+    "description_fused": 2500,
+    "generation": 60,
+}
+
+# Ответы, пересказывающие текст объявления: лимит не меньше доли длины входа
+# (токенов на символ), иначе длинное объявление обрывается посреди JSON
+OUTPUT_TOKENS_PER_INPUT_CHAR = {
+    "description_blocks": 0.5,
+    "description_transformation": 0.6,
+    "description_fused": 0.8,
+}
+
+# Предел любого лимита ответа, в том числе при повторе после обрыва по длине
+MAX_OUTPUT_TOKENS_LIMIT = 16000
+
+# Комбинированный парсинг: лимит на одно поле + запас на структуру ответа
+COMBINED_MAX_TOKENS_PER_FIELD = 40
+COMBINED_MAX_TOKENS_BASE = 50
+
+# Пакетный перевод: лимит пропорционален длине исходного текста (токенов на символ)
+TRANSLATION_MAX_TOKENS_PER_CHAR = 0.6
+TRANSLATION_MAX_TOKENS_BASE = 100
+TRANSLATION_MAX_TOKENS_LIMIT = MAX_OUTPUT_TOKENS_LIMIT
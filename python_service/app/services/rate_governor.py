@@ -0,0 +1,226 @@
+"""
+Общий для процесса ограничитель частоты вызовов LLM.
+
+Два token bucket — запросы в минуту (RPM) и токены в минуту (TPM) —
+держат поток вызовов на уровне лимитов провайдера, вместо того чтобы
+получать 429 и пустые значения полей. Вызовы, которым не хватает
+лимита, ждут в очереди с приоритетами: интерактивные запросы
+(post-config, create-advert) обслуживаются раньше пакетной обработки.
+Длина очереди ограничена: при переполнении новые запросы получают
+429 с Retry-After ещё до начала парсинга, а вызовы уже принятых
+запросов, не поместившиеся в очередь, отклоняются (LLMQueueFullError).
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config.settings import LLM_RATE_LIMIT_RPM, LLM_RATE_LIMIT_TPM, LLM_QUEUE_MAX_SIZE
+
+
+# Приоритеты очереди (меньше — раньше)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+
+_current_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_INTERACTIVE)
+
+
+class LLMQueueFullError(Exception):
+    """Очередь ограничителя заполнена — вызов LLM отклонён."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Очередь LLM заполнена, повторите через {retry_after}с")
+        self.retry_after = retry_after
+
+
+class LLMRateGovernor:
+    """Token bucket по RPM/TPM с приоритетной очередью ожидания."""
+
+    def __init__(
+        self,
+        rpm: int = LLM_RATE_LIMIT_RPM,
+        tpm: int = LLM_RATE_LIMIT_TPM,
+        max_queue: int = LLM_QUEUE_MAX_SIZE
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_queue = max_queue
+        self._available_requests = float(rpm)
+        self._available_tokens = float(tpm)
+        self._updated_at = time.monotonic()
+        self._waiters: List[Tuple[int, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._pump_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.granted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 or self.tpm > 0
+
+    @contextmanager
+    def priority_scope(self, priority: int) -> Iterator[None]:
+        """Задаёт приоритет вызовов LLM внутри блока (и в дочерних задачах)."""
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    def queue_size(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    def is_saturated(self) -> bool:
+        """Очередь ожидания заполнена — новые запросы нужно отклонять."""
+        return self.enabled and self.queue_size() >= self.max_queue
+
+    def retry_after(self) -> int:
+        """Оценка (сек), через сколько очередь освободится настолько, чтобы принять запрос."""
+        if self.rpm <= 0:
+            return 1
+        excess = self.queue_size() - self.max_queue + 1
+        return max(1, math.ceil(excess * 60 / self.rpm))
+
+    def reject(self) -> None:
+        """Учитывает отклонённый запрос (для статистики)."""
+        self.rejected += 1
+
+    async def acquire(self, tokens: int, priority: Optional[int] = None) -> None:
+        """
+        Ждёт, пока лимиты позволят вызов с оценкой tokens токенов.
+
+        Args:
+            tokens: Оценка токенов вызова (вход + максимум выхода)
+            priority: Приоритет (по умолчанию — из priority_scope)
+
+        Raises:
+            LLMQueueFullError: В очереди уже max_queue ожидающих вызовов
+        """
+        if not self.enabled:
+            return
+
+        priority = _current_priority.get() if priority is None else priority
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else tokens
+
+        if not self._waiters and self._wait_time(tokens) == 0:
+            self._consume(tokens)
+            return
+
+        if self.queue_size() >= self.max_queue:
+            self.reject()
+            raise LLMQueueFullError(self.retry_after())
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self.queued += 1
+        self._ensure_pump(loop)
+
+        started = time.monotonic()
+        await future
+        self.wait_total += time.monotonic() - started
+
+    def try_acquire(self, tokens: int) -> bool:
+        """
+        Забирает лимит, только если он есть сразу и очередь пуста.
+        Используется для необязательных вызовов (дубликаты хеджирования),
+        которые не должны вставать в очередь.
+        """
+        if not self.enabled:
+            return True
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else tokens
+        if self.queue_size() or self._wait_time(tokens) > 0:
+            return False
+        self._consume(tokens)
+        return True
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Корректирует TPM-бюджет по фактическому расходу токенов после ответа."""
+        if self.tpm <= 0 or not actual_tokens:
+            return
+        self._available_tokens = min(
+            float(self.tpm),
+            self._available_tokens + estimated_tokens - actual_tokens
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние ограничителя."""
+        self._refill()
+        return {
+            "enabled": self.enabled,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "available_requests": round(self._available_requests, 2),
+            "available_tokens": round(self._available_tokens),
+            "queue_size": self.queue_size(),
+            "max_queue": self.max_queue,
+            "granted": self.granted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "wait_total": round(self.wait_total, 3),
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.rpm > 0:
+            self._available_requests = min(float(self.rpm), self._available_requests + elapsed * self.rpm / 60)
+        if self.tpm > 0:
+            self._available_tokens = min(float(self.tpm), self._available_tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, tokens: int) -> float:
+        """Сколько секунд ждать, пока в обоих bucket хватит лимита."""
+        self._refill()
+        wait = 0.0
+        if self.rpm > 0 and self._available_requests < 1:
+            wait = max(wait, (1 - self._available_requests) * 60 / self.rpm)
+        if self.tpm > 0 and self._available_tokens < tokens:
+            wait = max(wait, (tokens - self._available_tokens) * 60 / self.tpm)
+        return wait
+
+    def _consume(self, tokens: int) -> None:
+        if self.rpm > 0:
+            self._available_requests -= 1
+        if self.tpm > 0:
+            self._available_tokens -= tokens
+        self.granted += 1
+
+    def _ensure_pump(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Запускает раздачу лимита ожидающим (одна задача на event loop)."""
+        if self._pump_loop is not loop:
+            # Ожидающие из другого (закрытого) event loop уже не дождутся ответа
+            self._waiters = [waiter for waiter in self._waiters if waiter[3].get_loop() is loop]
+            heapq.heapify(self._waiters)
+            self._pump_task = None
+            self._pump_loop = loop
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = loop.create_task(self._pump())
+
+    async def _pump(self) -> None:
+        """Выдаёт лимит ожидающим в порядке приоритета."""
+        while self._waiters:
+            priority, sequence, tokens, future = self._waiters[0]
+            if future.done():
+                # Вызов отменён, пока ждал в очереди
+                heapq.heappop(self._waiters)
+                continue
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                # После паузы голова очереди перечитывается: мог прийти более приоритетный вызов
+                await asyncio.sleep(wait)
+                continue
+            heapq.heappop(self._waiters)
+            self._consume(tokens)
+            future.set_result(None)
+
+
+# Singleton instance
+llm_governor = LLMRateGovernor()
@@ -0,0 +1,152 @@
+"""
+Кэш справочников 999.md (марки, модели, поколения).
+
+Справочники меняются редко, поэтому ответы хранятся в памяти:
+- свежая запись (моложе TTL) отдаётся сразу;
+- устаревшая (в пределах stale-окна) тоже отдаётся сразу, а в фоне
+  запускается обновление (stale-while-revalidate);
+- одновременные промахи по одному ключу объединяются в один запрос
+  к 999.md (single-flight);
+- пустые ответы и ошибки кэшируются ненадолго, чтобы не долбить API,
+  а ошибка обновления не затирает ранее полученный список.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config.settings import (
+    TAXONOMY_CACHE_MAX_SIZE,
+    TAXONOMY_CACHE_TTL,
+    TAXONOMY_CACHE_STALE_TTL,
+    TAXONOMY_CACHE_NEGATIVE_TTL,
+)
+
+
+# (эндпоинт, подкатегория, ID родителя, язык)
+TaxonomyKey = Tuple[str, str, str, str]
+Loader = Callable[[], Awaitable[List[Dict[str, str]]]]
+
+
+class TaxonomyCache:
+    """LRU-кэш справочников с TTL, stale-while-revalidate и single-flight."""
+
+    def __init__(
+        self,
+        max_size: int = TAXONOMY_CACHE_MAX_SIZE,
+        ttl: float = TAXONOMY_CACHE_TTL,
+        stale_ttl: float = TAXONOMY_CACHE_STALE_TTL,
+        negative_ttl: float = TAXONOMY_CACHE_NEGATIVE_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        # key -> (свежо до, можно отдавать до, список)
+        self._entries: "OrderedDict[TaxonomyKey, Tuple[float, float, List[Dict[str, str]]]]" = OrderedDict()
+        self._inflight: Dict[TaxonomyKey, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, key: TaxonomyKey, loader: Loader) -> List[Dict[str, str]]:
+        """
+        Список из кэша или от loader.
+
+        Args:
+            key: (эндпоинт, подкатегория, ID родителя, язык)
+            loader: Запрос к 999.md; исключение считается ошибкой
+
+        Returns:
+            Копия списка (пустой список при ошибке без сохранённых данных)
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            fresh_until, stale_until, value = entry
+            if now < fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(value)
+            if now < stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start_load(key, loader)
+                return self._copy(value)
+
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            self._start_load(key, loader)
+        # shield: отмена одного ожидающего не отменяет общий запрос
+        return self._copy(await asyncio.shield(self._inflight[key]))
+
+    def clear(self) -> None:
+        """Очищает кэш (счётчики сохраняются)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша."""
+        total = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "negative_ttl": self.negative_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "inflight": len(self._inflight),
+            "hit_rate": round((self.hits + self.stale_hits) / total, 4) if total else 0.0,
+        }
+
+    def _start_load(self, key: TaxonomyKey, loader: Loader) -> None:
+        task = asyncio.get_running_loop().create_task(self._load(key, loader))
+        self._inflight[key] = task
+
+    async def _load(self, key: TaxonomyKey, loader: Loader) -> List[Dict[str, str]]:
+        try:
+            value = await loader()
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Ошибка справочника 999.md {key}: {str(e)}")
+            previous = self._entries.get(key)
+            if previous is not None and previous[2]:
+                # Ошибка обновления: продолжаем отдавать прежний список, повтор — не раньше negative_ttl
+                value = previous[2]
+                self._store(key, value, self.negative_ttl, max(previous[1] - time.monotonic(), self.negative_ttl))
+                return value
+            value = []
+        else:
+            value = value or []
+        finally:
+            self._inflight.pop(key, None)
+
+        if value:
+            self._store(key, value, self.ttl, self.ttl + self.stale_ttl)
+        else:
+            self._store(key, value, self.negative_ttl, self.negative_ttl)
+        return value
+
+    def _store(self, key: TaxonomyKey, value: List[Dict[str, str]], fresh_for: float, keep_for: float) -> None:
+        if self.max_size <= 0:
+            return
+        now = time.monotonic()
+        self._entries[key] = (now + fresh_for, now + keep_for, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _copy(value: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        return [dict(item) for item in value]
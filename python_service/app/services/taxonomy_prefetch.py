@@ -0,0 +1,106 @@
+"""
+Спекулятивная предзагрузка зависимых списков (модели, поколения) 999.md.
+
+Список моделей начинает загружаться сразу, как только определена марка,
+а для наиболее вероятных моделей заранее запрашиваются поколения.
+Так запросы к 999.md уходят с критического пути /api/post-config.
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+from app.config.settings import GENERATION_PREFETCH_CANDIDATES, GENERATION_PREFETCH_MIN_SCORE
+from app.services.nine_api import nine_service
+from app.utils.features_helpers import rank_options_by_text
+
+
+class TaxonomyPrefetcher:
+    """
+    Предзагрузка моделей и поколений в рамках одного запроса.
+    
+    Несколько предзагрузчиков могут разделять загрузки общего родителя
+    (shared) — тогда одинаковые марки и модели в пакете объявлений
+    запрашиваются у 999.md один раз.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        candidates: int = GENERATION_PREFETCH_CANDIDATES,
+        shared: Optional["TaxonomyPrefetcher"] = None
+    ):
+        self.text = text or ""
+        self.candidates = candidates
+        self._models: Dict[str, asyncio.Task] = shared._models if shared else {}
+        self._generations: Dict[str, asyncio.Task] = shared._generations if shared else {}
+        self._owns_loads = shared is None
+        self._ranked_makes = set()
+        self._own_tasks: List[asyncio.Task] = []
+
+    def prefetch_models(self, make_id: str) -> None:
+        """Запускает фоновую загрузку моделей марки (если ещё не запущена)."""
+        if not make_id:
+            return
+        if make_id not in self._models:
+            print(f"⚡ Предзагрузка моделей для марки ID={make_id}")
+            self._models[make_id] = asyncio.create_task(
+                self._load_list(nine_service.get_models, make_id)
+            )
+        # Поколения запрашиваем для моделей, которые упоминаются в тексте
+        if self.candidates > 0 and make_id not in self._ranked_makes:
+            self._ranked_makes.add(make_id)
+            self._own_tasks.append(asyncio.create_task(self._prefetch_candidates(make_id)))
+
+    def prefetch_generations(self, model_id: str) -> None:
+        """Запускает фоновую загрузку поколений модели (если ещё не запущена)."""
+        if not model_id or model_id in self._generations:
+            return
+        print(f"⚡ Предзагрузка поколений для модели ID={model_id}")
+        self._generations[model_id] = asyncio.create_task(
+            self._load_list(nine_service.get_generations, model_id)
+        )
+
+    async def get_models(self, make_id: str) -> List[Dict[str, str]]:
+        """Возвращает модели марки, дожидаясь предзагрузки."""
+        self.prefetch_models(make_id)
+        # shield: отмена одного ожидающего (отключение клиента) не отменяет
+        # загрузку, которую ждут другие объявления пакета
+        return await asyncio.shield(self._models[make_id])
+
+    async def get_generations(self, model_id: str) -> List[Dict[str, str]]:
+        """Возвращает поколения модели, дожидаясь предзагрузки."""
+        self.prefetch_generations(model_id)
+        return await asyncio.shield(self._generations[model_id])
+
+    async def close(self) -> None:
+        """
+        Отменяет невостребованные предзагрузки.
+        Общие загрузки отменяет только их владелец.
+        """
+        tasks = list(self._own_tasks)
+        if self._owns_loads:
+            tasks += [*self._models.values(), *self._generations.values()]
+        tasks = [task for task in tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _prefetch_candidates(self, make_id: str) -> None:
+        models = await asyncio.shield(self._models[make_id])
+        if not models:
+            return
+        ranked = rank_options_by_text(
+            self.text,
+            [{"id": m["id"], "title": m["name"]} for m in models],
+            limit=self.candidates,
+            min_score=GENERATION_PREFETCH_MIN_SCORE
+        )
+        for option in ranked:
+            self.prefetch_generations(option["id"])
+
+    async def _load_list(self, loader, parent_id: str) -> List[Dict[str, str]]:
+        try:
+            result = await loader(parent_id)
+        except Exception as e:
+            print(f"❌ Ошибка предзагрузки для ID={parent_id}: {str(e)}")
+            return []
+        return result
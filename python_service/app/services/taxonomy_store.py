@@ -0,0 +1,174 @@
+"""
+Снимок справочников 999.md на диске (SQLite).
+
+Краулер (python -m app.cli.crawl_taxonomy) обходит марки → модели → поколения
+и записывает списки в файл SQLite: одна строка на список, ключ —
+(эндпоинт, подкатегория, ID родителя, язык). NineService сначала ищет список
+в снимке (без сети), и только при промахе идёт в кэш/999.md.
+
+Снимок записывается во временный файл и подменяется целиком (os.replace);
+читатель замечает новый файл по inode/mtime и переоткрывает соединение.
+"""
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config.settings import TAXONOMY_STORE_PATH
+
+
+# (эндпоинт, подкатегория, ID родителя, язык)
+TaxonomyKey = Tuple[str, str, str, str]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lists (
+    kind TEXT NOT NULL,
+    subcat TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    items TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, subcat, parent_id, lang)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class TaxonomyStore:
+    """Чтение и атомарная запись снимка справочников."""
+
+    def __init__(self, path: str = TAXONOMY_STORE_PATH):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: TaxonomyKey) -> Optional[List[Dict[str, str]]]:
+        """
+        Список из снимка.
+
+        Returns:
+            Список (возможно пустой — у родителя нет опций) или None, если
+            снимка нет или ключ в нём не найден
+        """
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT items FROM lists WHERE kind = ? AND subcat = ? AND parent_id = ? AND lang = ?",
+                key
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"❌ Ошибка чтения снимка справочников: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def write_snapshot(
+        self,
+        rows: Iterable[Tuple[TaxonomyKey, List[Dict[str, str]]]],
+        meta: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Записывает новый снимок целиком и атомарно подменяет файл.
+
+        Args:
+            rows: Пары (ключ, список)
+            meta: Сведения об обходе (время, подкатегория и т.п.)
+
+        Returns:
+            Количество записанных списков
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        fetched_at = time.time()
+        connection = sqlite3.connect(tmp_path)
+        try:
+            connection.executescript(SCHEMA)
+            count = 0
+            for key, items in rows:
+                connection.execute(
+                    "INSERT OR REPLACE INTO lists VALUES (?, ?, ?, ?, ?, ?)",
+                    (*key, json.dumps(items, ensure_ascii=False, separators=(",", ":")), fetched_at)
+                )
+                count += 1
+            meta = {**(meta or {}), "created_at": fetched_at, "lists": count}
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [(name, json.dumps(value, ensure_ascii=False)) for name, value in meta.items()]
+            )
+            connection.commit()
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+        os.replace(tmp_path, self.path)
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние снимка и счётчики обращений."""
+        connection = self._connect()
+        meta: Dict[str, Any] = {}
+        if connection is not None:
+            try:
+                meta = {
+                    name: json.loads(value)
+                    for name, value in connection.execute("SELECT key, value FROM meta")
+                }
+            except sqlite3.Error:
+                pass
+        return {
+            "path": self.path,
+            "available": connection is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            **meta,
+        }
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Соединение только для чтения; переоткрывается, если файл подменили."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._close()
+            return None
+
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if self._connection is None or self._file_id != file_id:
+            self._close()
+            try:
+                self._connection = sqlite3.connect(
+                    f"file:{self.path}?mode=ro",
+                    uri=True,
+                    check_same_thread=False
+                )
+            except sqlite3.Error as e:
+                print(f"❌ Не удалось открыть снимок справочников: {e}")
+                return None
+            self._file_id = file_id
+            print(f"🗄️ Снимок справочников открыт: {self.path}")
+        return self._connection
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
+        self._file_id = None
+
+
+# Singleton instance
+taxonomy_store = TaxonomyStore()
@@ -6,6 +6,7 @@ from app.utils.features_helpers import (
     load_features_json,
     find_option_by_id,
     find_option_by_title,
+    rank_options_by_text,
     build_ai_request,
     process_feature,
 )
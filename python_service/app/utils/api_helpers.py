@@ -2,12 +2,15 @@
 Вспомогательные функции для работы с API.
 """
 import base64
+from typing import Any, Dict
+from fastapi import HTTPException
 from app.config.settings import NINE_API_KEY
+from app.services.rate_governor import llm_governor
 
 
-def get_api_headers() -> dict:
+def build_api_headers() -> dict:
     """
-    Получить заголовки для авторизации в API 999.md.
+    Собирает заголовки авторизации в API 999.md (Basic, ключ без пароля).
     
     Returns:
         Словарь с заголовками для HTTP запросов
@@ -23,3 +26,52 @@ def get_api_headers() -> dict:
         "Authorization": f"Basic {encoded}",
         "Accept": "application/json"
     }
+
+
+# Ключ не меняется за время работы процесса — заголовки собираются один раз
+API_HEADERS = build_api_headers()
+
+
+def get_api_headers() -> dict:
+    """
+    Получить заголовки для авторизации в API 999.md.
+    
+    Returns:
+        Копия заранее собранных заголовков
+    """
+    return dict(API_HEADERS)
+
+
+def raise_llm_queue_full() -> None:
+    """Отвечает 429 с Retry-After по текущей длине очереди ограничителя."""
+    retry_after = llm_governor.retry_after()
+    print(f"⛔ Очередь LLM заполнена ({llm_governor.queue_size()}), Retry-After: {retry_after}с")
+    raise HTTPException(
+        status_code=429,
+        detail="Слишком много запросов к AI, повторите позже",
+        headers={"Retry-After": str(retry_after)}
+    )
+
+
+def require_llm_capacity() -> None:
+    """
+    Проверка для эндпоинтов, вызывающих LLM: при переполненной очереди
+    ограничителя запрос сразу получает 429 с Retry-After.
+    Подключается как зависимость FastAPI или вызывается из обработчика
+    после проверки кэша (попадания в кэш LLM не нагружают).
+    """
+    if llm_governor.is_saturated():
+        llm_governor.reject()
+        raise_llm_queue_full()
+
+
+def require_no_llm_rejections(failures: Dict[str, Any]) -> None:
+    """
+    Принятый запрос, часть вызовов LLM которого отклонила заполненная
+    очередь, получает 429 вместо результата с пустыми полями.
+    
+    Args:
+        failures: Счётчик из llm_metrics.track_failures()
+    """
+    if failures["rejected"]:
+        raise_llm_queue_full()
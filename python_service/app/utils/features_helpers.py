@@ -3,6 +3,7 @@
 """
 import json
 import os
+import re
 from typing import Optional, Dict, Any, List
 from app.config.settings import STATIC_DEFAULTS, DYNAMIC_IDS_MAP
 
@@ -54,6 +55,70 @@ def find_option_by_title(options: list, title: str) -> Optional[dict]:
     return None
 
 
+def _tokenize(text: str) -> set:
+    """Разбивает текст на нормализованные токены (буквы и цифры)."""
+    return set(re.findall(r"[0-9a-zа-яё]+", (text or "").lower()))
+
+
+def _char_ngrams(tokens: set, n: int = 3) -> set:
+    """Символьные n-граммы токенов (с границами слова), устойчивы к опечаткам."""
+    ngrams = set()
+    for token in tokens:
+        padded = f" {token} "
+        ngrams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return ngrams
+
+
+def rank_options_by_text(
+    text: str,
+    options: list,
+    limit: int = 5,
+    min_score: float = 0.0
+) -> List[dict]:
+    """
+    Ранжирует опции по совпадению с текстом объявления.
+    
+    Балл опции складывается из:
+    - доли её токенов, найденных в тексте;
+    - половины доли её символьных триграмм, найденных в тексте
+      (ловит опечатки и слитное/раздельное написание);
+    - бонуса 1, если название целиком встречается в тексте.
+    Опции с баллом не выше min_score не возвращаются.
+    
+    Args:
+        text: Текст объявления
+        options: Список опций [{"id": "...", "title": "..."}]
+        limit: Максимальное количество опций
+        min_score: Минимальный балл опции
+    
+    Returns:
+        Опции, отсортированные по убыванию релевантности
+    """
+    if not text or not options:
+        return []
+    
+    text_lower = text.lower()
+    text_tokens = _tokenize(text_lower)
+    text_ngrams = _char_ngrams(text_tokens)
+    scored = []
+    
+    for opt in options:
+        title = str(opt.get("title") or opt.get("name") or "")
+        title_tokens = _tokenize(title)
+        if not title_tokens:
+            continue
+        title_ngrams = _char_ngrams(title_tokens)
+        score = len(title_tokens & text_tokens) / len(title_tokens)
+        score += 0.5 * len(title_ngrams & text_ngrams) / len(title_ngrams)
+        if title.lower().strip() and title.lower().strip() in text_lower:
+            score += 1
+        if score > min_score:
+            scored.append((score, opt))
+    
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [opt for _, opt in scored[:limit]]
+
+
 def build_ai_request(features_data: dict) -> dict:
     """
     Формирует запрос для AI парсера только с динамическими полями.
@@ -0,0 +1,57 @@
+"""
+Общие фикстуры тестов.
+
+Тесты покрывают детерминированную логику сервисов и не ходят в сеть:
+ключ OpenAI нужен только для создания клиентов при импорте app.services.
+"""
+import importlib
+import os
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.services.catalog import features_catalog  # noqa: E402
+
+
+@pytest.fixture
+def catalog_field():
+    """Поле каталога по ID (копия с опциями)."""
+    def get(field_id: str) -> Dict[str, Any]:
+        for group in features_catalog.data.get("features_groups", []):
+            for feature in group.get("features", []):
+                if str(feature.get("id")) == str(field_id):
+                    return dict(feature)
+        raise KeyError(field_id)
+    return get
+
+
+@pytest.fixture(scope="session")
+def posts_router():
+    """Модуль app.api.posts_router (app.api экспортирует одноимённый APIRouter)."""
+    return importlib.import_module("app.api.posts_router")
+
+
+class FakeClock:
+    """Ручные часы вместо time.monotonic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """
+    Подменяет time в указанном модуле часами FakeClock.
+    Глобальный time.monotonic (часы event loop) не трогается.
+    """
+    def install(module) -> FakeClock:
+        clock = FakeClock()
+        monkeypatch.setattr(module, "time", SimpleNamespace(monotonic=clock))
+        return clock
+    return install
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.config.settings import DEPENDENT_FIELDS, DYNAMIC_IDS_MAP, FEATURE_MARKA_ID, STATIC_DEFAULTS
+from app.services.ai_parser import ai_parser_service
+from app.services.prompts import FIELD_SPECIFIC_MAPPING
+
+GEARBOX = {
+    "id": "101",
+    "title": "КПП",
+    "type": "drop_down_options",
+    "options": [{"id": "4", "title": "Автомат"}, {"id": "5", "title": "Механика"}],
+}
+MILEAGE = {"id": DYNAMIC_IDS_MAP["mileage"], "title": "Пробег", "type": "textbox_numeric_measurement"}
+VIN = {"id": DYNAMIC_IDS_MAP["vin"], "title": "VIN-код", "type": "textbox_text"}
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    (GEARBOX, {"label": "Автомат", "label_id": "4"}, {"label": "Автомат", "label_id": "4"}),
+    (GEARBOX, {"label": "механика", "label_id": ""}, {"label": "Механика", "label_id": "5"}),
+    (GEARBOX, {"label": "Вариатор", "label_id": "99"}, None),
+    (MILEAGE, {"label": "95 000"}, {"label": "95000"}),
+    (MILEAGE, {"label": "около ста тысяч"}, None),
+    (VIN, {"label": " WVWZZZ1KZAW123456 "}, {"label": "WVWZZZ1KZAW123456"}),
+    (VIN, {"label": "", "label_id": ""}, None),
+    (VIN, "WVWZZZ1KZAW123456", None),
+])
+def test_validate_field_value(field, value, expected):
+    assert ai_parser_service._validate_field_value(field, value) == expected
+
+
+def test_combined_fields_are_independent_dynamic_fields(posts_router):
+    all_features = [
+        {"id": feature_id, "title": feature_id, "type": "textbox_text"}
+        for feature_id in {*DYNAMIC_IDS_MAP.values(), *STATIC_DEFAULTS, *DEPENDENT_FIELDS, "999999"}
+    ]
+    combined_ids = {field["id"] for field in posts_router.get_combined_fields(all_features)}
+    assert combined_ids
+    assert combined_ids <= set(DYNAMIC_IDS_MAP.values())
+    assert not combined_ids & (set(STATIC_DEFAULTS) | set(DEPENDENT_FIELDS) | set(FIELD_SPECIFIC_MAPPING))
+
+    excluded = posts_router.get_combined_fields(all_features, exclude={FEATURE_MARKA_ID})
+    assert FEATURE_MARKA_ID not in {field["id"] for field in excluded}
+
+
+def test_parse_fields_combined_keeps_only_valid_values(monkeypatch):
+    async def fake_complete_json(messages, schema_name, schema=None, **kwargs):
+        assert set(schema["required"]) == {"101", MILEAGE["id"], VIN["id"]}
+        return {
+            "101": {"label": "Автомат", "label_id": "4"},
+            MILEAGE["id"]: {"label": "неизвестно", "label_id": ""},
+            VIN["id"]: {"label": "", "label_id": ""},
+        }
+
+    monkeypatch.setattr(ai_parser_service, "_acomplete_json", fake_complete_json)
+    results = asyncio.run(ai_parser_service.parse_fields_combined("КПП: автомат", [GEARBOX, MILEAGE, VIN]))
+    assert results == {"101": {"label": "Автомат", "label_id": "4"}}
+
+
+def test_parse_fields_combined_failure_falls_back_to_single_fields(monkeypatch):
+    async def failing_complete_json(*args, **kwargs):
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(ai_parser_service, "_acomplete_json", failing_complete_json)
+    assert asyncio.run(ai_parser_service.parse_fields_combined("текст", [GEARBOX])) == {}
@@ -0,0 +1,43 @@
+from app.utils.features_helpers import find_option_by_title, rank_options_by_text
+
+
+MODELS = [
+    {"id": "1", "title": "Camry"},
+    {"id": "2", "title": "Corolla"},
+    {"id": "3", "title": "Land Cruiser Prado"},
+    {"id": "4", "title": "RAV4"},
+]
+
+
+def test_exact_title_ranks_first():
+    ranked = rank_options_by_text("Продаю Toyota Corolla 2015", MODELS, limit=2)
+    assert ranked[0]["id"] == "2"
+
+
+def test_partial_tokens_and_typos():
+    assert rank_options_by_text("Toyota Land Cruiser 200", MODELS, limit=1)[0]["id"] == "3"
+    assert rank_options_by_text("тойота камри, camri 2.5", MODELS + [{"id": "5", "title": "Camri"}], limit=1)[0]["id"] == "5"
+    assert rank_options_by_text("Toyota Camri 2.5", MODELS, limit=1)[0]["id"] == "1"
+
+
+def test_min_score_filters_weak_matches():
+    # Общие триграммы без совпадения токенов дают балл ниже 0.5
+    assert rank_options_by_text("Toyota Camri 2.5", MODELS, limit=5, min_score=0.5) == []
+    assert [o["id"] for o in rank_options_by_text("Toyota RAV4", MODELS, min_score=0.5)] == ["4"]
+
+
+def test_limit_and_empty_input():
+    assert len(rank_options_by_text("Camry Corolla RAV4 Prado", MODELS, limit=2)) == 2
+    assert rank_options_by_text("", MODELS) == []
+    assert rank_options_by_text("Camry", []) == []
+
+
+def test_name_key_is_supported():
+    options = [{"id": "7", "name": "XV70 (2017 - 2024)"}]
+    assert rank_options_by_text("Camry XV70", options)[0]["id"] == "7"
+
+
+def test_find_option_by_title():
+    assert find_option_by_title(MODELS, "camry") == {"id": "1", "title": "Camry"}
+    assert find_option_by_title(MODELS, "Prado")["id"] == "3"
+    assert find_option_by_title(MODELS, "Supra") is None
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app.services.field_scheduler import FieldScheduler
+
+
+def test_children_start_after_parents_and_see_results():
+    order = []
+
+    def node(name, value):
+        async def func(results):
+            order.append(name)
+            await asyncio.sleep(0)
+            return value(results) if callable(value) else value
+        return func
+
+    scheduler = FieldScheduler(max_concurrency=4)
+    scheduler.add("generation", node("generation", lambda r: f"{r['model']}/gen"), depends_on=["model", "year"])
+    scheduler.add("model", node("model", lambda r: f"{r['make']}/camry"), depends_on=["make"])
+    scheduler.add("make", node("make", "toyota"))
+    scheduler.add("year", node("year", "2018"))
+
+    results = asyncio.run(scheduler.run())
+    assert results["generation"] == "toyota/camry/gen"
+    assert order.index("make") < order.index("model") < order.index("generation")
+    assert order.index("year") < order.index("generation")
+
+
+def test_missing_dependencies_are_resolved_and_results_shared():
+    async def title(results):
+        return f"{results['static']} title"
+
+    scheduler = FieldScheduler()
+    scheduler.add("title", title, depends_on=["static"])
+    results = {"static": "preset"}
+    assert asyncio.run(scheduler.run(results)) is results
+    assert results["title"] == "preset title"
+
+
+def test_failed_node_does_not_block_children():
+    async def broken(results):
+        raise RuntimeError("LLM недоступен")
+
+    async def child(results):
+        return results.get("parent", "нет значения")
+
+    scheduler = FieldScheduler()
+    scheduler.add("parent", broken)
+    scheduler.add("child", child, depends_on=["parent"])
+    results = asyncio.run(scheduler.run())
+    assert "parent" not in results
+    assert results["child"] == "нет значения"
+
+
+def test_concurrency_limit_and_priority():
+    running = {"now": 0, "max": 0}
+    started = []
+
+    def node(name):
+        async def func(results):
+            started.append(name)
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.01)
+            running["now"] -= 1
+            return name
+        return func
+
+    scheduler = FieldScheduler(max_concurrency=2)
+    for name in ("a", "b", "c", "d"):
+        scheduler.add(name, node(name))
+    scheduler.add("vin", node("vin"), priority=True)
+    asyncio.run(scheduler.run())
+    assert running["max"] == 2
+    assert started[0] == "vin"
+
+
+def test_sync_functions_run_in_thread():
+    scheduler = FieldScheduler()
+    scheduler.add("sync", lambda results: "ok")
+    assert asyncio.run(scheduler.run()) == {"sync": "ok"}
+
+
+def test_on_result_callback():
+    seen = []
+    scheduler = FieldScheduler(on_result=lambda node_id, value: seen.append((node_id, value)))
+
+    async def make(results):
+        return {"label_id": "1"}
+
+    scheduler.add("make", make)
+    asyncio.run(scheduler.run())
+    assert seen == [("make", {"label_id": "1"})]
+
+
+def test_cycle_is_rejected():
+    async def func(results):
+        return None
+
+    scheduler = FieldScheduler()
+    scheduler.add("a", func, depends_on=["b"])
+    scheduler.add("b", func, depends_on=["a"])
+    with pytest.raises(ValueError, match="Цикл"):
+        asyncio.run(scheduler.run())
@@ -0,0 +1,91 @@
+import pytest
+
+from app.config.settings import DYNAMIC_IDS_MAP as IDS, STATIC_DEFAULTS
+from app.services.catalog import features_catalog
+from app.services.incremental_parse import diff_listing_lines, plan_incremental_parse
+
+PREVIOUS_TEXT = """Toyota Camry 2018
+Цена: 15 000 €
+Пробег: 95 000 км
+КПП: автомат
+Цвет: белый"""
+
+PREVIOUS_VALUES = {
+    IDS["make"]: {"label": "Toyota", "label_id": "1"},
+    IDS["model"]: {"label": "Camry", "label_id": "2"},
+    IDS["year"]: {"label": "2018"},
+    IDS["price"]: {"label": "15000"},
+    IDS["mileage"]: {"label": "95000"},
+    IDS["transmission"]: {"label": "Автомат", "label_id": "4"},
+    IDS["color"]: {"label": "Белый", "label_id": "7"},
+    IDS["description"]: {"label": "Описание"},
+    IDS["title"]: {"label": "Toyota Camry 2018"},
+    IDS["generation"]: {"label": "XV70", "label_id": "3"},
+}
+
+
+@pytest.fixture
+def all_features(posts_router):
+    return posts_router.collect_all_features(features_catalog.data)
+
+
+@pytest.fixture
+def previous_result(all_features):
+    features = []
+    for feature in all_features:
+        feature_id = str(feature["id"])
+        value = PREVIOUS_VALUES.get(feature_id, {"label": "", "label_id": ""})
+        item = {"id": feature_id, "title": feature["title"], "label": value["label"], "label_id": value.get("label_id", "")}
+        if feature_id == IDS["model"]:
+            item["options"] = [{"id": "2", "title": "Camry"}]
+        features.append(item)
+    return {"features_groups": [{"title": "Все", "features": features}]}
+
+
+@pytest.fixture
+def plan(previous_result, all_features, posts_router):
+    def run(text):
+        return plan_incremental_parse(
+            PREVIOUS_TEXT, text, previous_result, all_features, posts_router.get_field_dependencies
+        )
+    return run
+
+
+def dirty_ids(reused, all_features):
+    return {str(f["id"]) for f in all_features} - set(reused) - set(STATIC_DEFAULTS)
+
+
+def test_diff_listing_lines_ignores_whitespace():
+    assert diff_listing_lines("a\nb  c\n", "a\nb c") == ([], [])
+    assert diff_listing_lines("a\nb\nc", "a\nB\nc") == (["b"], ["B"])
+
+
+def test_unchanged_text_reuses_everything(plan, all_features):
+    reused, options = plan(PREVIOUS_TEXT + "\n")
+    assert dirty_ids(reused, all_features) == set()
+    assert options == {IDS["model"]: [{"id": "2", "title": "Camry"}]}
+
+
+def test_price_edit_reparses_price_and_whole_text_fields(plan, all_features):
+    reused, _ = plan(PREVIOUS_TEXT.replace("15 000", "14 500"))
+    dirty = dirty_ids(reused, all_features)
+    assert IDS["price"] in dirty
+    assert IDS["description"] in dirty
+    for field in ("make", "model", "generation", "mileage", "transmission", "color", "title"):
+        assert IDS[field] not in dirty
+
+
+def test_make_edit_cascades_to_dependent_and_derived_fields(plan, all_features):
+    text = PREVIOUS_TEXT.replace("Toyota Camry 2018", "Honda Accord 2018")
+    reused, options = plan(text)
+    dirty = dirty_ids(reused, all_features)
+    assert {IDS["make"], IDS["model"], IDS["generation"], IDS["title"]} <= dirty
+    assert IDS["price"] not in dirty
+    assert IDS["model"] not in options
+
+
+def test_unlabeled_new_value_is_detected(plan, all_features):
+    reused, _ = plan(PREVIOUS_TEXT + "\nтеперь механика")
+    dirty = dirty_ids(reused, all_features)
+    assert IDS["transmission"] in dirty
+    assert IDS["color"] not in dirty
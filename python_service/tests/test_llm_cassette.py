@@ -0,0 +1,35 @@
+import asyncio
+
+import httpx
+
+from app.services.llm_cassette import CassetteTransport, LatencyModel, make_cassette_key
+
+
+def test_key_includes_query_params_only_when_present():
+    models = httpx.Request("GET", "https://999.md/dependent_options?dependency_feature_id=20&parent_option_id=1")
+    other = httpx.Request("GET", "https://999.md/dependent_options?dependency_feature_id=20&parent_option_id=2")
+    post = httpx.Request("POST", "https://api.openai.com/v1/chat/completions", json={"model": "m"})
+    assert make_cassette_key(models) != make_cassette_key(other)
+    assert make_cassette_key(post) == make_cassette_key(
+        httpx.Request("POST", "https://api.openai.com/v1/chat/completions", json={"model": "m"})
+    )
+
+
+def test_record_then_replay_without_network(tmp_path):
+    def handler(request):
+        return httpx.Response(200, json={"options": [request.url.params["parent_option_id"]]})
+
+    async def fetch(transport, parent_id):
+        async with httpx.AsyncClient(base_url="https://999.md", transport=transport) as client:
+            response = await client.get("/dependent_options", params={"parent_option_id": parent_id})
+            return response.status_code, response.json()
+
+    recorder = CassetteTransport(
+        "record", str(tmp_path), LatencyModel("none"), inner=httpx.MockTransport(handler)
+    )
+    assert asyncio.run(fetch(recorder, "1")) == (200, {"options": ["1"]})
+
+    player = CassetteTransport("replay", str(tmp_path), LatencyModel("none"))
+    assert asyncio.run(fetch(player, "1")) == (200, {"options": ["1"]})
+    assert asyncio.run(fetch(player, "2"))[0] == 404
+    assert (player.hits, player.misses) == (1, 1)
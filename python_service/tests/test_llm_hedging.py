@@ -0,0 +1,73 @@
+import asyncio
+
+from app.services.llm_hedging import LLMHedger
+
+
+KEY = ("7", "field:fast")
+
+
+def make_hedger(**overrides):
+    options = dict(enabled=True, percentile=0.9, min_samples=3, window=10, min_delay=0.01, budget=1.0)
+    options.update(overrides)
+    hedger = LLMHedger(**options)
+    hedger.max_credits = 5
+    return hedger
+
+
+def test_delay_requires_min_samples():
+    hedger = make_hedger()
+    hedger.observe(KEY, 0.1)
+    hedger.observe(KEY, 0.2)
+    assert hedger.get_delay(KEY) is None
+    hedger.observe(KEY, 0.3)
+    assert hedger.get_delay(KEY) == 0.3
+
+
+def test_slow_call_is_hedged_and_loser_not_observed():
+    hedger = make_hedger()
+    for _ in range(3):
+        hedger.observe(KEY, 0.02)
+    delays = iter([1.0, 0.01])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "ok"
+
+    result, hedged = asyncio.run(hedger.run(KEY, call))
+    assert (result, hedged) == ("ok", True)
+    assert hedger.hedge_wins == 1
+    # Отменённый основной вызов не попал в окно задержек
+    assert len(hedger._latencies[KEY]) == 4
+    assert max(hedger._latencies[KEY]) < 0.5
+
+
+def test_hedge_denied_without_capacity():
+    hedger = make_hedger()
+    for _ in range(3):
+        hedger.observe(KEY, 0.01)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    result, hedged = asyncio.run(hedger.run(KEY, call, admit_hedge=lambda: False))
+    assert (result, hedged) == ("ok", False)
+    assert len(calls) == 1
+    assert hedger.stats()["hedges_denied"] == 1
+
+
+def test_invalid_primary_waits_for_hedge():
+    hedger = make_hedger()
+    for _ in range(3):
+        hedger.observe(KEY, 0.01)
+    answers = iter([(0.05, "bad"), (0.1, "good")])
+
+    async def call():
+        delay, answer = next(answers)
+        await asyncio.sleep(delay)
+        return answer
+
+    result, hedged = asyncio.run(hedger.run(KEY, call, is_valid=lambda value: value == "good"))
+    assert (result, hedged) == ("good", True)
@@ -0,0 +1,114 @@
+import pytest
+
+from app.config.settings import DYNAMIC_IDS_MAP
+from app.services.local_extractor import (
+    local_extractor,
+    LABELED_CONFIDENCE,
+    UNIQUE_CONFIDENCE,
+    UNLABELED_MEASURE_CONFIDENCE,
+)
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("Пробег: 95 000 km", "95000", LABELED_CONFIDENCE),
+    ("Пробег: 95 000 км", "95000", LABELED_CONFIDENCE),
+    ("Пробег 95k", "95000", LABELED_CONFIDENCE),
+    ("Пробег: 95K km", "95000", LABELED_CONFIDENCE),
+    ("Пробег: 95 тыс.км", "95000", LABELED_CONFIDENCE),
+    ("пробег 120 тысяч км", "120000", LABELED_CONFIDENCE),
+    ("Пробег: 1,2 тыс", "1200", LABELED_CONFIDENCE),
+    ("95 тыс. км", "95000", UNLABELED_MEASURE_CONFIDENCE),
+    ("95000 km, один владелец", "95000", UNLABELED_MEASURE_CONFIDENCE),
+])
+def test_extract_mileage(text, expected, confidence):
+    assert local_extractor.extract_mileage(text, {}) == {"label": expected, "confidence": confidence}
+
+
+@pytest.mark.parametrize("text, expected, confidence", [
+    ("Цена 2.5 тыс евро", "2500", LABELED_CONFIDENCE),
+    ("Цена: 7 300 €", "7300", LABELED_CONFIDENCE),
+    ("Цена: 7.300", "7300", LABELED_CONFIDENCE),
+    ("Цена: 15000", "15000", LABELED_CONFIDENCE),
+    ("2,5k €", "2500", UNIQUE_CONFIDENCE),
+    ("Продаю за 9 500 €", "9500", UNIQUE_CONFIDENCE),
+])
+def test_extract_price(text, expected, confidence):
+    assert local_extractor.extract_price(text, {}) == {"label": expected, "confidence": confidence}
+
+
+@pytest.mark.parametrize("text", [
+    "Цена 12.5 евро",
+    "Кредит 150 € в месяц",
+])
+def test_extract_price_rejects_unreliable_values(text):
+    assert local_extractor.extract_price(text, {}) is None
+
+
+@pytest.mark.parametrize("text", [
+    "разгон до 100 км/ч",
+    "Максимальная скорость 210 km/h",
+    "Расход 6.5 л на 100 км",
+    "Расход 6.5 л/100км",
+])
+def test_speed_and_consumption_are_not_mileage(text):
+    assert local_extractor.extract_mileage(text, {}) is None
+
+
+@pytest.mark.parametrize("text", [
+    "разгон до 100 км/ч",
+    "Расход 6.5 л на 100 км",
+    "95 000 км, один владелец",
+])
+def test_unlabeled_mileage_is_left_to_llm(text):
+    fields = [{"id": DYNAMIC_IDS_MAP["mileage"], "title": "Пробег"}]
+    assert local_extractor.extract_confident(text, fields) == {}
+
+
+def test_km_is_not_thousands_multiplier():
+    fields = [{"id": DYNAMIC_IDS_MAP["mileage"], "title": "Пробег"}]
+    assert local_extractor.extract_confident("Пробег: 95 000 km", fields) == {
+        DYNAMIC_IDS_MAP["mileage"]: {"label": "95000"}
+    }
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("VIN: wvwzzz1kzaw123456", "WVWZZZ1KZAW123456"),
+    ("Машина в наличии, WVWZZZ1KZAW123456", "WVWZZZ1KZAW123456"),
+])
+def test_extract_vin(text, expected):
+    assert local_extractor.extract_vin(text, {})["label"] == expected
+
+
+def test_extract_vin_ignores_plain_words():
+    assert local_extractor.extract_vin("ABCDEFGHJKLMNPRST", {}) is None
+
+
+def test_extract_year_prefers_label():
+    text = "ТО пройдено в 2021\nГод выпуска: 2015"
+    assert local_extractor.extract_year(text, {}) == {"label": "2015", "confidence": LABELED_CONFIDENCE}
+
+
+def test_extract_power_converts_kw():
+    assert local_extractor.extract_power("Мощность: 110 кВт", {})["label"] == "150"
+
+
+@pytest.mark.parametrize("text", [
+    "Расход 6.5 л на 100 км",
+    "Расход в городе 8.2 л",
+])
+def test_fuel_consumption_is_not_engine_volume(catalog_field, text):
+    assert local_extractor.extract_engine(text, catalog_field(DYNAMIC_IDS_MAP["engine"])) is None
+
+
+def test_engine_volume_next_to_consumption(catalog_field):
+    field = catalog_field(DYNAMIC_IDS_MAP["engine"])
+    assert local_extractor.extract_engine("2.0 TDI, расход 6.5 л/100км", field) == {
+        "label": "2.0 л", "label_id": "43684", "confidence": UNLABELED_MEASURE_CONFIDENCE
+    }
+    assert local_extractor.extract_engine("Двигатель: 2.0", field)["confidence"] == LABELED_CONFIDENCE
+
+
+def test_extract_engine_electric_requires_engine_context(catalog_field):
+    field = catalog_field(DYNAMIC_IDS_MAP["engine"])
+    assert local_extractor.extract_engine("Toyota Camry 2018\nэлектро-зеркала, электрический люк", field) is None
+    assert local_extractor.extract_engine("Электромобиль, запас хода 400 км", field) is not None
@@ -0,0 +1,22 @@
+import asyncio
+
+from app.services.nine_api import NineService
+
+
+def test_client_of_previous_event_loop_is_closed():
+    service = NineService()
+
+    async def get_client():
+        return service.client
+
+    async def switch_loop():
+        client = service.client
+        await service._closing
+        return client
+
+    old = asyncio.run(get_client())
+    new = asyncio.run(switch_loop())
+    assert old.is_closed
+    assert new is not old and not new.is_closed
+    asyncio.run(service.aclose())
+    assert new.is_closed
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.option_matcher import (
+    option_matcher,
+    normalize_phrase,
+    MATCH,
+    AMBIGUOUS,
+    NOT_FOUND,
+)
+
+
+FUEL_ID = "151"
+GEARBOX_ID = "101"
+DRIVE_ID = "108"
+COLOR_ID = "17"
+
+
+def test_normalize_phrase():
+    assert normalize_phrase("Cutia de viteze: Automată!") == " cutia de viteze automata "
+    assert normalize_phrase("Привод 4х4") == " привод 4x4 "
+
+
+@pytest.mark.parametrize("field_id, text, expected, labeled", [
+    (FUEL_ID, "Топливо: дизель", "Дизель", True),
+    (FUEL_ID, "Golf 2.0 TDI, в отличном состоянии", "Дизель", False),
+    (FUEL_ID, "Двигатель: электро", "Электричество", True),
+    (FUEL_ID, "Tesla Model 3, электромобиль", "Электричество", False),
+    (FUEL_ID, "Combustibil: electric", "Электричество", True),
+    (FUEL_ID, "Тип топлива: плагин-гибрид", "Плагин-гибрид (бензин)", True),
+    (GEARBOX_ID, "Коробка: автомат", "Автомат", True),
+    (GEARBOX_ID, "КПП: ручная", "Механика", True),
+    (GEARBOX_ID, "Cutie de viteze: manuală", "Механика", True),
+    (DRIVE_ID, "Привод: полный", "4х4", True),
+    (COLOR_ID, "Цвет: белый", "Белый", True),
+])
+def test_match(catalog_field, field_id, text, expected, labeled):
+    matched = option_matcher.match(text, catalog_field(field_id))
+    assert matched["status"] == MATCH
+    assert matched["label"] == expected
+    assert matched["labeled"] is labeled
+
+
+@pytest.mark.parametrize("text", [
+    "Toyota Camry 2018\nэлектро-зеркала, электрический люк",
+    "Опции: электрические сиденья, EV-режим не поддерживается",
+    "Electric mirrors, heated seats",
+])
+def test_electric_equipment_is_not_fuel(catalog_field, text):
+    assert option_matcher.match(text, catalog_field(FUEL_ID))["status"] == NOT_FOUND
+
+
+def test_electric_equipment_does_not_override_fuel(catalog_field):
+    text = "Camry 2.5 бензин\nэлектро-зеркала, электрический люк"
+    matched = option_matcher.match(text, catalog_field(FUEL_ID))
+    assert (matched["status"], matched["label"]) == (MATCH, "Бензин")
+
+
+@pytest.mark.parametrize("text", [
+    "Автоматическая парковка, камера заднего вида",
+    "Manual book, service history",
+    "Ручная регулировка сидений",
+    "Climă automată, scaune încălzite",
+])
+def test_equipment_adjectives_are_not_gearbox(catalog_field, text):
+    assert option_matcher.match(text, catalog_field(GEARBOX_ID))["status"] == NOT_FOUND
+
+
+def test_labeled_line_wins_over_rest_of_text(catalog_field):
+    text = "Раньше был на механике\nКПП: автомат"
+    matched = option_matcher.match(text, catalog_field(GEARBOX_ID))
+    assert (matched["status"], matched["label"], matched["labeled"]) == (MATCH, "Автомат", True)
+
+
+def test_unlabeled_drive_is_ignored(catalog_field):
+    assert option_matcher.match("Новый передний бампер", catalog_field(DRIVE_ID))["status"] == NOT_FOUND
+
+
+def test_ambiguous(catalog_field):
+    matched = option_matcher.match("Есть версии автомат и механика", catalog_field(GEARBOX_ID))
+    assert matched["status"] == AMBIGUOUS
+    assert {c["title"] for c in matched["candidates"]} == {"Автомат", "Механика"}
+
+
+def test_longer_phrase_takes_its_fragment(catalog_field):
+    matched = option_matcher.match("Plug-in hybrid, запас хода 50 км", catalog_field(FUEL_ID))
+    assert (matched["status"], matched["label"]) == (MATCH, "Плагин-гибрид (бензин)")
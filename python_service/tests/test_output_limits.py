@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.services.ai_parser import ROUTE_FAST, ai_parser_service, get_max_output_tokens
+from app.services.prompts import MAX_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS_LIMIT
+
+
+def test_retelling_limit_grows_with_input():
+    assert get_max_output_tokens("description_blocks", 100) == MAX_OUTPUT_TOKENS["description_blocks"]
+    assert get_max_output_tokens("description_blocks", 10_000) > MAX_OUTPUT_TOKENS["description_blocks"]
+    assert get_max_output_tokens("description_fused", 10**6) == MAX_OUTPUT_TOKENS_LIMIT
+    assert get_max_output_tokens("title", 10_000) == MAX_OUTPUT_TOKENS["title"]
+
+
+class FakeLLM:
+    """Обрывает ответ, пока лимит меньше needed_tokens."""
+
+    def __init__(self, needed_tokens):
+        self.needed_tokens = needed_tokens
+        self.limits = []
+
+    def bind(self, **kwargs):
+        self.limits.append(kwargs.get("max_tokens"))
+        return self
+
+    async def ainvoke(self, messages):
+        truncated = self.limits[-1] < self.needed_tokens
+        return AIMessage(
+            content='{"title": "Camry' if truncated else '{"title": "Camry"}',
+            response_metadata={"finish_reason": "length" if truncated else "stop"},
+        )
+
+
+def test_truncated_response_is_retried_with_larger_limit(monkeypatch):
+    llm = FakeLLM(needed_tokens=200)
+    monkeypatch.setattr(ai_parser_service, "llm", llm)
+    response = asyncio.run(
+        ai_parser_service._ainvoke([HumanMessage(content="текст")], "title", route=ROUTE_FAST)
+    )
+    assert response.content == '{"title": "Camry"}'
+    assert llm.limits == [60, 120, 240]
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.config.settings import FEATURE_MARKA_ID, FEATURE_MODEL_ID, POST_CONFIG_CACHE_PARTIAL_TTL
+from app.services import post_config_cache as cache_module
+from app.services.llm_metrics import llm_metrics
+from app.services.post_config_cache import PostConfigCache, normalize_listing_text
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(cache_module)
+
+
+@pytest.fixture
+def cache():
+    return PostConfigCache(max_size=2, ttl=100)
+
+
+def test_normalize_listing_text():
+    assert normalize_listing_text("  Продаю\tавто  \r\n\nЦена:  5000 \n\n") == "Продаю авто\n\nЦена: 5000"
+
+
+def test_key_ignores_whitespace_but_not_catalog(cache):
+    key = cache.make_key("Продаю авто", "catalog-1")
+    assert cache.make_key("  Продаю   авто \n", "catalog-1") == key
+    assert cache.make_key("Продаю авто", "catalog-2") != key
+    assert cache.make_key("Продаю авто!", "catalog-1") != key
+
+
+def test_get_returns_copy(cache, clock):
+    cache.set("k", {"features_groups": [{"title": "A"}]})
+    cache.get("k")["features_groups"].clear()
+    assert cache.get("k") == {"features_groups": [{"title": "A"}]}
+    assert cache.stats()["hits"] == 2
+
+
+def test_ttl_expiry_and_override(cache, clock):
+    cache.set("default", {"v": 1})
+    cache.set("short", {"v": 2}, ttl=10)
+    clock.now += 11
+    assert cache.get("short") is None
+    assert cache.get("default") == {"v": 1}
+    clock.now += 90
+    assert cache.get("default") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_lru_eviction(cache, clock):
+    cache.set("a", {"v": "a"})
+    cache.set("b", {"v": "b"})
+    cache.get("a")
+    cache.set("c", {"v": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"}
+    assert cache.get("c") == {"v": "c"}
+
+
+def test_track_failures_counts_child_tasks():
+    async def failing_call():
+        with llm_metrics.field_scope("12+13"):
+            llm_metrics.record_call("field", 0.1, success=False)
+        llm_metrics.record_parse_failure("field")
+
+    async def run():
+        with llm_metrics.track_failures() as failures:
+            await asyncio.gather(asyncio.create_task(failing_call()))
+        llm_metrics.record_call("field", 0.1, success=False)
+        return failures
+
+    assert asyncio.run(run()) == {"errors": 1, "parse_failures": 1, "rejected": 0, "fields": {"12", "13", "-"}}
+
+
+@pytest.fixture
+def router_cache(monkeypatch, posts_router):
+    cache = PostConfigCache(max_size=10, ttl=3600)
+    monkeypatch.setattr(posts_router, "post_config_cache", cache)
+    return cache
+
+
+def _ttl_left(cache, key):
+    expires_at, _ = cache._entries[key]
+    return expires_at - cache_module.time.monotonic()
+
+
+def no_failures():
+    return {"errors": 0, "parse_failures": 0, "rejected": 0, "fields": set()}
+
+
+def test_field_left_empty_by_llm_failure_is_not_cached(router_cache, posts_router):
+    failures = {"errors": 1, "parse_failures": 0, "rejected": 0, "fields": {FEATURE_MARKA_ID}}
+    parsed = {FEATURE_MARKA_ID: {"label": "", "label_id": ""}}
+    posts_router.cache_post_config("k", {"features_groups": []}, failures, parsed, {})
+    assert router_cache.get("k") is None
+
+
+def test_recovered_llm_failures_do_not_block_cache(router_cache, posts_router):
+    # Общий вызов упал, поле допарсено; ответ поля разобран после повтора
+    failures = {"errors": 1, "parse_failures": 1, "rejected": 0, "fields": {posts_router.COMBINED_NODE_ID, "12"}}
+    parsed = {"12": {"label": "Седан", "label_id": "3"}}
+    posts_router.cache_post_config("k", {"features_groups": []}, failures, parsed, {})
+    assert router_cache.get("k") == {"features_groups": []}
+
+
+def test_result_without_dependent_options_is_cached_briefly(router_cache, posts_router):
+    parsed = {FEATURE_MARKA_ID: {"label": "Toyota", "label_id": "1"}}
+    posts_router.cache_post_config("k", {"features_groups": []}, no_failures(), parsed, {})
+    assert _ttl_left(router_cache, "k") == pytest.approx(POST_CONFIG_CACHE_PARTIAL_TTL, abs=1)
+
+
+def test_complete_result_is_cached_with_default_ttl(router_cache, posts_router):
+    parsed = {FEATURE_MARKA_ID: {"label": "Toyota", "label_id": "1"}}
+    options = {FEATURE_MODEL_ID: [{"id": "2", "title": "Camry"}]}
+    posts_router.cache_post_config("k", {"features_groups": []}, no_failures(), parsed, options)
+    assert _ttl_left(router_cache, "k") > POST_CONFIG_CACHE_PARTIAL_TTL
+
+
+def test_incremental_result_is_not_cached(router_cache, posts_router):
+    reused = {FEATURE_MARKA_ID: {"label": "Toyota", "label_id": "1"}}
+    options = {FEATURE_MODEL_ID: [{"id": "2", "title": "Camry"}]}
+    posts_router.cache_post_config(
+        "k", {"features_groups": []}, no_failures(), reused, options, reused
+    )
+    assert router_cache.get("k") is None
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.services.rate_governor import LLMQueueFullError, LLMRateGovernor, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+
+
+def test_disabled_governor_never_waits():
+    governor = LLMRateGovernor(rpm=0, tpm=0, max_queue=1)
+    asyncio.run(governor.acquire(10_000))
+    assert governor.try_acquire(10_000)
+    assert not governor.is_saturated()
+
+
+def test_interactive_calls_overtake_batch():
+    # 600 RPM: после первого вызова следующий лимит появляется раз в 0.1с
+    governor = LLMRateGovernor(rpm=600, tpm=0, max_queue=10)
+    governor._available_requests = 1.0
+    order = []
+
+    async def call(name, priority):
+        await governor.acquire(1, priority=priority)
+        order.append(name)
+
+    async def run():
+        await governor.acquire(1)
+        batch = [asyncio.create_task(call(f"batch{i}", PRIORITY_BATCH)) for i in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", PRIORITY_INTERACTIVE))
+        await asyncio.gather(*batch, interactive)
+
+    asyncio.run(run())
+    assert order[0] == "interactive"
+    assert governor.stats()["queued"] == 3
+
+
+def test_priority_scope_applies_to_child_tasks():
+    governor = LLMRateGovernor(rpm=600, tpm=0, max_queue=10)
+    governor._available_requests = 0.0
+    priorities = []
+
+    async def run():
+        with governor.priority_scope(PRIORITY_BATCH):
+            task = asyncio.create_task(governor.acquire(1))
+        await asyncio.sleep(0)
+        priorities.extend(waiter[0] for waiter in governor._waiters)
+        await task
+
+    asyncio.run(run())
+    assert priorities == [PRIORITY_BATCH]
+
+
+def test_full_queue_rejects_new_calls():
+    governor = LLMRateGovernor(rpm=60, tpm=0, max_queue=2)
+    governor._available_requests = 0.0
+
+    async def run():
+        tasks = [asyncio.create_task(governor.acquire(1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        saturated = governor.is_saturated()
+        with pytest.raises(LLMQueueFullError) as error:
+            await governor.acquire(1)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return saturated, error.value.retry_after
+
+    saturated, retry_after = asyncio.run(run())
+    assert saturated
+    assert retry_after == 1
+    assert governor.stats()["rejected"] == 1
+    assert governor.stats()["queued"] == 2
+
+
+def test_try_acquire_never_queues():
+    governor = LLMRateGovernor(rpm=60, tpm=1000, max_queue=10)
+    governor._available_requests = 1.0
+    assert governor.try_acquire(100)
+    assert not governor.try_acquire(100)
+    assert governor.queue_size() == 0
+
+
+def test_settle_returns_unused_tokens():
+    governor = LLMRateGovernor(rpm=0, tpm=1000, max_queue=10)
+    assert governor.try_acquire(800)
+    governor.settle(800, 200)
+    assert governor.try_acquire(700)
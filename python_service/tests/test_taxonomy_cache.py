@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from app.services import taxonomy_cache as cache_module
+from app.services.taxonomy_cache import TaxonomyCache
+
+KEY = ("models", "659", "10", "ru")
+MODELS = [{"id": "1", "name": "Camry"}]
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(cache_module)
+
+
+def make_cache():
+    return TaxonomyCache(max_size=10, ttl=100, stale_ttl=50, negative_ttl=10)
+
+
+def counting_loader(results):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0)
+        result = results[min(len(calls), len(results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return loader, calls
+
+
+def test_concurrent_misses_share_one_load(clock):
+    cache = make_cache()
+    loader, calls = counting_loader([MODELS])
+
+    async def run():
+        return await asyncio.gather(*(cache.get(KEY, loader) for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert all(result == MODELS for result in results)
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 19
+
+
+def test_returns_copies(clock):
+    cache = make_cache()
+    loader, _ = counting_loader([MODELS])
+
+    async def run():
+        first = await cache.get(KEY, loader)
+        first[0]["name"] = "изменено"
+        return await cache.get(KEY, loader)
+
+    assert asyncio.run(run()) == MODELS
+
+
+def test_stale_entry_served_while_refreshing(clock):
+    cache = make_cache()
+    fresh = [{"id": "2", "name": "Corolla"}]
+    loader, calls = counting_loader([MODELS, fresh])
+
+    async def run():
+        await cache.get(KEY, loader)
+        clock.now += 120
+        stale = await cache.get(KEY, loader)
+        await asyncio.sleep(0.01)
+        return stale, await cache.get(KEY, loader)
+
+    stale, refreshed = asyncio.run(run())
+    assert stale == MODELS
+    assert refreshed == fresh
+    assert len(calls) == 2
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_failed_refresh_keeps_previous_list(clock):
+    cache = make_cache()
+    loader, calls = counting_loader([MODELS, RuntimeError("999.md 503")])
+
+    async def run():
+        await cache.get(KEY, loader)
+        clock.now += 120
+        await cache.get(KEY, loader)
+        await asyncio.sleep(0.01)
+        return await cache.get(KEY, loader)
+
+    assert asyncio.run(run()) == MODELS
+    assert len(calls) == 2
+    assert cache.stats()["errors"] == 1
+
+
+def test_errors_and_empty_lists_are_cached_briefly(clock):
+    cache = make_cache()
+    loader, calls = counting_loader([RuntimeError("timeout"), MODELS])
+
+    async def run():
+        first = await cache.get(KEY, loader)
+        again = await cache.get(KEY, loader)
+        clock.now += 11
+        return first, again, await cache.get(KEY, loader)
+
+    assert asyncio.run(run()) == ([], [], MODELS)
+    assert len(calls) == 2
+
+
+def test_lru_eviction(clock):
+    cache = TaxonomyCache(max_size=2, ttl=100, stale_ttl=0, negative_ttl=10)
+
+    async def run():
+        for parent_id in ("1", "2", "3"):
+            async def loader(parent_id=parent_id):
+                return [{"id": parent_id, "name": parent_id}]
+            await cache.get(("models", "659", parent_id, "ru"), loader)
+
+    asyncio.run(run())
+    assert cache.stats()["size"] == 2
+    assert ("models", "659", "1", "ru") not in cache._entries
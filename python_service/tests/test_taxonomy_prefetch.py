@@ -0,0 +1,69 @@
+import asyncio
+
+from app.services import taxonomy_prefetch
+from app.services.taxonomy_prefetch import TaxonomyPrefetcher
+
+
+def test_cancelled_waiter_does_not_cancel_shared_load(monkeypatch):
+    calls = []
+
+    async def get_models(make_id):
+        calls.append(make_id)
+        await asyncio.sleep(0.05)
+        return [{"id": "1", "name": "Camry"}]
+
+    monkeypatch.setattr(taxonomy_prefetch.nine_service, "get_models", get_models)
+
+    async def run():
+        shared = TaxonomyPrefetcher("", candidates=0)
+        first = TaxonomyPrefetcher("Toyota Camry", candidates=0, shared=shared)
+        second = TaxonomyPrefetcher("Toyota Camry", candidates=0, shared=shared)
+
+        cancelled = asyncio.create_task(first.get_models("10"))
+        waiting = asyncio.create_task(second.get_models("10"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await first.close()
+
+        models = await waiting
+        await second.close()
+        await shared.close()
+        return cancelled.cancelled(), models
+
+    was_cancelled, models = asyncio.run(run())
+    assert was_cancelled
+    assert models == [{"id": "1", "name": "Camry"}]
+    assert calls == ["10"]
+
+
+def test_owner_close_cancels_unused_loads(monkeypatch):
+    async def get_generations(model_id):
+        await asyncio.sleep(10)
+        return []
+
+    monkeypatch.setattr(taxonomy_prefetch.nine_service, "get_generations", get_generations)
+
+    async def run():
+        prefetcher = TaxonomyPrefetcher("", candidates=0)
+        prefetcher.prefetch_generations("5")
+        task = prefetcher._generations["5"]
+        await prefetcher.close()
+        return task.cancelled()
+
+    assert asyncio.run(run())
+
+
+def test_load_errors_become_empty_list(monkeypatch):
+    async def get_models(make_id):
+        raise RuntimeError("999.md недоступен")
+
+    monkeypatch.setattr(taxonomy_prefetch.nine_service, "get_models", get_models)
+
+    async def run():
+        prefetcher = TaxonomyPrefetcher("", candidates=0)
+        try:
+            return await prefetcher.get_models("10")
+        finally:
+            await prefetcher.close()
+
+    assert asyncio.run(run()) == []